@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from services.aio.cart_service import add_to_cart, add_many_to_cart, get_cart, delete_all_cart
+from api.schemas import CartItemRequest, CartItemsRequest
+
+router = APIRouter()
+
+@router.post("/cart")
+async def add_item_to_cart(item: CartItemRequest):
+    return await add_to_cart(item)
+
+@router.post("/cart/items")
+async def add_items_to_cart(request: CartItemsRequest):
+    return await add_many_to_cart(request.user_id, request.items)
+
+@router.get("/cart/{user_id}")
+async def get_cart_items(user_id: int):
+    return await get_cart(user_id)
+
+@router.delete("/cart/{user_id}")
+async def empty_cart(user_id: int):
+    return await delete_all_cart(user_id)
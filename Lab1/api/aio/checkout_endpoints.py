@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException
+from services.aio.checkout_service import checkout
+from services.checkout_service import CheckoutError
+from api.schemas import CheckoutResponse
+
+router = APIRouter()
+
+@router.post("/checkout/{user_id}", response_model=CheckoutResponse)
+async def checkout_cart(user_id: int):
+    try:
+        return await checkout(user_id)
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
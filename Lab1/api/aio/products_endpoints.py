@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from services.product_service import InsufficientStockError
+from services.aio.product_service import list_products_page, iter_products, search_products, add_product, update_product_by_id, get_product_by_id
+from api.products_endpoints import create_products_bulk
+from api.fast_json import dumps, FastJSONResponse
+from api.schemas import ProductRequest, ProductResponse, ProductPage, ProductSearchResponse, BulkLoadResponse
+
+router = APIRouter()
+
+async def _ndjson_lines(products):
+    async for p in products:
+        yield dumps(p) + b"\n"
+
+@router.get("/products", response_model=ProductPage)
+async def get_products(
+    cursor: int = Query(0, ge=0, description="Devuelve productos con id mayor a este valor"),
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = Query(False, description="Transmite todo el catalogo como NDJSON"),
+    fast: bool = Query(False, description="Serializa las filas tal cual con orjson, sin revalidar con ProductPage"),
+):
+    if stream:
+        return StreamingResponse(_ndjson_lines(iter_products(after_id=cursor)), media_type="application/x-ndjson")
+    page = await list_products_page(after_id=cursor, limit=limit)
+    if fast:
+        return FastJSONResponse(page)
+    return page
+
+# Declarada antes de /products/{product_id} para que "search" no se lea como id.
+@router.get("/products/search", response_model=ProductSearchResponse)
+async def search_products_by_name(
+    q: str = Query(..., min_length=1, description="Nombre o parte del nombre; tolera errores de tipeo"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    return await search_products(q, limit=limit)
+
+@router.get("/products/{product_id}", response_model=ProductResponse)
+async def get_products_by_id(product_id: int):
+    return await get_product_by_id(product_id)
+
+@router.post("/products", response_model=ProductResponse)
+async def create_product(product: ProductRequest):
+    return await add_product(product)
+
+# La carga masiva ya es async (el COPY corre en el threadpool); se reutiliza tal cual.
+router.add_api_route("/products/bulk", create_products_bulk, methods=["POST"], response_model=BulkLoadResponse)
+
+@router.patch("/products/{product_id}", response_model=ProductResponse)
+async def update_product(product_id: int, cantidad: int):
+    try:
+        return await update_product_by_id(product_id, cantidad)
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
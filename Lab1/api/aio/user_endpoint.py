@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from services.aio.user_service import get_user_by_id, create_user
+from api.schemas import UserRequest
+
+router = APIRouter()
+
+@router.get("/users/{user_id}")
+async def get_user(user_id: int):
+    return await get_user_by_id(user_id)
+
+@router.post("/users")
+async def add_user(user: UserRequest):
+    return await create_user(user)
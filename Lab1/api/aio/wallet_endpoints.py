@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from services.aio.wallet_service import add_funds, get_balance, get_history, discount_wallet_by_user_id
+
+router = APIRouter()
+
+@router.post("/wallet/{user_id}")
+async def add_wallet_funds(amount: int, user_id: int):
+    return await add_funds(amount, user_id=user_id)
+
+@router.get("/wallet/{user_id}")
+async def get_wallet_balance(user_id: int):
+    return await get_balance(user_id=user_id)
+
+@router.get("/wallet/{user_id}/history")
+async def get_wallet_history(user_id: int, limit: int = 100):
+    return await get_history(user_id, limit=limit)
+
+@router.patch("/wallet/{user_id}")
+async def discount_wallet(amount: float, user_id: int):
+    return await discount_wallet_by_user_id(amount, user_id=user_id)
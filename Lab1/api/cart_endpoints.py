@@ -1,17 +1,21 @@
 from fastapi import APIRouter
-from services.cart_service import add_to_cart, get_cart, delete_all_cart
-from api.schemas import CartRequest, CartResponse, CartItemRequest
+from services.storage import storage
+from api.schemas import CartRequest, CartResponse, CartItemRequest, CartItemsRequest
 
 router = APIRouter()
 
 @router.post("/cart")
 def add_item_to_cart(item: CartItemRequest):
-    return add_to_cart(item)
+    return storage.add_to_cart(item)
+
+@router.post("/cart/items")
+def add_items_to_cart(request: CartItemsRequest):
+    return storage.add_many_to_cart(request.user_id, request.items)
 
 @router.get("/cart/{user_id}")
 def get_cart_items(user_id: int):
-    return get_cart(user_id)
+    return storage.get_cart(user_id)
 
 @router.delete("/cart/{user_id}")
 def empty_cart(user_id: int):
-    return delete_all_cart(user_id)
\ No newline at end of file
+    return storage.delete_all_cart(user_id)
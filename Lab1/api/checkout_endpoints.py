@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException
+from services.checkout_service import CheckoutError
+from services.storage import storage
+from api.schemas import CheckoutResponse
+
+router = APIRouter()
+
+@router.post("/checkout/{user_id}", response_model=CheckoutResponse)
+def checkout_cart(user_id: int):
+    try:
+        return storage.checkout(user_id)
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
@@ -0,0 +1,34 @@
+import json
+from decimal import Decimal
+from datetime import datetime
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin el se usa json de la libreria estandar
+    orjson = None
+
+
+def _default(value):
+    # psycopg2 devuelve DECIMAL como Decimal; se publica como numero igual que ProductResponse.price.
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(content):
+    """Serialize rows the services already built (dicts, lists, Decimal, datetime) to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips response_model validation and jsonable_encoder; orjson when installed."""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Query
+from services.inventory_service import split_stock, get_availability, reserve, confirm, release, release_expired, InventoryError
+from api.schemas import ReservationRequest
+
+router = APIRouter()
+
+def _call(fn, *args):
+    try:
+        return fn(*args)
+    except InventoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.get("/inventory/{product_id}")
+def get_inventory(product_id: int):
+    return _call(get_availability, product_id)
+
+@router.post("/inventory/{product_id}/slots")
+def split_inventory(product_id: int, slots: int = Query(..., ge=0, le=1024)):
+    return _call(split_stock, product_id, slots)
+
+@router.post("/inventory/{product_id}/reservations")
+def reserve_inventory(product_id: int, request: ReservationRequest):
+    return _call(reserve, product_id, request.user_id, request.quantity)
+
+@router.post("/inventory/reservations/expire")
+def expire_reservations():
+    return release_expired()
+
+@router.post("/inventory/reservations/{reservation_id}/confirm")
+def confirm_reservation(reservation_id: int):
+    return _call(confirm, reservation_id)
+
+@router.delete("/inventory/reservations/{reservation_id}")
+def release_reservation(reservation_id: int):
+    return _call(release, reservation_id)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from database.connection import pool_stats, DB_DRIVER
+from database.queries import query_stats
+from services.product_service import cache_stats
+from services.cart_service import cart_buffer
+from services.wallet_service import top_up_committer
+from services.storage import STORAGE_BACKEND
+
+router = APIRouter()
+
+@router.get("/metrics")
+def get_metrics():
+    if STORAGE_BACKEND != "postgres":
+        return {"driver": DB_DRIVER, "storage": STORAGE_BACKEND}
+    metrics = {"driver": DB_DRIVER, "storage": STORAGE_BACKEND, "pool": pool_stats(), "product_cache": cache_stats(),
+               "cart_buffer": cart_buffer.stats(), "wallet_group_commit": top_up_committer.stats(), **query_stats()}
+    if DB_DRIVER == "async":
+        from database.async_connection import async_pool_stats
+        metrics["async_pool"] = async_pool_stats()
+    return metrics
@@ -1,21 +1,71 @@
-from fastapi import APIRouter
-from services.product_service import list_products, add_product, update_product_by_id, get_product_by_id
-from api.schemas import ProductRequest, ProductResponse
+import io
+import tempfile
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from services.product_service import InsufficientStockError
+from services.bulk_service import DEFAULT_BATCH_SIZE
+from services.storage import storage
+from api.fast_json import dumps, FastJSONResponse
+from api.schemas import ProductRequest, ProductResponse, ProductPage, ProductSearchResponse, BulkLoadResponse
 
 router = APIRouter()
 
-@router.get("/products", response_model=list[ProductResponse])
-def get_products():
-    return list_products()
+def _ndjson_lines(products):
+    for p in products:
+        yield dumps(p) + b"\n"
+
+@router.get("/products", response_model=ProductPage)
+def get_products(
+    cursor: int = Query(0, ge=0, description="Devuelve productos con id mayor a este valor"),
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = Query(False, description="Transmite todo el catalogo como NDJSON"),
+    fast: bool = Query(False, description="Serializa las filas tal cual con orjson, sin revalidar con ProductPage"),
+):
+    if stream:
+        return StreamingResponse(_ndjson_lines(storage.iter_products(after_id=cursor)), media_type="application/x-ndjson")
+    page = storage.list_products_page(after_id=cursor, limit=limit)
+    if fast:
+        # Las filas ya vienen tipadas del servicio: se evita la validacion y jsonable_encoder por fila.
+        return FastJSONResponse(page)
+    return page
+
+# Declarada antes de /products/{product_id} para que "search" no se lea como id.
+@router.get("/products/search", response_model=ProductSearchResponse)
+def search_products_by_name(
+    q: str = Query(..., min_length=1, description="Nombre o parte del nombre; tolera errores de tipeo"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    return storage.search_products(q, limit=limit)
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
 def get_products_by_id(product_id: int):
-    return get_product_by_id(product_id)
+    return storage.get_product_by_id(product_id)
 
 @router.post("/products", response_model=ProductResponse)
 def create_product(product: ProductRequest):
-    return add_product(product)
+    return storage.add_product(product)
+
+@router.post("/products/bulk", response_model=BulkLoadResponse)
+async def create_products_bulk(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+):
+    # El cuerpo se vuelca a un archivo temporal por partes; la carga (COPY en Postgres) corre fuera del event loop.
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            return await run_in_threadpool(storage.bulk_load_products, text, format, batch_size)
+        finally:
+            text.detach()
 
 @router.patch("/products/{product_id}", response_model=ProductResponse)
 def update_product(product_id: int, cantidad: int):
-    return update_product_by_id(product_id, cantidad)
\ No newline at end of file
+    try:
+        return storage.update_product_by_id(product_id, cantidad)
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 # Products
 class ProductRequest(BaseModel):
@@ -14,6 +15,41 @@ class ProductResponse(BaseModel):
     price: float
     created_at: datetime
 
+class ProductPage(BaseModel):
+    items: list[ProductResponse]
+    next_cursor: Optional[int] = None
+
+class ProductSearchHit(BaseModel):
+    id: int
+    product_name: str
+    score: float
+
+class ProductSearchResponse(BaseModel):
+    query: str
+    items: list[ProductSearchHit]
+
+class BulkLoadError(BaseModel):
+    line: Optional[int] = None
+    error: str
+
+class BulkLoadBatch(BaseModel):
+    batch: int
+    first_line: Optional[int] = None
+    last_line: Optional[int] = None
+    loaded: int
+    rejected: int
+    errors: list[BulkLoadError]
+
+class BulkLoadResponse(BaseModel):
+    loaded: int
+    rejected: int
+    batches: list[BulkLoadBatch]
+
+# Inventory
+class ReservationRequest(BaseModel):
+    user_id: int
+    quantity: int = 1
+
 # Stores (Tiendas)
 class StoreRequest(BaseModel):
     nombre: str
@@ -36,6 +72,14 @@ class CartItemRequest(BaseModel):
     product_id: int
     quantity: int
 
+class CartLine(BaseModel):
+    product_id: int
+    quantity: int
+
+class CartItemsRequest(BaseModel):
+    user_id: int
+    items: list[CartLine]
+
 # User
 class UserRequest(BaseModel):
     name: str
@@ -43,3 +87,16 @@ class UserRequest(BaseModel):
     password: str
     saldo: float
     monedero_ahorro: float
+
+# Checkout
+class CheckoutItem(BaseModel):
+    product_id: int
+    product_name: str
+    price: float
+    quantity: int
+
+class CheckoutResponse(BaseModel):
+    user_id: int
+    total: float
+    saldo: float
+    items: list[CheckoutItem]
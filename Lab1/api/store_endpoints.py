@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Query
+from services.product_service import InsufficientStockError
+from services.store_service import (
+    list_stores, create_store, list_store_products_page, get_store_product, add_store_product,
+    update_store_product, add_to_store_cart, get_store_cart, StoreError,
+)
+from api.schemas import StoreRequest, StoreResponse, ProductRequest, ProductResponse, ProductPage, CartItemsRequest
+
+router = APIRouter()
+
+def _call(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except StoreError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/stores", response_model=list[StoreResponse])
+def get_stores():
+    return list_stores()
+
+@router.post("/stores", response_model=StoreResponse)
+def add_store(store: StoreRequest):
+    return create_store(store)
+
+@router.get("/stores/{store_id}/products", response_model=ProductPage)
+def get_store_products(
+    store_id: int,
+    cursor: int = Query(0, ge=0, description="Devuelve productos con id mayor a este valor"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    return _call(list_store_products_page, store_id, after_id=cursor, limit=limit)
+
+@router.get("/stores/{store_id}/products/{product_id}", response_model=ProductResponse)
+def get_store_product_by_id(store_id: int, product_id: int):
+    return _call(get_store_product, store_id, product_id)
+
+@router.post("/stores/{store_id}/products", response_model=ProductResponse)
+def create_store_product(store_id: int, product: ProductRequest):
+    return _call(add_store_product, store_id, product)
+
+@router.patch("/stores/{store_id}/products/{product_id}", response_model=ProductResponse)
+def update_store_product_stock(store_id: int, product_id: int, cantidad: int):
+    return _call(update_store_product, store_id, product_id, cantidad)
+
+@router.post("/stores/{store_id}/cart")
+def add_items_to_store_cart(store_id: int, request: CartItemsRequest):
+    return _call(add_to_store_cart, store_id, request.user_id, request.items)
+
+@router.get("/stores/{store_id}/cart/{user_id}")
+def get_store_cart_items(store_id: int, user_id: int):
+    return _call(get_store_cart, store_id, user_id)
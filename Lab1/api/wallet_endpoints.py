@@ -1,16 +1,20 @@
 from fastapi import APIRouter
-from services.wallet_service import add_funds, get_balance, discount_wallet_by_user_id
+from services.storage import storage
 
 router = APIRouter()
 
 @router.post("/wallet/{user_id}")
 def add_wallet_funds(amount: int, user_id: int):
-    return add_funds(amount, user_id=user_id)
+    return storage.add_funds(amount, user_id=user_id)
 
 @router.get("/wallet/{user_id}")
 def get_wallet_balance(user_id: int):
-    return get_balance(user_id=user_id)
+    return storage.get_balance(user_id=user_id)
+
+@router.get("/wallet/{user_id}/history")
+def get_wallet_history(user_id: int, limit: int = 100):
+    return storage.get_history(user_id, limit=limit)
 
 @router.patch("/wallet/{user_id}")
 def discount_wallet(amount: float, user_id: int):
-    return discount_wallet_by_user_id(amount, user_id=user_id)
\ No newline at end of file
+    return storage.discount_wallet_by_user_id(amount, user_id=user_id)
\ No newline at end of file
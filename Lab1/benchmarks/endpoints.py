@@ -0,0 +1,180 @@
+"""In-process load test of the Lab1 API against each storage backend.
+
+    python -m benchmarks.endpoints --backend sqlite
+    python -m benchmarks.endpoints --backend all --requests 2000 --concurrency 8
+
+The app is driven through fastapi's TestClient (no network, no uvicorn). The postgres backend
+uses the usual DB_* variables; sqlite uses SQLITE_PATH or a fresh temporary file.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BACKENDS = ("sqlite", "postgres")
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def _scenarios(product_id):
+    # (nombre, preparacion opcional sin medir, peticion medida); cada hilo cliente usa su propio usuario
+    # (u), asi el checkout de un hilo no vacia el carrito de otro. Las rutas llevan el prefijo de main.py.
+    return [
+        ("GET /products", None, lambda c, u: c.get("/products/products", params={"limit": 100})),
+        ("GET /products/search", None, lambda c, u: c.get("/products/products/search", params={"q": "prodcto 12", "limit": 10})),
+        ("GET /products/{id}", None, lambda c, u: c.get(f"/products/products/{product_id}")),
+        ("POST /products", None, lambda c, u: c.post("/products/products", json={"product_name": "bench", "quantity": 1, "price": 1.5})),
+        ("POST /cart", None, lambda c, u: c.post("/cart/cart", json={"user_id": u, "product_id": product_id, "quantity": 1})),
+        ("GET /cart/{user_id}", None, lambda c, u: c.get(f"/cart/cart/{u}")),
+        ("POST /wallet/{user_id}", None, lambda c, u: c.post(f"/wallet/wallet/{u}", params={"amount": 1})),
+        ("GET /wallet/{user_id}", None, lambda c, u: c.get(f"/wallet/wallet/{u}")),
+        ("POST /checkout/{user_id}",
+         lambda c, u: c.post("/cart/cart", json={"user_id": u, "product_id": product_id, "quantity": 1}),
+         lambda c, u: c.post(f"/checkout/{u}")),
+    ]
+
+
+def _seed(client, n_products, n_users):
+    user_ids = []
+    for i in range(n_users):
+        user = client.post("/user/users", json={"name": f"bench {i}", "email": f"bench{i}@example.com", "password": "x",
+                                                "saldo": 1e12, "monedero_ahorro": 0})
+        user.raise_for_status()
+        user_ids.append(user.json())
+    product_id = None
+    for i in range(n_products):
+        product = client.post("/products/products", json={"product_name": f"producto {i}", "quantity": 10**9, "price": 1.0})
+        product.raise_for_status()
+        product_id = product_id or product.json()["id"]
+    return user_ids, product_id
+
+
+def _run_scenario(app, setup, request, n_requests, concurrency, user_ids):
+    from fastapi.testclient import TestClient
+
+    local = threading.local()
+    latencies, errors, error_samples = [], 0, []
+    lock = threading.Lock()
+    free_users = list(user_ids)
+
+    def one(_):
+        nonlocal errors
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = TestClient(app)
+            with lock:
+                local.user_id = free_users.pop()
+        if setup is not None:
+            response = setup(client, local.user_id)
+            if response.status_code >= 400:
+                with lock:
+                    errors += 1
+                    if len(error_samples) < 3:
+                        error_samples.append(f"preparacion {response.status_code}: {response.text[:200]}")
+                return
+        start = time.perf_counter()
+        response = request(client, local.user_id)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors += 1
+                if len(error_samples) < 3:
+                    error_samples.append(f"{response.status_code}: {response.text[:200]}")
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        for i in range(n_requests):
+            one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, range(n_requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    # Con preparacion (checkout) el tiempo de pared la incluye; req/s se calcula sobre lo medido.
+    measured = sum(latencies) / 1000 / concurrency if setup is not None else wall
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "error_samples": error_samples,
+        # Con errores las cifras no miden el endpoint (un 4xx/5xx suele ser mas rapido): no se informan.
+        "req_per_s": None if errors else round(n_requests / measured, 1) if measured else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def run_backend(backend, n_requests, concurrency, n_products):
+    os.environ["STORAGE_BACKEND"] = backend
+    os.environ.setdefault("DB_DRIVER", "sync")
+    if backend == "sqlite" and "SQLITE_PATH" not in os.environ:
+        os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="lab1-bench-"), "lab1.sqlite3")
+
+    from fastapi.testclient import TestClient
+    from main import app
+
+    results = {}
+    with TestClient(app) as client:  # dispara startup (migraciones) y shutdown
+        user_ids, product_id = _seed(client, n_products, concurrency)
+        for name, setup, request in _scenarios(product_id):
+            results[name] = _run_scenario(app, setup, request, n_requests, concurrency, user_ids)
+    return results
+
+
+def print_report(backend, results):
+    print(f"\n== {backend} ==")
+    print(f"{'endpoint':<26}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errores':>9}")
+    for name, r in results.items():
+        req_per_s = "-" if r["req_per_s"] is None else r["req_per_s"]
+        print(f"{name:<26}{req_per_s:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errors']:>9}")
+    failed = {name: r for name, r in results.items() if r["errors"]}
+    if failed:
+        print("\nERROR: hubo peticiones fallidas; esas filas no son validas.", file=sys.stderr)
+        for name, r in failed.items():
+            print(f"  {name}: {r['errors']} de {r['requests']}", file=sys.stderr)
+            for sample in r["error_samples"]:
+                print(f"    {sample}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark en proceso de los endpoints de Lab1 por backend.")
+    parser.add_argument("--backend", choices=[*BACKENDS, "all"], default="sqlite")
+    parser.add_argument("--requests", type=int, default=1000, help="Peticiones por endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="Hilos cliente simultaneos")
+    parser.add_argument("--products", type=int, default=200, help="Productos sembrados antes de medir")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados como JSON")
+    args = parser.parse_args(argv)
+
+    if args.backend == "all":
+        # El backend se elige al importar main, asi que cada uno corre en su propio proceso.
+        status = 0
+        for backend in BACKENDS:
+            cmd = [sys.executable, "-m", "benchmarks.endpoints", "--backend", backend,
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                   "--products", str(args.products)] + (["--json"] if args.json else [])
+            status |= subprocess.run(cmd).returncode
+        return status
+
+    results = run_backend(args.backend, args.requests, args.concurrency, args.products)
+    if args.json:
+        print(json.dumps({"backend": args.backend, "results": results}))
+    else:
+        print_report(args.backend, results)
+    # Un codigo distinto de cero para que un script o CI no tome por buena una corrida con errores.
+    return 1 if any(r["errors"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Micro-benchmark: default FastAPI response path vs FastJSONResponse for a large product listing.
+
+    python -m benchmarks.json_encoding --products 100000 --repeat 5
+
+"default" reproduces what FastAPI does with response_model=ProductPage: validate the page,
+run jsonable_encoder and json.dumps. "fast" is api.fast_json.dumps on the rows as the
+services return them (Decimal prices, datetime created_at).
+"""
+import sys
+import json
+import time
+import argparse
+from decimal import Decimal
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from api.fast_json import dumps, orjson
+from api.schemas import ProductPage
+
+
+def build_page(n_products):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    items = [{
+        "id": i,
+        "product_name": f"producto {i}",
+        "quantity": i % 500,
+        "price": Decimal(f"{i % 1000}.{i % 100:02d}"),
+        "created_at": start + timedelta(seconds=i),
+    } for i in range(1, n_products + 1)]
+    return {"items": items, "next_cursor": n_products}
+
+
+def default_path(page):
+    if hasattr(ProductPage, "model_validate"):
+        validated = ProductPage.model_validate(page)
+    else:  # pydantic 1
+        validated = ProductPage.parse_obj(page)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(page):
+    return dumps(page)
+
+
+def best_of(fn, page, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(page)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara la serializacion por defecto de FastAPI con FastJSONResponse.")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    page = build_page(args.products)
+    if json.loads(default_path(page)) != json.loads(fast_path(page)):
+        print("Las dos rutas producen JSON distinto", file=sys.stderr)
+        return 1
+
+    print(f"{args.products} productos, mejor de {args.repeat} (encoder rapido: {'orjson' if orjson else 'json'})")
+    results = {name: best_of(fn, page, args.repeat) for name, fn in (("default", default_path), ("fast", fast_path))}
+    for name, (seconds, size) in results.items():
+        print(f"{name:<8}{seconds * 1000:>10.1f} ms{size / 1024 / 1024:>9.1f} MiB{args.products / seconds:>14,.0f} filas/s")
+    print(f"speedup  {results['default'][0] / results['fast'][0]:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
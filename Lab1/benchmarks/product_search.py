@@ -0,0 +1,56 @@
+"""Latency of the in-process product name index (services.trigram_index) on a synthetic catalogue.
+
+    python -m benchmarks.product_search --products 1000000
+"""
+import sys
+import time
+import random
+import argparse
+from services.trigram_index import TrigramIndex
+
+QUERIES = ["paracetmol", "ibuprofeno", "parac", "jabon crema", "clonazepam 250mg", "Jabón", "crema dental 500mg", "xyz"]
+
+
+def build_index(n_products, vocabulary_size, seed=1):
+    rng = random.Random(seed)
+    syllables = [c + v for c in "bcdfglmnprstvz" for v in "aeiou"]
+    vocabulary = set()
+    while len(vocabulary) < vocabulary_size:
+        vocabulary.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    vocabulary = sorted(vocabulary) + ["paracetamol", "ibuprofeno", "clonazepam", "jabon", "crema", "dental"]
+    index = TrigramIndex()
+    for product_id in range(1, n_products + 1):
+        index.add(product_id, f"{rng.choice(vocabulary)} {rng.choice(vocabulary)} {rng.randint(1, 500)}mg")
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latencia de GET /products/search sobre el indice de trigramas.")
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--vocabulary", type=int, default=30000, help="Palabras distintas en los nombres")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = build_index(args.products, args.vocabulary)
+    print(f"indice: {index.stats()} en {time.perf_counter() - start:.1f} s")
+
+    print(f"{'consulta':<22}{'primera ms':>12}{'p50 ms':>10}{'p99 ms':>10}  mejor resultado")
+    for query in QUERIES:
+        start = time.perf_counter()
+        hits = index.search(query, args.limit)
+        first = (time.perf_counter() - start) * 1000
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.search(query, args.limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        best = hits[0][1] if hits else "-"
+        print(f"{query:<22}{first:>12.3f}{timings[len(timings) // 2]:>10.3f}{timings[int(len(timings) * 0.99) - 1]:>10.3f}  {best}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import sys
+import json
+import argparse
+from services.bulk_service import bulk_load_products, DEFAULT_BATCH_SIZE
+from database.connection import close_pool
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga masiva de productos con COPY desde CSV o NDJSON.")
+    parser.add_argument("path", help="Archivo a cargar, o - para stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="Por defecto se deduce de la extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    try:
+        if args.path == "-":
+            report = bulk_load_products(sys.stdin, fmt, args.batch_size)
+        else:
+            with open(args.path, newline="", encoding="utf-8") as f:
+                report = bulk_load_products(f, fmt, args.batch_size)
+    finally:
+        close_pool()
+
+    print(json.dumps(report, indent=2))
+    return 1 if report["rejected"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import os
+from contextlib import asynccontextmanager
+import asyncpg
+from .connection import POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_TIMEOUT
+
+_pool = None
+
+
+async def open_async_pool():
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            database=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.getenv("DB_HOST"),
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+        )
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def async_pool_stats():
+    if _pool is None:
+        return {"size": 0, "idle": 0, "in_use": 0, "min_size": POOL_MIN_SIZE, "max_size": POOL_MAX_SIZE}
+    size, idle = _pool.get_size(), _pool.get_idle_size()
+    return {"size": size, "idle": idle, "in_use": size - idle, "min_size": POOL_MIN_SIZE, "max_size": POOL_MAX_SIZE}
+
+
+@asynccontextmanager
+async def get_async_connection():
+    """Async counterpart of get_connection: one pooled asyncpg connection inside a transaction."""
+    pool = await open_async_pool()
+    async with pool.acquire(timeout=POOL_TIMEOUT) as conn:
+        async with conn.transaction():
+            yield conn
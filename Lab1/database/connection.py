@@ -1,13 +1,331 @@
 import os
+import time
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import extensions
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_connection():
+# sync: psycopg2 + handlers def; async: asyncpg + handlers async def (ver main.py).
+DB_DRIVER = os.getenv("DB_DRIVER", "sync")
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+POOL_CHECK_ON_BORROW = os.getenv("DB_POOL_CHECK_ON_BORROW", "1") == "1"
+# Replicas de lectura: lista host[:puerto] separada por comas, misma base/usuario que el primario.
+REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+REPLICA_EJECT_SECONDS = float(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+
+class PoolTimeout(Exception):
+    """No connection became available before the checkout timeout."""
+    pass
+
+
+class PreparingConnection(extensions.connection):
+    """Connection that remembers which named statements (database.queries) it has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self._prepared_in_transaction = set()
+
+    def mark_prepared(self, name):
+        self.prepared.add(name)
+        self._prepared_in_transaction.add(name)
+
+    def commit(self):
+        super().commit()
+        self._prepared_in_transaction.clear()
+
+    def rollback(self):
+        super().rollback()
+        if self._prepared_in_transaction:
+            # Se vuelve a leer lo que el servidor realmente conserva tras el rollback.
+            self._prepared_in_transaction.clear()
+            with self.cursor() as cur:
+                cur.execute("SELECT name FROM pg_prepared_statements;")
+                self.prepared = {row[0] for row in cur.fetchall()}
+            super().rollback()
+
+
+def connect(host=None, port=None):
     return psycopg2.connect(
         dbname=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
-        host=os.getenv("DB_HOST"),
-    )
\ No newline at end of file
+        host=host or os.getenv("DB_HOST"),
+        port=port or os.getenv("DB_PORT"),
+        connection_factory=PreparingConnection,
+    )
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections bounded by min/max size."""
+
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 check_on_borrow=POOL_CHECK_ON_BORROW, connect=connect):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool size must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_on_borrow = check_on_borrow
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {"checkouts": 0, "waits": 0, "wait_time": 0.0, "timeouts": 0, "created": 0, "discarded": 0}
+        for _ in range(min_size):
+            self._idle.append(self._new_connection())
+            self._size += 1
+
+    def _new_connection(self):
+        conn = self._connect()
+        self._stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if not self.check_on_borrow:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            wait_started = None
+            while not self._closed and not self._idle and self._size >= self.max_size:
+                now = time.monotonic()
+                if wait_started is None:
+                    wait_started = now
+                    self._stats["waits"] += 1
+                if now >= deadline:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_time"] += now - wait_started
+                    raise PoolTimeout(f"No database connection available after {timeout}s")
+                self._cond.wait(deadline - now)
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if wait_started is not None:
+                self._stats["wait_time"] += time.monotonic() - wait_started
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._size += 1
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._stats["discarded"] += 1
+                conn = None
+            if conn is None:
+                conn = self._new_connection()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn, discard=False):
+        if not discard and not conn.closed:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                self._stats["discarded"] += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
+
+
+class Replica:
+    """A read replica with its own pool; ejected for a while after a connection failure."""
+
+    def __init__(self, address):
+        host, _, port = address.partition(":")
+        self.address = address
+        self.host = host
+        self.port = port or None
+        self.pool = None
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def get_pool(self):
+        if self.pool is None:
+            self.pool = ConnectionPool(connect=lambda: connect(self.host, self.port))
+        return self.pool
+
+    def stats(self):
+        return {
+            "address": self.address,
+            "healthy": self.ejected_until <= time.monotonic(),
+            "ejections": self.ejections,
+            "pool": self.pool.stats() if self.pool is not None else None,
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_replicas = [Replica(address) for address in REPLICA_HOSTS]
+_next_replica = 0
+# clave de lectura (p. ej. "user:7", "productos") -> instante hasta el que se lee del primario.
+_pins = {}
+_routing_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        for replica in _replicas:
+            if replica.pool is not None:
+                replica.pool.close()
+                replica.pool = None
+
+
+def pool_stats():
+    return {**get_pool().stats(), "replicas": [replica.stats() for replica in _replicas]}
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def _is_pinned(pin_keys, now):
+    with _routing_lock:
+        return any(_pins.get(key, 0.0) > now for key in pin_keys)
+
+
+def _pin(pin_keys):
+    if not pin_keys or not _replicas or READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    now = time.monotonic()
+    with _routing_lock:
+        for key in pin_keys:
+            _pins[key] = now + READ_YOUR_WRITES_SECONDS
+        if len(_pins) > 10000:
+            for key in [k for k, until in _pins.items() if until <= now]:
+                del _pins[key]
+
+
+def _eject(replica):
+    with _routing_lock:
+        replica.ejected_until = time.monotonic() + REPLICA_EJECT_SECONDS
+        replica.ejections += 1
+
+
+def _replica_candidates(now):
+    # Round-robin entre las replicas sanas; las expulsadas vuelven a probarse al vencer su plazo.
+    global _next_replica
+    with _routing_lock:
+        start = _next_replica
+        _next_replica = (_next_replica + 1) % len(_replicas)
+        ordered = _replicas[start:] + _replicas[:start]
+        return [replica for replica in ordered if replica.ejected_until <= now]
+
+
+def _acquire_for_read(pin_keys):
+    now = time.monotonic()
+    if _replicas and not _is_pinned(pin_keys, now):
+        for replica in _replica_candidates(now):
+            try:
+                pool = replica.get_pool()
+                return pool, replica, pool.acquire()
+            except (psycopg2.OperationalError, PoolTimeout):
+                _eject(replica)
+    pool = get_pool()
+    return pool, None, pool.acquire()
+
+
+@contextmanager
+def get_connection(readonly=False, pin_keys=()):
+    """Borrow a pooled connection; commits on success, rolls back on error, always returns it.
+
+    readonly=True may be served by a replica unless one of pin_keys was written recently;
+    a successful write with pin_keys pins those keys to the primary for READ_YOUR_WRITES_SECONDS.
+    """
+    if readonly:
+        pool, replica, conn = _acquire_for_read(pin_keys)
+    else:
+        pool, replica = get_pool(), None
+        conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except BaseException as e:
+        if replica is not None and isinstance(e, psycopg2.OperationalError):
+            _eject(replica)
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    finally:
+        pool.release(conn, discard=broken or conn.closed)
+    if not readonly:
+        _pin(pin_keys)
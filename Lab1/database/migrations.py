@@ -0,0 +1,49 @@
+import psycopg2
+from .connection import get_connection
+from .models import MIGRATIONS
+
+_CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Cualquier numero fijo sirve; serializa migraciones concurrentes de varias instancias.
+_MIGRATION_LOCK_ID = 4815162342
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(cur):
+    try:
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations;")
+        return cur.fetchone()[0]
+    except psycopg2.errors.UndefinedTable:
+        cur.connection.rollback()
+        return 0
+
+
+def migrate():
+    """Apply pending migrations; when the schema is current this is a single query."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            version = current_version(cur)
+            if version >= latest_version():
+                return {"version": version, "applied": []}
+
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", (_MIGRATION_LOCK_ID,))
+            cur.execute(_CREATE_VERSION_TABLE)
+            version = current_version(cur)
+            applied = []
+            for number, name, statements in MIGRATIONS:
+                if number <= version:
+                    continue
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s);", (number, name))
+                applied.append(number)
+    return {"version": latest_version(), "applied": applied}
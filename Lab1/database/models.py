@@ -1,11 +1,9 @@
-from .connection import get_connection
+# Esquema versionado: cada migracion se aplica una sola vez y en orden (ver database/migrations.py).
+# No edites una migracion ya publicada; agrega una nueva al final de MIGRATIONS.
 
-def create_tables():
-    conn = get_connection()
-    cur = conn.cursor()
-    
-
-    cur.execute("""
+MIGRATIONS = [
+    (1, "tablas iniciales", [
+        """
         CREATE TABLE IF NOT EXISTS productos (
             id SERIAL PRIMARY KEY,
             product_name TEXT NOT NULL,
@@ -13,9 +11,8 @@ def create_tables():
             price DECIMAL NOT NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
-    """)
-    
-    cur.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS users (
             id SERIAL PRIMARY KEY,
             name TEXT NOT NULL,
@@ -24,18 +21,15 @@ def create_tables():
             saldo FLOAT NOT NULL,
             monedero_ahorro FLOAT NOT NULL
         );
-    """)
-
-
-    cur.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS tiendas (
             id SERIAL PRIMARY KEY,
             nombre TEXT NOT NULL,
             direccion TEXT NOT NULL
         );
-    """)
-
-    cur.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS cart (
             id SERIAL PRIMARY KEY,
             user_id INT NOT NULL,
@@ -44,8 +38,145 @@ def create_tables():
             FOREIGN KEY (user_id) REFERENCES users(id),
             FOREIGN KEY (product_id) REFERENCES productos(id)
         );
-    """)
-
-    conn.commit()
-    cur.close()
-    conn.close()
\ No newline at end of file
+        """,
+    ]),
+    # get_cart, delete_all_cart y checkout filtran por user_id; el indice compuesto tambien cubre
+    # las busquedas solo por user_id (prefijo), asi que no hace falta un indice aparte en cart(user_id).
+    (2, "indices de cart", [
+        "CREATE INDEX IF NOT EXISTS idx_cart_user_product ON cart (user_id, product_id);",
+    ]),
+    # Billetera como libro mayor: solo INSERTs de movimientos firmados; el saldo es snapshot + cola.
+    # users.saldo queda como saldo inicial y se copia al libro como movimiento 'opening'.
+    (3, "libro de billetera", [
+        """
+        CREATE TABLE IF NOT EXISTS wallet_ledger (
+            id BIGSERIAL PRIMARY KEY,
+            user_id INT NOT NULL REFERENCES users(id),
+            amount FLOAT NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('opening', 'credit', 'debit')),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_wallet_ledger_user_id ON wallet_ledger (user_id, id);",
+        """
+        CREATE TABLE IF NOT EXISTS wallet_snapshots (
+            user_id INT PRIMARY KEY REFERENCES users(id),
+            balance FLOAT NOT NULL,
+            last_entry_id BIGINT NOT NULL,
+            taken_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        "INSERT INTO wallet_ledger (user_id, amount, kind) SELECT id, saldo, 'opening' FROM users;",
+    ]),
+    # Reservas de inventario para ventas flash: el stock de un producto se reparte en N filas
+    # (sub-contadores) para que los compradores no hagan cola sobre la misma fila de productos.
+    (4, "reservas de inventario", [
+        "ALTER TABLE productos ADD CONSTRAINT productos_quantity_non_negative CHECK (quantity >= 0) NOT VALID;",
+        """
+        CREATE TABLE IF NOT EXISTS inventory_slots (
+            product_id INT NOT NULL REFERENCES productos(id),
+            slot INT NOT NULL,
+            quantity INT NOT NULL CHECK (quantity >= 0),
+            PRIMARY KEY (product_id, slot)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS inventory_reservations (
+            id BIGSERIAL PRIMARY KEY,
+            product_id INT NOT NULL REFERENCES productos(id),
+            slot INT NOT NULL,
+            user_id INT NOT NULL REFERENCES users(id),
+            quantity INT NOT NULL CHECK (quantity > 0),
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'confirmed', 'released')),
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_inventory_reservations_pending ON inventory_reservations (product_id, expires_at) WHERE status = 'pending';",
+    ]),
+    # Inventario por tienda: productos pasa a estar particionada por store_id (LIST), con una particion
+    # por tienda que crea un trigger al insertar en tiendas. Los ids siguen saliendo de la misma
+    # secuencia, asi que las consultas por id global siguen funcionando (revisando todas las particiones);
+    # las consultas con store_id tocan una sola. Lo que existia queda en una "Tienda principal".
+    (5, "productos particionados por tienda", [
+        """
+        CREATE OR REPLACE FUNCTION tienda_principal() RETURNS INT LANGUAGE sql STABLE AS $$
+            SELECT MIN(id) FROM tiendas
+        $$;
+        """,
+        "INSERT INTO tiendas (nombre, direccion) SELECT 'Tienda principal', '-' WHERE NOT EXISTS (SELECT 1 FROM tiendas);",
+        "ALTER TABLE productos RENAME TO productos_sin_particion;",
+        "ALTER INDEX productos_pkey RENAME TO productos_sin_particion_pkey;",
+        "ALTER SEQUENCE productos_id_seq OWNED BY NONE;",
+        """
+        CREATE TABLE productos (
+            id INT NOT NULL DEFAULT nextval('productos_id_seq'),
+            store_id INT NOT NULL DEFAULT tienda_principal() REFERENCES tiendas(id),
+            product_name TEXT NOT NULL,
+            quantity INT NOT NULL CONSTRAINT productos_quantity_non_negative CHECK (quantity >= 0),
+            price DECIMAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (store_id, id)
+        ) PARTITION BY LIST (store_id);
+        """,
+        "ALTER SEQUENCE productos_id_seq OWNED BY productos.id;",
+        "CREATE INDEX idx_productos_id ON productos (id);",
+        "CREATE TABLE productos_default PARTITION OF productos DEFAULT;",
+        """
+        CREATE OR REPLACE FUNCTION crear_particion_tienda() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF productos FOR VALUES IN (%s)',
+                           'productos_tienda_' || NEW.id, NEW.id);
+            RETURN NEW;
+        END
+        $$;
+        """,
+        "CREATE TRIGGER tiendas_crear_particion AFTER INSERT ON tiendas FOR EACH ROW EXECUTE FUNCTION crear_particion_tienda();",
+        """
+        DO $$
+        DECLARE tienda RECORD;
+        BEGIN
+            FOR tienda IN SELECT id FROM tiendas LOOP
+                EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF productos FOR VALUES IN (%s)',
+                               'productos_tienda_' || tienda.id, tienda.id);
+            END LOOP;
+        END
+        $$;
+        """,
+        # La CHECK de la migracion 4 era NOT VALID; aca se valida, asi que el stock negativo viejo queda en 0.
+        """
+        INSERT INTO productos (id, store_id, product_name, quantity, price, created_at)
+        SELECT id, tienda_principal(), product_name, GREATEST(quantity, 0), price, created_at
+        FROM productos_sin_particion;
+        """,
+        "ALTER TABLE cart ADD COLUMN store_id INT;",
+        "UPDATE cart SET store_id = tienda_principal();",
+        # CASCADE quita las FK de cart e inventory_* hacia la tabla vieja; inventory_* no la recupera
+        # (una FK a productos particionada necesita store_id) y sigue buscando por id.
+        "DROP TABLE productos_sin_particion CASCADE;",
+        "ALTER TABLE cart ALTER COLUMN store_id SET NOT NULL;",
+        "ALTER TABLE cart ADD CONSTRAINT cart_store_product_fkey FOREIGN KEY (store_id, product_id) REFERENCES productos (store_id, id);",
+        """
+        CREATE OR REPLACE FUNCTION cart_tienda_del_producto() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NEW.store_id IS NULL THEN
+                SELECT store_id INTO NEW.store_id FROM productos WHERE id = NEW.product_id;
+            END IF;
+            RETURN NEW;
+        END
+        $$;
+        """,
+        "CREATE TRIGGER cart_store_id BEFORE INSERT ON cart FOR EACH ROW EXECUTE FUNCTION cart_tienda_del_producto();",
+    ]),
+    # DEFAULT tienda_principal() se evaluaba por fila (es STABLE) en cada INSERT y en el COPY de la
+    # carga masiva. La tienda principal se resuelve una vez aca y queda como default constante.
+    (6, "store_id por defecto constante", [
+        """
+        DO $$
+        BEGIN
+            EXECUTE format('ALTER TABLE productos ALTER COLUMN store_id SET DEFAULT %L', tienda_principal());
+        END
+        $$;
+        """,
+    ]),
+]
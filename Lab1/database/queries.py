@@ -0,0 +1,109 @@
+import os
+import re
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("lab1.queries")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+# Limites superiores (ms) de los buckets del histograma de latencia; el ultimo bucket es +inf.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+_queries = {}
+_stats = {}
+_slow_log = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_lock = threading.Lock()
+
+
+def _to_server_placeholders(sql):
+    counter = iter(range(1, sql.count("%s") + 1))
+    return re.sub(r"%s", lambda _: f"${next(counter)}", sql), sql.count("%s")
+
+
+def register(name, sql):
+    """Register a named statement written with %s placeholders; returns the name to pass to run()."""
+    if not _NAME_RE.match(name):
+        raise ValueError(f"Nombre de consulta invalido: {name!r}")
+    if name in _queries and _queries[name][0] != sql:
+        raise ValueError(f"La consulta {name!r} ya esta registrada con otro SQL")
+    server_sql, n_params = _to_server_placeholders(sql.strip().rstrip(";"))
+    _queries[name] = (sql, server_sql, n_params)
+    return name
+
+
+def _record(name, elapsed_ms, rows):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {"calls": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                    "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+        stats["calls"] += 1
+        stats["rows"] += max(rows, 0)
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        if elapsed_ms >= SLOW_QUERY_MS:
+            _slow_log.append({"query": name, "ms": round(elapsed_ms, 3), "rows": rows, "at": time.time()})
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning("Consulta lenta %s: %.1f ms, %d filas", name, elapsed_ms, rows)
+
+
+@contextmanager
+def timed(name, cur=None):
+    """Time a statement that cannot be prepared (COPY, execute_values, named cursors)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, (time.perf_counter() - start) * 1000, cur.rowcount if cur is not None else 0)
+
+
+def prepare(cur, name):
+    """PREPARE a registered statement on this connection if it is not prepared yet.
+
+    Call it before a SAVEPOINT: rolling back to the savepoint would also drop a PREPARE made after it.
+    """
+    conn = cur.connection
+    prepared = getattr(conn, "prepared", None)
+    if prepared is not None and name not in prepared:
+        cur.execute(f"PREPARE {name} AS {_queries[name][1]}")
+        conn.mark_prepared(name)
+
+
+def run(cur, name, params=()):
+    """Execute a registered statement, preparing it once per connection."""
+    sql, server_sql, n_params = _queries[name]
+    start = time.perf_counter()
+    if getattr(cur.connection, "prepared", None) is None:
+        cur.execute(sql, params)
+    else:
+        prepare(cur, name)
+        if n_params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * n_params)})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+    _record(name, (time.perf_counter() - start) * 1000, cur.rowcount)
+    return cur
+
+
+def query_stats():
+    with _lock:
+        queries = {}
+        for name, s in _stats.items():
+            queries[name] = {
+                "calls": s["calls"],
+                "rows": s["rows"],
+                "total_ms": round(s["total_ms"], 3),
+                "avg_ms": round(s["total_ms"] / s["calls"], 3) if s["calls"] else 0.0,
+                "max_ms": round(s["max_ms"], 3),
+                "histogram_ms": {("+Inf" if i == len(LATENCY_BUCKETS_MS) else str(LATENCY_BUCKETS_MS[i])): count
+                                 for i, count in enumerate(s["buckets"])},
+            }
+        return {"slow_query_ms": SLOW_QUERY_MS, "queries": queries, "slow_queries": list(_slow_log)}
@@ -1,28 +1,69 @@
 from fastapi import FastAPI
-from database.connection import get_connection
-from database.models import create_tables
-from api.cart_endpoints import router as cart_router
-from api.wallet_endpoints import router as wallet_router
-from api.products_endpoints import router as products_router
-from api.user_endpoint import router as user_router
+from database.connection import DB_DRIVER
+from services.storage import storage, STORAGE_BACKEND
+from api.inventory_endpoints import router as inventory_router
+from api.store_endpoints import router as store_router
+from api.metrics_endpoints import router as metrics_router
+
+if DB_DRIVER == "async" and STORAGE_BACKEND != "postgres":
+    raise ValueError("DB_DRIVER=async solo funciona con STORAGE_BACKEND=postgres")
+
+if DB_DRIVER == "async":
+    from database.async_connection import open_async_pool, close_async_pool
+    from api.aio.cart_endpoints import router as cart_router
+    from api.aio.wallet_endpoints import router as wallet_router
+    from api.aio.products_endpoints import router as products_router
+    from api.aio.user_endpoint import router as user_router
+    from api.aio.checkout_endpoints import router as checkout_router
+elif DB_DRIVER == "sync":
+    from api.cart_endpoints import router as cart_router
+    from api.wallet_endpoints import router as wallet_router
+    from api.products_endpoints import router as products_router
+    from api.user_endpoint import router as user_router
+    from api.checkout_endpoints import router as checkout_router
+else:
+    raise ValueError(f"DB_DRIVER debe ser 'sync' o 'async', no {DB_DRIVER!r}")
 
 from api.user_endpoint import add_user, get_user
 from api.products_endpoints import get_products, create_product, update_product, get_products_by_id
 from api.cart_endpoints import add_item_to_cart, get_cart_items, empty_cart
 from api.wallet_endpoints import add_wallet_funds, get_wallet_balance, discount_wallet
+from api.checkout_endpoints import checkout_cart
 
 from api.schemas import *
 
 app = FastAPI()
 
+# Registrar los routers de los endpoints
+app.include_router(user_router, prefix="/user", tags=["User"])
+app.include_router(cart_router, prefix="/cart", tags=["Cart"])
+app.include_router(wallet_router, prefix="/wallet", tags=["Wallet"])
+app.include_router(products_router, prefix="/products", tags=["Products"])
+app.include_router(checkout_router, tags=["Checkout"])
+if STORAGE_BACKEND == "postgres":
+    # Los sub-contadores usan FOR UPDATE SKIP LOCKED y las tiendas, particiones; SQLite no tiene ninguno.
+    app.include_router(inventory_router, tags=["Inventory"])
+    app.include_router(store_router, tags=["Stores"])
+app.include_router(metrics_router, tags=["Metrics"])
+
 @app.on_event("startup")
 def startup_event():
-    conn = get_connection()
-    create_tables()  # Cambiado para reflejar la función correcta
-    conn.close()
+    storage.migrate()  # Solo aplica migraciones pendientes; si el esquema esta al dia es una sola consulta
+
+@app.on_event("shutdown")
+def shutdown_event():
+    storage.close()
+
+if DB_DRIVER == "async":
+    @app.on_event("startup")
+    async def open_async_pool_event():
+        await open_async_pool()
+
+    @app.on_event("shutdown")
+    async def close_async_pool_event():
+        await close_async_pool()
 
 def simulate_purchase(user_id: int):
-    conn = get_connection()
     try:
         # Paso 1: Crear un usuario con saldo inicial
         print("Creando usuario...")
@@ -41,51 +82,17 @@ def simulate_purchase(user_id: int):
         add_item_to_cart(CartItemRequest(user_id=1, product_id=2, quantity=1))  # Producto 2, cantidad 1
         print("Productos agregados al carrito.")
 
-        # Paso 4: Calcular el total del carrito
-        print("Calculando el total del carrito...")
-        cart_items = get_cart_items(user_id=1)["items"]
-        cart_total = 0
-        for item in cart_items:
-            product_id = item["product_id"]
-            quantity = item["quantity"]
-            product = get_products_by_id(product_id=product_id)  # Obtener detalles del producto
-            cart_total += product["price"] * quantity
-        print(f"Total del carrito: {cart_total}")
-
-        # Paso 5: Verificar el saldo del usuario
-        user_balance = get_wallet_balance(user_id)["saldo"]
-        print(f"Saldo actual del usuario: {user_balance}")
-
-        if user_balance < cart_total:
-            print("Saldo insuficiente para realizar la compra.")
-            return
-
-        # Paso 6: Descontar el saldo del usuario
+        # Paso 4: Pagar el carrito en una sola transaccion (precio, saldo, stock y vaciado del carrito)
         print("Realizando la compra...")
-        new_balance = discount_wallet(cart_total, user_id=1)["saldo"]
-        print(f"Compra realizada. Nuevo saldo: {new_balance}")
-
-        # Paso 7: Actualizar la cantidad de productos
-        print("Actualizando cantidades de productos...")
-        update_product(product_id=1, cantidad=2)
-        update_product(product_id=2, cantidad=1)
-        print("Cantidades de productos actualizadas.")
-
-        # Paso 8: Limpiar el carrito
-        empty_cart(user_id)
+        receipt = checkout_cart(user_id)
+        print(f"Total del carrito: {receipt['total']}")
+        print(f"Compra realizada. Nuevo saldo: {receipt['saldo']}")
         print("Carrito limpiado. Compra completada.")
 
     except Exception as e:
         print(f"Error durante la simulación de compra: {e}")
-    finally:
-        conn.close()
 
 # Ejecutar la simulación
 if __name__ == "__main__":
-    # Registrar los routers de los endpoints
     startup_event()
-    app.include_router(user_router, prefix="/user", tags=["User"])
-    app.include_router(cart_router, prefix="/cart", tags=["Cart"])
-    app.include_router(wallet_router, prefix="/wallet", tags=["Wallet"])
-    app.include_router(products_router, prefix="/products", tags=["Products"])
     simulate_purchase(user_id=1)
\ No newline at end of file
@@ -0,0 +1,22 @@
+from database.async_connection import get_async_connection
+
+async def add_many_to_cart(user_id: int, items):
+    rows = [(user_id, item.product_id, item.quantity) for item in items]
+    if rows:
+        async with get_async_connection() as conn:
+            await conn.executemany("INSERT INTO cart (user_id, product_id, cantidad) VALUES ($1, $2, $3);", rows)
+    return {"user_id": user_id, "added": len(rows)}
+
+async def add_to_cart(item):
+    await add_many_to_cart(item.user_id, [item])
+    return {"item": item,}
+
+async def get_cart(user_id: int):
+    async with get_async_connection() as conn:
+        items = await conn.fetch("SELECT product_id, cantidad FROM cart WHERE user_id = $1;", user_id)
+    return {"user_id": user_id, "items": [{"product_id": item[0], "quantity": item[1]} for item in items]}
+
+async def delete_all_cart(user_id: int):
+    async with get_async_connection() as conn:
+        await conn.execute("DELETE FROM cart WHERE user_id = $1;", user_id)
+    return {"text": f"Carrito del usuario {user_id} ha sido eliminado"}
@@ -0,0 +1,51 @@
+from database.async_connection import get_async_connection
+from services.product_service import invalidate_products
+from services.checkout_service import CheckoutError, check_lines
+from services.aio.wallet_service import balance_for_update, append_entry
+
+async def checkout(user_id: int):
+    async with get_async_connection() as conn:
+        saldo = await balance_for_update(conn, user_id)
+        if saldo is None:
+            raise CheckoutError(f"Usuario {user_id} no existe", status_code=404)
+
+        lines = await conn.fetch("""
+            SELECT p.id, p.product_name, p.price, p.quantity, l.cantidad,
+                   EXISTS (SELECT 1 FROM inventory_slots s WHERE s.product_id = p.id)
+            FROM productos p
+            JOIN (
+                SELECT store_id, product_id, SUM(cantidad) AS cantidad
+                FROM cart WHERE user_id = $1 GROUP BY store_id, product_id
+            ) l ON p.store_id = l.store_id AND p.id = l.product_id
+            ORDER BY p.id
+            FOR UPDATE OF p;
+        """, user_id)
+        if not lines:
+            raise CheckoutError(f"El carrito del usuario {user_id} esta vacio")
+
+        check_lines(lines)
+
+        total = sum(line[2] * line[4] for line in lines)
+        if saldo < float(total):
+            raise CheckoutError("Saldo insuficiente para realizar la compra", status_code=409)
+
+        await append_entry(conn, user_id, -float(total), "debit")
+        new_balance = saldo - float(total)
+        await conn.execute("""
+            UPDATE productos p
+            SET quantity = p.quantity - l.cantidad
+            FROM (
+                SELECT store_id, product_id, SUM(cantidad) AS cantidad
+                FROM cart WHERE user_id = $1 GROUP BY store_id, product_id
+            ) l
+            WHERE p.store_id = l.store_id AND p.id = l.product_id;
+        """, user_id)
+        await conn.execute("DELETE FROM cart WHERE user_id = $1;", user_id)
+
+    invalidate_products([line[0] for line in lines])
+    return {
+        "user_id": user_id,
+        "total": total,
+        "saldo": new_balance,
+        "items": [{"product_id": line[0], "product_name": line[1], "price": line[2], "quantity": line[4]} for line in lines],
+    }
@@ -0,0 +1,73 @@
+from database.async_connection import get_async_connection
+from services.product_service import product_cache, listing_cache, invalidate_products, InsufficientStockError
+from services.product_service import name_index, search_hits, NAME_INDEX_OVERLAP
+from services.product_service import PRODUCT_COLUMNS, NOT_SPLIT_SQL, RESERVATION_ONLY_HINT
+
+# Mismas consultas que services/product_service.py sobre asyncpg; comparte la cache con la ruta sincrona.
+
+def _row_to_product(p):
+    return {"id": p[0], "product_name": p[1], "quantity": p[2], "price": p[3], "created_at": p[4]}
+
+async def _load_products_page(after_id, limit):
+    async with get_async_connection() as conn:
+        products = await conn.fetch(f"""
+            SELECT {PRODUCT_COLUMNS} FROM productos
+            WHERE id > $1 ORDER BY id LIMIT $2;
+        """, after_id, limit)
+    items = [_row_to_product(p) for p in products]
+    next_cursor = items[-1]["id"] if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+async def list_products_page(after_id: int = 0, limit: int = 100):
+    return await listing_cache.get_or_load_async(("page", after_id, limit), lambda: _load_products_page(after_id, limit))
+
+async def iter_products(after_id: int = 0, batch_size: int = 1000):
+    # Keyset por lotes, como la ruta sincrona: la conexion se devuelve antes de cada yield.
+    while True:
+        async with get_async_connection() as conn:
+            rows = await conn.fetch(f"""
+                SELECT {PRODUCT_COLUMNS} FROM productos
+                WHERE id > $1 ORDER BY id LIMIT $2;
+            """, after_id, batch_size)
+        for p in rows:
+            yield _row_to_product(p)
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1][0]
+
+async def search_products(query: str, limit: int = 10):
+    if name_index.needs_refresh():
+        name_index.mark_refreshed()
+        async for p in iter_products(max(name_index.high_water - NAME_INDEX_OVERLAP, 0), 10000):
+            name_index.add(p["id"], p["product_name"])
+    return search_hits(query, limit)
+
+async def add_product(product):
+    async with get_async_connection() as conn:
+        product_id, created_at = await conn.fetchrow("""
+            INSERT INTO productos (product_name, quantity, price)
+            VALUES ($1, $2, $3) RETURNING id, created_at;
+        """, product.product_name, product.quantity, product.price)
+    invalidate_products()
+    name_index.add(product_id, product.product_name)
+    return {"id": product_id, "product_name": product.product_name, "quantity": product.quantity, "price": product.price, "created_at": created_at}
+
+async def update_product_by_id(product_id, cantidad):
+    async with get_async_connection() as conn:
+        product = await conn.fetchrow(f"""
+            UPDATE productos SET quantity = quantity - $1
+            WHERE id = $2 AND quantity >= $1 AND {NOT_SPLIT_SQL}
+            RETURNING id, product_name, quantity, price, created_at;
+        """, cantidad, product_id)
+    if product is None:
+        raise InsufficientStockError(f"Stock insuficiente o producto {product_id} inexistente (si tiene sub-contadores, {RESERVATION_ONLY_HINT})")
+    invalidate_products([product_id])
+    return _row_to_product(product)
+
+async def _load_product(product_id):
+    async with get_async_connection() as conn:
+        product = await conn.fetchrow(f"SELECT {PRODUCT_COLUMNS} FROM productos WHERE id = $1;", product_id)
+    return _row_to_product(product)
+
+async def get_product_by_id(product_id: int):
+    return dict(await product_cache.get_or_load_async(product_id, lambda: _load_product(product_id)))
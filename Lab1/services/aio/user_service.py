@@ -0,0 +1,15 @@
+from database.async_connection import get_async_connection
+
+async def get_user_by_id(user_id: int):
+    async with get_async_connection() as connection:
+        result = await connection.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+    return tuple(result) if result is not None else None
+
+async def create_user(user):
+    async with get_async_connection() as connection:
+        user_id = await connection.fetchval(
+            "INSERT INTO users (name, email, password, saldo, monedero_ahorro) VALUES ($1, $2, $3, $4, $5) RETURNING id",
+            user.name, user.email, user.password, user.saldo, user.monedero_ahorro,
+        )
+        await connection.execute("INSERT INTO wallet_ledger (user_id, amount, kind) VALUES ($1, $2, 'opening');", user_id, user.saldo)
+    return user_id
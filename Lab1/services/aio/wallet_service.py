@@ -0,0 +1,49 @@
+from database.async_connection import get_async_connection
+from services.wallet_service import WALLET_LOCK_CLASS, SNAPSHOT_EVERY, BALANCE_SQL, SNAPSHOT_SQL
+
+# Mismo libro de billetera que services/wallet_service.py; solo cambia el estilo de parametros.
+_BALANCE_SQL = BALANCE_SQL.replace("%s", "$1")
+_SNAPSHOT_SQL = SNAPSHOT_SQL.replace("%s", "$1")
+
+async def balance_for_update(conn, user_id):
+    await conn.execute("SELECT pg_advisory_xact_lock($1, $2);", WALLET_LOCK_CLASS, user_id)
+    row = await conn.fetchrow(_BALANCE_SQL, user_id)
+    return row[0] if row else None
+
+async def append_entry(conn, user_id, amount, kind):
+    await conn.execute("SELECT pg_advisory_xact_lock_shared($1, $2);", WALLET_LOCK_CLASS, user_id)
+    await conn.execute("INSERT INTO wallet_ledger (user_id, amount, kind) VALUES ($1, $2, $3);", user_id, amount, kind)
+
+async def refresh_snapshot(user_id):
+    async with get_async_connection() as conn:
+        await conn.execute("SELECT pg_advisory_xact_lock($1, $2);", WALLET_LOCK_CLASS, user_id)
+        await conn.execute(_SNAPSHOT_SQL, user_id)
+
+async def _add_entry(user_id, amount, kind):
+    async with get_async_connection() as conn:
+        await append_entry(conn, user_id, amount, kind)
+        new_balance, entries = await conn.fetchrow(_BALANCE_SQL, user_id)
+    if entries >= SNAPSHOT_EVERY:
+        await refresh_snapshot(user_id)
+    return {"saldo": new_balance}
+
+async def add_funds(amount, user_id):
+    return await _add_entry(user_id, float(amount), "credit")
+
+async def get_balance(user_id):
+    async with get_async_connection() as conn:
+        balance, entries = await conn.fetchrow(_BALANCE_SQL, user_id)
+    if entries >= SNAPSHOT_EVERY:
+        await refresh_snapshot(user_id)
+    return {"saldo": balance}
+
+async def get_history(user_id, limit=100):
+    async with get_async_connection() as conn:
+        entries = await conn.fetch("""
+            SELECT id, amount, kind, created_at FROM wallet_ledger
+            WHERE user_id = $1 ORDER BY id DESC LIMIT $2;
+        """, user_id, limit)
+    return {"user_id": user_id, "entries": [{"id": e[0], "amount": e[1], "kind": e[2], "created_at": e[3]} for e in entries]}
+
+async def discount_wallet_by_user_id(amount, user_id):
+    return await _add_entry(user_id, -float(amount), "debit")
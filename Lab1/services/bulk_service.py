@@ -0,0 +1,87 @@
+import io
+import csv
+import json
+import math
+import psycopg2
+from database.connection import get_connection
+from services.product_service import invalidate_products, PRODUCT_PIN_KEYS
+
+DEFAULT_BATCH_SIZE = 50000
+
+def _parse_row(raw):
+    product_name = str(raw["product_name"]).strip()
+    if not product_name:
+        raise ValueError("product_name vacio")
+    quantity = int(raw["quantity"])
+    if quantity < 0:
+        raise ValueError("quantity negativa")
+    price = float(raw["price"])
+    # Un valor que el COPY rechace tumba el lote entero; aca solo falla la fila.
+    if not math.isfinite(price) or price < 0:
+        raise ValueError("price debe ser un numero finito y no negativo")
+    return product_name, quantity, price
+
+def read_products(stream, fmt="csv"):
+    """Yield (line_number, raw_row) from a CSV (with header) or NDJSON text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_number, line
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+def _copy_batch(rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            cur.copy_expert("COPY productos (product_name, quantity, price) FROM STDIN WITH (FORMAT csv);", buf)
+
+def load_in_batches(stream, fmt, batch_size, load_batch, db_error):
+    """Parse the stream and hand rows to load_batch in batches; returns the per-batch report.
+
+    A batch that raises db_error is reported as rejected and the following batches still run.
+    """
+    report = {"loaded": 0, "rejected": 0, "batches": []}
+
+    def flush(batch_number, rows, errors, first_line, last_line):
+        result = {"batch": batch_number, "first_line": first_line, "last_line": last_line,
+                  "loaded": 0, "rejected": len(errors), "errors": errors}
+        if rows:
+            try:
+                load_batch(rows)
+                result["loaded"] = len(rows)
+            except db_error as e:
+                result["rejected"] += len(rows)
+                result["errors"].append({"line": None, "error": str(e).strip()})
+        report["loaded"] += result["loaded"]
+        report["rejected"] += result["rejected"]
+        report["batches"].append(result)
+
+    batch_number, rows, errors, first_line, line_number = 0, [], [], None, 0
+    for line_number, raw in read_products(stream, fmt):
+        if first_line is None:
+            first_line = line_number
+        try:
+            rows.append(_parse_row(json.loads(raw) if fmt == "ndjson" else raw))
+        except (ValueError, KeyError, TypeError) as e:
+            errors.append({"line": line_number, "error": str(e)})
+        if len(rows) + len(errors) >= batch_size:
+            batch_number += 1
+            flush(batch_number, rows, errors, first_line, line_number)
+            rows, errors, first_line = [], [], None
+    if rows or errors:
+        flush(batch_number + 1, rows, errors, first_line, line_number)
+    return report
+
+def bulk_load_products(stream, fmt="csv", batch_size=DEFAULT_BATCH_SIZE):
+    # Cada lote es un COPY en su propia transaccion: un lote con error se reporta y los demas siguen.
+    report = load_in_batches(stream, fmt, batch_size, _copy_batch, psycopg2.Error)
+    if report["loaded"]:
+        invalidate_products()
+    return report
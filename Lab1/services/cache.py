@@ -0,0 +1,78 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, max_size=1024, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Se incrementa en cada invalidacion; una carga que empezo antes no puede guardar un valor viejo.
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = loader()
+        if value is not None:
+            self.set(key, value, generation=generation)
+        return value
+
+    async def get_or_load_async(self, key, loader):
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = await loader()
+        if value is not None:
+            self.set(key, value, generation=generation)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "max_size": self.max_size, "ttl": self.ttl, **self._stats}
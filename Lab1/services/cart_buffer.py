@@ -0,0 +1,250 @@
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager, ExitStack
+
+logger = logging.getLogger("lab1.cart_buffer")
+
+# Locks por usuario repartidos en franjas (user_id % LOCK_STRIPES): no crecen con los usuarios
+# y dos usuarios distintos casi nunca comparten uno.
+LOCK_STRIPES = 64
+
+
+class _UserCart:
+    __slots__ = ("persisted", "pending", "loaded_at", "checkouts")
+
+    def __init__(self):
+        self.persisted = {}    # product_id -> cantidad ya escrita en la tabla cart
+        self.pending = {}      # product_id -> cantidad aun no escrita
+        self.loaded_at = None  # cuando se leyo persisted de la tabla (None: hay que leerla antes de servir get)
+        self.checkouts = 0     # checkouts en curso: el flusher no escribe sus lineas hasta que terminen
+
+
+class CartBuffer:
+    """Write-behind per-user cart: reads from memory, repeated adds coalesce per product.
+
+    Pending lines are written with flush_rows({user_id: [(product_id, quantity), ...]}) every
+    `interval` seconds, when `max_pending` lines accumulate, on checkout and on close. flush_rows
+    writes the batch in one transaction and returns the (user_id, product_id, quantity, error)
+    lines it could not write; those are dropped and reported instead of retried, so one bad line
+    cannot block the queue. A crash loses the lines of the current interval.
+
+    A loaded cart is served from memory for `ttl` seconds and then read again from the table, so
+    changes made by other processes show up after at most ttl. interval <= 0 disables the buffer
+    (callers write through).
+    """
+
+    def __init__(self, flush_rows, load_rows, interval=0.0, max_pending=1000, max_users=10000, ttl=5.0):
+        self.flush_rows = flush_rows
+        self.load_rows = load_rows
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_users = max_users
+        self.ttl = ttl
+        self._carts = OrderedDict()
+        self._pending_lines = 0
+        self._lock = threading.Lock()
+        # Un flush, una carga o un vaciado de un usuario toman su lock: ninguna lectura de la tabla
+        # ve un flush a medias de ese usuario, y los demas usuarios no esperan.
+        self._user_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._dropped = deque(maxlen=20)
+        self._stats = {"adds": 0, "hits": 0, "loads": 0, "flushes": 0, "flushed_lines": 0,
+                       "failed_flushes": 0, "dropped_lines": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def _user_lock(self, user_id):
+        return self._user_locks[hash(user_id) % LOCK_STRIPES]
+
+    @contextmanager
+    def _user_locks_for(self, user_ids):
+        # Siempre en el mismo orden, para que dos flushes con varios usuarios no se bloqueen entre si.
+        with ExitStack() as stack:
+            for stripe in sorted({hash(user_id) % LOCK_STRIPES for user_id in user_ids}):
+                stack.enter_context(self._user_locks[stripe])
+            yield
+
+    def _cart(self, user_id):
+        cart = self._carts.get(user_id)
+        if cart is None:
+            cart = self._carts[user_id] = _UserCart()
+        self._carts.move_to_end(user_id)
+        return cart
+
+    def _fresh(self, cart):
+        return cart.loaded_at is not None and time.monotonic() - cart.loaded_at < self.ttl
+
+    @staticmethod
+    def _view(cart):
+        quantities = dict(cart.persisted)
+        for product_id, quantity in cart.pending.items():
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return [{"product_id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()]
+
+    def _merge_pending(self, cart, pending):
+        merged = dict(pending)
+        for product_id, quantity in cart.pending.items():
+            merged[product_id] = merged.get(product_id, 0) + quantity
+        self._pending_lines += len(merged) - len(cart.pending)
+        cart.pending = merged
+
+    def _evict(self):
+        # Solo se descartan carritos sin lineas pendientes ni checkout en curso; se vuelven a leer si hacen falta.
+        if len(self._carts) <= self.max_users:
+            return
+        for user_id in [u for u, cart in self._carts.items() if not cart.pending and not cart.checkouts]:
+            if len(self._carts) <= self.max_users:
+                break
+            del self._carts[user_id]
+            self._stats["evictions"] += 1
+
+    def add(self, user_id, lines):
+        """Buffer (product_id, quantity) lines for user_id."""
+        with self._lock:
+            cart = self._cart(user_id)
+            for product_id, quantity in lines:
+                if product_id not in cart.pending:
+                    self._pending_lines += 1
+                cart.pending[product_id] = cart.pending.get(product_id, 0) + quantity
+                self._stats["adds"] += 1
+            full = self._pending_lines >= self.max_pending
+            self._evict()
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def get(self, user_id):
+        with self._lock:
+            cart = self._carts.get(user_id)
+            if cart is not None and self._fresh(cart):
+                self._carts.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return self._view(cart)
+        with self._user_lock(user_id):
+            persisted = self.load_rows(user_id)
+            with self._lock:
+                cart = self._cart(user_id)
+                cart.persisted, cart.loaded_at = persisted, time.monotonic()
+                self._stats["loads"] += 1
+                view = self._view(cart)
+                self._evict()
+        return view
+
+    def flush(self, user_id=None):
+        """Write pending lines (of one user, or everyone) in a single transaction; returns how many."""
+        return self._flush(None if user_id is None else [user_id])
+
+    def _flush(self, user_ids=None):
+        background = user_ids is None
+        with self._lock:
+            if background:
+                # Las lineas de un usuario en checkout se escriben al terminar, no en medio de su transaccion.
+                user_ids = [u for u, cart in self._carts.items() if cart.pending and not cart.checkouts]
+        if not user_ids:
+            return 0
+        with self._user_locks_for(user_ids):
+            with self._lock:
+                batch = {}
+                for u in user_ids:
+                    cart = self._carts.get(u)
+                    if cart is not None and cart.pending and not (background and cart.checkouts):
+                        batch[u], cart.pending = cart.pending, {}
+                        self._pending_lines -= len(batch[u])
+            if not batch:
+                return 0
+            lines = sum(len(pending) for pending in batch.values())
+            try:
+                failed = self.flush_rows({u: list(pending.items()) for u, pending in batch.items()})
+            except Exception:
+                # Fallo la transaccion entera (conexion, pool): las lineas vuelven a pendientes y se reintentan.
+                with self._lock:
+                    for u, pending in batch.items():
+                        self._merge_pending(self._cart(u), pending)
+                    self._stats["failed_flushes"] += 1
+                raise
+            for user_id, product_id, quantity, error in failed:
+                logger.warning("Se descarta la linea del carrito (usuario %s, producto %s, cantidad %s): %s",
+                               user_id, product_id, quantity, error)
+            with self._lock:
+                for user_id, product_id, quantity, error in failed:
+                    batch[user_id].pop(product_id, None)
+                    self._dropped.append({"user_id": user_id, "product_id": product_id, "quantity": quantity,
+                                          "error": str(error)})
+                for u, pending in batch.items():
+                    cart = self._carts.get(u)
+                    if cart is not None and cart.loaded_at is not None:
+                        for product_id, quantity in pending.items():
+                            cart.persisted[product_id] = cart.persisted.get(product_id, 0) + quantity
+                self._stats["flushes"] += 1
+                self._stats["flushed_lines"] += lines - len(failed)
+                self._stats["dropped_lines"] += len(failed)
+        return lines - len(failed)
+
+    @contextmanager
+    def checkout(self, user_id):
+        """Flush user_id's lines before the checkout block; lines added meanwhile stay pending.
+
+        Only user_id's lock is taken, and only for that flush. Until the block ends the background
+        flusher skips this user, so no line is inserted between the checkout's read and its delete.
+        On success the table no longer has the user's cart.
+        """
+        with self._lock:
+            self._cart(user_id).checkouts += 1
+        try:
+            self._flush([user_id])
+            yield
+        except BaseException:
+            with self._lock:
+                self._cart(user_id).checkouts -= 1
+            raise
+        with self._lock:
+            cart = self._cart(user_id)
+            cart.checkouts -= 1
+            cart.persisted, cart.loaded_at = {}, time.monotonic()
+
+    def delete(self, user_id, delete_rows):
+        with self._user_lock(user_id):
+            delete_rows(user_id)
+            with self._lock:
+                cart = self._cart(user_id)
+                self._pending_lines -= len(cart.pending)
+                cart.persisted, cart.pending, cart.loaded_at = {}, {}, time.monotonic()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="cart-buffer-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Fallo el flush del carrito; se reintenta en el proximo ciclo")
+
+    def close(self):
+        """Stop the flusher thread and write whatever is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {"enabled": self.enabled, "interval": self.interval, "max_pending": self.max_pending,
+                    "ttl": self.ttl, "users": len(self._carts), "pending_lines": self._pending_lines,
+                    "last_dropped": list(self._dropped), **self._stats}
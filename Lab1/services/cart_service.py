@@ -1,32 +1,108 @@
-from database.connection import get_connection
+import os
+import psycopg2
+from psycopg2.extras import execute_values
+from database.connection import get_connection, user_key
+from database.queries import register, run, prepare, timed
+from services.cart_buffer import CartBuffer
+
+CART_BY_USER = register("cart_by_user", "SELECT product_id, cantidad FROM cart WHERE user_id = %s;")
+CART_TOTALS_BY_USER = register("cart_totals_by_user", """
+    SELECT product_id, SUM(cantidad) FROM cart
+    WHERE user_id = %s GROUP BY product_id ORDER BY MIN(id);
+""")
+DELETE_CART = register("delete_cart", "DELETE FROM cart WHERE user_id = %s;")
+INSERT_CART_ITEM = register("insert_cart_item", "INSERT INTO cart (user_id, product_id, cantidad) VALUES (%s, %s, %s);")
+INSERT_CART_ITEMS_SQL = "INSERT INTO cart (user_id, product_id, cantidad) VALUES %s;"
+
+def _insert_rows(rows):
+    # Todas las lineas en un solo INSERT multi-fila y una sola transaccion.
+    with get_connection(pin_keys=tuple({user_key(row[0]) for row in rows})) as conn:
+        with conn.cursor() as cur:
+            with timed("insert_cart_items", cur):
+                execute_values(cur, INSERT_CART_ITEMS_SQL, rows, page_size=1000)
+
+def _flush_batch(batch):
+    # Un solo COMMIT para todo el lote; cada usuario va en su SAVEPOINT con un INSERT multi-fila.
+    # Si falla (producto inexistente o sin tienda), ese usuario se reintenta fila por fila y solo
+    # se descartan las lineas que fallan: una linea mala no frena el carrito de nadie mas.
+    failed = []
+    with get_connection(pin_keys=tuple({user_key(user_id) for user_id in batch})) as conn:
+        with conn.cursor() as cur:
+            # PREPARE antes del primer SAVEPOINT: un ROLLBACK TO lo descartaria.
+            prepare(cur, INSERT_CART_ITEM)
+            with timed("flush_cart_items", cur):
+                for user_id, lines in batch.items():
+                    cur.execute("SAVEPOINT cart_user;")
+                    try:
+                        execute_values(cur, INSERT_CART_ITEMS_SQL,
+                                       [(user_id, product_id, quantity) for product_id, quantity in lines], page_size=1000)
+                    except psycopg2.Error:
+                        cur.execute("ROLLBACK TO SAVEPOINT cart_user;")
+                    else:
+                        cur.execute("RELEASE SAVEPOINT cart_user;")
+                        continue
+                    for product_id, quantity in lines:
+                        cur.execute("SAVEPOINT cart_line;")
+                        try:
+                            run(cur, INSERT_CART_ITEM, (user_id, product_id, quantity))
+                        except psycopg2.Error as e:
+                            cur.execute("ROLLBACK TO SAVEPOINT cart_line;")
+                            failed.append((user_id, product_id, quantity, str(e).strip()))
+                        else:
+                            cur.execute("RELEASE SAVEPOINT cart_line;")
+    return failed
+
+def _load_cart(user_id):
+    with get_connection(readonly=True, pin_keys=(user_key(user_id),)) as conn:
+        with conn.cursor() as cur:
+            run(cur, CART_TOTALS_BY_USER, (user_id,))
+            return {product_id: quantity for product_id, quantity in cur.fetchall()}
+
+def _delete_cart(user_id):
+    with get_connection(pin_keys=(user_key(user_id),)) as conn:
+        with conn.cursor() as cur:
+            run(cur, DELETE_CART, (user_id,))
+
+# Carrito write-behind (opcional): con CART_FLUSH_INTERVAL > 0 se lee de memoria y las lineas se
+# escriben en lote cada CART_FLUSH_INTERVAL segundos (o al juntar CART_FLUSH_MAX_PENDING lineas, en el
+# checkout y al apagar). Si el proceso muere se pierden a lo sumo las lineas de ese intervalo, y un
+# carrito leido se vuelve a leer de la tabla despues de CART_BUFFER_TTL segundos. Por defecto (0)
+# cada linea se escribe al momento.
+cart_buffer = CartBuffer(
+    _flush_batch,
+    _load_cart,
+    interval=float(os.getenv("CART_FLUSH_INTERVAL", "0")),
+    max_pending=int(os.getenv("CART_FLUSH_MAX_PENDING", "1000")),
+    max_users=int(os.getenv("CART_BUFFER_USERS", "10000")),
+    ttl=float(os.getenv("CART_BUFFER_TTL", "5")),
+)
+
+def add_many_to_cart(user_id: int, items):
+    lines = [(item.product_id, item.quantity) for item in items]
+    if lines:
+        if cart_buffer.enabled:
+            cart_buffer.add(user_id, lines)
+        else:
+            _insert_rows([(user_id, product_id, quantity) for product_id, quantity in lines])
+    return {"user_id": user_id, "added": len(lines)}
 
 def add_to_cart(item):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO cart (user_id, product_id, cantidad)
-        VALUES (%s, %s, %s);
-    """, (item.user_id, item.product_id, item.quantity))
-    conn.commit()
-    cur.close()
-    conn.close()
+    add_many_to_cart(item.user_id, [item])
     return {"item": item,}  # Ejemplo
 
 def get_cart(user_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT product_id, cantidad FROM cart WHERE user_id = %s;", (user_id,))
-    items = cur.fetchall()
-    cur.close()
-    conn.close()
+    if cart_buffer.enabled:
+        return {"user_id": user_id, "items": cart_buffer.get(user_id)}
+    with get_connection(readonly=True, pin_keys=(user_key(user_id),)) as conn:
+        with conn.cursor() as cur:
+            run(cur, CART_BY_USER, (user_id,))
+            items = cur.fetchall()
     return {"user_id": user_id, "items": [{"product_id": item[0], "quantity": item[1]} for item in items]}
 
 
 def delete_all_cart(user_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM cart WHERE user_id = %s;", (user_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
-    return {"text": f"Carrito del usuario {user_id} ha sido eliminado"}
\ No newline at end of file
+    if cart_buffer.enabled:
+        cart_buffer.delete(user_id, _delete_cart)
+    else:
+        _delete_cart(user_id)
+    return {"text": f"Carrito del usuario {user_id} ha sido eliminado"}
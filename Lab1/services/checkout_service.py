@@ -0,0 +1,81 @@
+from database.connection import get_connection, user_key
+from database.queries import register, run
+from services.product_service import invalidate_products, PRODUCT_PIN_KEYS, RESERVATION_ONLY_HINT
+from services.wallet_service import balance_for_update, append_entry
+from services.cart_service import DELETE_CART, cart_buffer
+
+CART_LINES_FOR_UPDATE = register("cart_lines_for_update", """
+    SELECT p.id, p.product_name, p.price, p.quantity, l.cantidad,
+           EXISTS (SELECT 1 FROM inventory_slots s WHERE s.product_id = p.id)
+    FROM productos p
+    JOIN (
+        SELECT store_id, product_id, SUM(cantidad) AS cantidad
+        FROM cart WHERE user_id = %s GROUP BY store_id, product_id
+    ) l ON p.store_id = l.store_id AND p.id = l.product_id
+    ORDER BY p.id
+    FOR UPDATE OF p;
+""")
+DECREMENT_CART_STOCK = register("decrement_cart_stock", """
+    UPDATE productos p
+    SET quantity = p.quantity - l.cantidad
+    FROM (
+        SELECT store_id, product_id, SUM(cantidad) AS cantidad
+        FROM cart WHERE user_id = %s GROUP BY store_id, product_id
+    ) l
+    WHERE p.store_id = l.store_id AND p.id = l.product_id;
+""")
+
+
+class CheckoutError(Exception):
+    """Raised when the cart cannot be paid; nothing is written in that case."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def check_lines(lines):
+    """Refuse the cart if a line is split into inventory slots or has less stock than requested."""
+    reservation_only = [line[0] for line in lines if line[5]]
+    if reservation_only:
+        # Sus sub-contadores no se tocan aca: el stock de productos es 0 y descontarlo no tendria sentido.
+        raise CheckoutError(f"Los productos {reservation_only} {RESERVATION_ONLY_HINT}", status_code=409)
+    out_of_stock = [line[0] for line in lines if line[3] < line[4]]
+    if out_of_stock:
+        raise CheckoutError(f"Stock insuficiente para los productos {out_of_stock}", status_code=409)
+
+
+def checkout(user_id: int):
+    # Las lineas del buffer se escriben antes y no hay otro flush hasta el commit.
+    with cart_buffer.checkout(user_id):
+        # Todo ocurre en una sola conexion y transaccion: si algo falla, get_connection hace rollback.
+        with get_connection(pin_keys=(user_key(user_id), *PRODUCT_PIN_KEYS)) as conn:
+            with conn.cursor() as cur:
+                saldo = balance_for_update(cur, user_id)
+                if saldo is None:
+                    raise CheckoutError(f"Usuario {user_id} no existe", status_code=404)
+
+                # Precio y stock de todo el carrito en una sola consulta; bloquea los productos en orden de id.
+                run(cur, CART_LINES_FOR_UPDATE, (user_id,))
+                lines = cur.fetchall()
+                if not lines:
+                    raise CheckoutError(f"El carrito del usuario {user_id} esta vacio")
+
+                check_lines(lines)
+                total = sum(line[2] * line[4] for line in lines)
+                if saldo < float(total):
+                    raise CheckoutError("Saldo insuficiente para realizar la compra", status_code=409)
+
+                append_entry(cur, user_id, -float(total), "debit")
+                new_balance = saldo - float(total)
+                run(cur, DECREMENT_CART_STOCK, (user_id,))
+                run(cur, DELETE_CART, (user_id,))
+
+    # Despues del commit: el stock cambio, ninguna lectura posterior puede servir el valor viejo.
+    invalidate_products([line[0] for line in lines])
+    return {
+        "user_id": user_id,
+        "total": total,
+        "saldo": new_balance,
+        "items": [{"product_id": line[0], "product_name": line[1], "price": line[2], "quantity": line[4]} for line in lines],
+    }
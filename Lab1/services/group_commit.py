@@ -0,0 +1,102 @@
+import time
+import threading
+
+
+class _Pending:
+    __slots__ = ("item", "result", "error", "finished", "leader", "wake")
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.leader = False
+        self.wake = threading.Event()
+
+
+class GroupCommitter:
+    """Group commit: submissions that arrive within `window` seconds share one apply_batch call.
+
+    The first caller of a batch becomes its leader: it waits up to `window` (or until `max_batch`
+    items queue up), runs apply_batch(items) and hands every waiting caller its own result.
+    apply_batch returns one (result, error) pair per item, so a failing item does not fail the
+    rest of the batch; if apply_batch itself raises, every caller in the batch gets that error.
+    window <= 0 disables batching (callers write directly).
+    """
+
+    def __init__(self, apply_batch, window=0.002, max_batch=256):
+        self.apply_batch = apply_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = []
+        self._leader_active = False
+        self._cond = threading.Condition()
+        self._stats = {"submitted": 0, "batches": 0, "applied": 0, "failed_items": 0, "failed_batches": 0, "largest_batch": 0}
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def submit(self, item):
+        """Queue item, wait for the batch that contains it to be applied, and return its result."""
+        pending = _Pending(item)
+        with self._cond:
+            self._queue.append(pending)
+            self._stats["submitted"] += 1
+            if not self._leader_active:
+                self._leader_active = True
+                pending.leader = True
+            elif len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+        while True:
+            if pending.leader:
+                pending.leader = False
+                self._lead()
+            pending.wake.wait()
+            pending.wake.clear()
+            if pending.finished:
+                break
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _lead(self):
+        deadline = time.monotonic() + self.window
+        with self._cond:
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            # Lo que no entro en este lote ya tiene su lider: el primero de la cola.
+            if self._queue:
+                self._queue[0].leader = True
+                self._queue[0].wake.set()
+            else:
+                self._leader_active = False
+        try:
+            outcomes = self.apply_batch([p.item for p in batch])
+        except BaseException as e:
+            outcomes = [(None, e)] * len(batch)
+            failed_batch = True
+        else:
+            failed_batch = False
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["applied"] += len(batch)
+            self._stats["failed_batches"] += failed_batch
+            self._stats["failed_items"] += sum(error is not None for _, error in outcomes)
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+        for p, (result, error) in zip(batch, outcomes):
+            p.result, p.error, p.finished = result, error, True
+            p.wake.set()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            queued = len(self._queue)
+        stats["avg_batch"] = round(stats["applied"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return {"enabled": self.enabled, "window_ms": self.window * 1000, "max_batch": self.max_batch,
+                "queued": queued, **stats}
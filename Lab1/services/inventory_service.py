@@ -0,0 +1,185 @@
+import os
+import psycopg2
+from database.connection import get_connection
+from database.queries import register, run
+from services.product_service import invalidate_products, product_cache, listing_cache, PRODUCT_PIN_KEYS
+
+RESERVATION_TTL = int(os.getenv("INVENTORY_RESERVATION_TTL", "300"))
+RESERVE_ATTEMPTS = int(os.getenv("INVENTORY_RESERVE_ATTEMPTS", "3"))
+
+# Un comprador toma cualquier sub-contador libre con stock suficiente; los bloqueados se saltan.
+_CLAIM_SLOT_SQL = """
+    UPDATE inventory_slots s SET quantity = s.quantity - %s
+    FROM (
+        SELECT slot FROM inventory_slots
+        WHERE product_id = %s AND quantity >= %s
+        ORDER BY random() LIMIT 1
+        FOR UPDATE {lock}
+    ) picked
+    WHERE s.product_id = %s AND s.slot = picked.slot
+    RETURNING s.slot;
+"""
+_RELEASE_SQL = """
+    WITH released AS (
+        UPDATE inventory_reservations SET status = 'released'
+        WHERE status = 'pending' AND {condition}
+        RETURNING product_id, slot, quantity
+    ), per_slot AS (
+        SELECT product_id, slot, SUM(quantity) AS quantity FROM released GROUP BY product_id, slot
+    ), split AS (
+        SELECT DISTINCT product_id FROM inventory_slots WHERE product_id IN (SELECT product_id FROM per_slot)
+    ), restored AS (
+        -- Si el producto se re-particiono mientras tanto, el sub-contador se vuelve a crear.
+        INSERT INTO inventory_slots (product_id, slot, quantity)
+        SELECT product_id, slot, quantity FROM per_slot WHERE product_id IN (SELECT product_id FROM split)
+        ON CONFLICT (product_id, slot) DO UPDATE SET quantity = inventory_slots.quantity + EXCLUDED.quantity
+    ), unsplit AS (
+        -- Si ya no tiene sub-contadores (split_stock(id, 0)), las unidades vuelven a productos.
+        UPDATE productos p SET quantity = p.quantity + r.quantity
+        FROM (
+            SELECT product_id, SUM(quantity) AS quantity FROM per_slot
+            WHERE product_id NOT IN (SELECT product_id FROM split) GROUP BY product_id
+        ) r
+        WHERE p.id = r.product_id
+    )
+    SELECT COALESCE(SUM(quantity), 0) FROM per_slot;
+"""
+
+PRODUCT_STOCK_FOR_UPDATE = register("product_stock_for_update", "SELECT quantity FROM productos WHERE id = %s FOR UPDATE;")
+SLOTS_FOR_UPDATE = register("slots_for_update", "SELECT quantity FROM inventory_slots WHERE product_id = %s FOR UPDATE;")
+DELETE_SLOTS = register("delete_slots", "DELETE FROM inventory_slots WHERE product_id = %s;")
+CREATE_SLOTS = register("create_slots", """
+    INSERT INTO inventory_slots (product_id, slot, quantity)
+    SELECT %s, g, %s::int + CASE WHEN g < %s::int THEN 1 ELSE 0 END
+    FROM generate_series(0, %s::int - 1) AS g;
+""")
+SET_PRODUCT_STOCK = register("set_product_stock", "UPDATE productos SET quantity = %s WHERE id = %s;")
+PRODUCT_AVAILABILITY = register("product_availability", """
+    SELECT p.quantity, COALESCE(SUM(s.quantity), 0), COUNT(s.slot)
+    FROM productos p LEFT JOIN inventory_slots s ON s.product_id = p.id
+    WHERE p.id = %s GROUP BY p.quantity;
+""")
+CLAIM_SLOT_SKIP_LOCKED = register("claim_slot_skip_locked", _CLAIM_SLOT_SQL.format(lock="SKIP LOCKED"))
+CLAIM_SLOT_WAIT = register("claim_slot_wait", _CLAIM_SLOT_SQL.format(lock=""))
+INSERT_RESERVATION = register("insert_reservation", """
+    INSERT INTO inventory_reservations (product_id, slot, user_id, quantity, expires_at)
+    VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP + %s::int * INTERVAL '1 second')
+    RETURNING id, product_id, slot, user_id, quantity, status, expires_at;
+""")
+CONFIRM_RESERVATION = register("confirm_reservation", """
+    UPDATE inventory_reservations SET status = 'confirmed'
+    WHERE id = %s AND status = 'pending' AND expires_at > CURRENT_TIMESTAMP
+    RETURNING id, product_id, slot, user_id, quantity, status, expires_at;
+""")
+RELEASE_RESERVATION = register("release_reservation", _RELEASE_SQL.format(condition="id = %s"))
+RELEASE_EXPIRED = register("release_expired", _RELEASE_SQL.format(condition="expires_at <= CURRENT_TIMESTAMP"))
+RELEASE_EXPIRED_FOR_PRODUCT = register("release_expired_for_product", _RELEASE_SQL.format(condition="expires_at <= CURRENT_TIMESTAMP AND product_id = %s"))
+
+
+class InventoryError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _row_to_reservation(r):
+    return {"id": r[0], "product_id": r[1], "slot": r[2], "user_id": r[3], "quantity": r[4], "status": r[5], "expires_at": r[6]}
+
+def _invalidate_slot_stock(product_id=None):
+    # Las lecturas de productos suman el stock de los sub-contadores, asi que tambien caducan aca.
+    if product_id is None:
+        product_cache.clear()
+        listing_cache.clear()
+    else:
+        invalidate_products([product_id])
+
+def split_stock(product_id: int, slots: int):
+    """Redistribute all of a product's stock over `slots` sub-counters (0 moves it back to productos).
+
+    While a product has slots it is sold only through reservations: PATCH /products and checkout
+    refuse it, and product reads report productos.quantity plus the slot stock.
+    """
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, PRODUCT_STOCK_FOR_UPDATE, (product_id,))
+            row = cur.fetchone()
+            if row is None:
+                raise InventoryError(f"Producto {product_id} no existe", status_code=404)
+            run(cur, SLOTS_FOR_UPDATE, (product_id,))
+            total = row[0] + sum(r[0] for r in cur.fetchall())
+            run(cur, DELETE_SLOTS, (product_id,))
+            if slots > 0:
+                per_slot, remainder = divmod(total, slots)
+                run(cur, CREATE_SLOTS, (product_id, per_slot, remainder, slots))
+            run(cur, SET_PRODUCT_STOCK, (0 if slots > 0 else total, product_id))
+    invalidate_products([product_id])
+    return get_availability(product_id)
+
+def get_availability(product_id: int):
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, PRODUCT_AVAILABILITY, (product_id,))
+            row = cur.fetchone()
+    if row is None:
+        raise InventoryError(f"Producto {product_id} no existe", status_code=404)
+    return {"product_id": product_id, "available": row[0] + row[1], "slots": row[2], "slot_stock": row[1]}
+
+def _claim_slot(cur, product_id, quantity, skip_locked):
+    run(cur, CLAIM_SLOT_SKIP_LOCKED if skip_locked else CLAIM_SLOT_WAIT, (quantity, product_id, quantity, product_id))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def reserve(product_id: int, user_id: int, quantity: int):
+    if quantity <= 0:
+        raise InventoryError("La cantidad debe ser positiva")
+    for attempt in range(RESERVE_ATTEMPTS + 1):
+        with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+            with conn.cursor() as cur:
+                # El ultimo intento espera los locks en lugar de saltarlos, para no fallar solo por contencion.
+                slot = _claim_slot(cur, product_id, quantity, skip_locked=attempt < RESERVE_ATTEMPTS)
+                if slot is not None:
+                    try:
+                        run(cur, INSERT_RESERVATION, (product_id, slot, user_id, quantity, RESERVATION_TTL))
+                    except psycopg2.errors.ForeignKeyViolation:
+                        # Se revierte la transaccion y con ella el descuento del sub-contador.
+                        raise InventoryError(f"Usuario {user_id} no existe", status_code=404)
+                    reservation = _row_to_reservation(cur.fetchone())
+        if slot is not None:
+            # Despues del commit, como en el resto de las escrituras de productos.
+            _invalidate_slot_stock(product_id)
+            return reservation
+        if attempt == 0:
+            # Antes de reintentar se devuelve el stock de las reservas vencidas de este producto.
+            release_expired(product_id)
+    raise InventoryError(f"Stock insuficiente para el producto {product_id}", status_code=409)
+
+def confirm(reservation_id: int):
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            run(cur, CONFIRM_RESERVATION, (reservation_id,))
+            row = cur.fetchone()
+    if row is None:
+        raise InventoryError(f"La reserva {reservation_id} no existe, expiro o ya fue cerrada", status_code=409)
+    return _row_to_reservation(row)
+
+def release(reservation_id: int):
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, RELEASE_RESERVATION, (reservation_id,))
+            quantity = cur.fetchone()[0]
+    if not quantity:
+        raise InventoryError(f"La reserva {reservation_id} no existe o ya fue cerrada", status_code=409)
+    _invalidate_slot_stock()
+    return {"id": reservation_id, "status": "released", "quantity": quantity}
+
+def release_expired(product_id=None):
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            if product_id is None:
+                run(cur, RELEASE_EXPIRED)
+            else:
+                run(cur, RELEASE_EXPIRED_FOR_PRODUCT, (product_id,))
+            quantity = cur.fetchone()[0]
+    if quantity:
+        _invalidate_slot_stock(product_id)
+    return {"released": quantity}
@@ -1,45 +1,148 @@
+import os
+import threading
 from database.connection import get_connection
+from database.queries import register, run
+from services.cache import TTLCache
+from services.trigram_index import TrigramIndex
+
+# Cache por id de producto y cache de listados; toda escritura de productos invalida ambos.
+product_cache = TTLCache(max_size=int(os.getenv("PRODUCT_CACHE_SIZE", "10000")), ttl=float(os.getenv("PRODUCT_CACHE_TTL", "30")))
+listing_cache = TTLCache(max_size=int(os.getenv("PRODUCT_LISTING_CACHE_SIZE", "256")), ttl=float(os.getenv("PRODUCT_CACHE_TTL", "30")))
+
+# Indice de nombres para GET /products/search. add_product lo actualiza al momento; las altas de
+# otros procesos o de la carga masiva se traen por id (keyset) cada PRODUCT_SEARCH_REFRESH segundos.
+name_index = TrigramIndex(min_similarity=float(os.getenv("PRODUCT_SEARCH_MIN_SIMILARITY", "0.3")),
+                          refresh_interval=float(os.getenv("PRODUCT_SEARCH_REFRESH", "5")))
+# Los id de SERIAL pueden confirmarse fuera de orden; cada refresco vuelve a mirar este margen.
+NAME_INDEX_OVERLAP = 1000
+_name_index_lock = threading.Lock()
+
+# Tras escribir productos, este proceso lee del primario un rato para no recargar la cache desde una replica atrasada.
+PRODUCT_PIN_KEYS = ("productos",)
+
+# Un producto repartido en sub-contadores (ventas flash, ver inventory_service) se vende solo por
+# reservas: su productos.quantity queda en 0 y el stock vive en inventory_slots. Las lecturas
+# muestran la suma de ambos; PATCH y checkout no lo descuentan (NOT_SPLIT_SQL).
+PRODUCT_COLUMNS = """id, product_name,
+    quantity + COALESCE((SELECT SUM(s.quantity) FROM inventory_slots s WHERE s.product_id = productos.id), 0) AS quantity,
+    price, created_at"""
+NOT_SPLIT_SQL = "NOT EXISTS (SELECT 1 FROM inventory_slots s WHERE s.product_id = productos.id)"
+RESERVATION_ONLY_HINT = "se vende solo por reservas (/inventory)"
+
+LIST_PRODUCTS = register("list_products", f"SELECT {PRODUCT_COLUMNS} FROM productos;")
+PRODUCTS_PAGE = register("products_page", f"""
+    SELECT {PRODUCT_COLUMNS} FROM productos
+    WHERE id > %s ORDER BY id LIMIT %s;
+""")
+INSERT_PRODUCT = register("insert_product", """
+    INSERT INTO productos (product_name, quantity, price)
+    VALUES (%s, %s, %s) RETURNING id, created_at;
+""")
+DECREMENT_PRODUCT = register("decrement_product", f"""
+    UPDATE productos SET quantity = quantity - %s
+    WHERE id = %s AND quantity >= %s AND {NOT_SPLIT_SQL}
+    RETURNING id, product_name, quantity, price, created_at;
+""")
+PRODUCT_BY_ID = register("product_by_id", f"SELECT {PRODUCT_COLUMNS} FROM productos WHERE id = %s;")
+
+class InsufficientStockError(Exception):
+    pass
+
+def _row_to_product(p):
+    return {"id": p[0], "product_name": p[1], "quantity": p[2], "price": p[3], "created_at": p[4]}
+
+def invalidate_products(product_ids=()):
+    for product_id in product_ids:
+        product_cache.invalidate(product_id)
+    listing_cache.clear()
+    if not product_ids:  # altas: el indice de nombres tiene que mirar ids nuevos
+        name_index.mark_dirty()
+
+def cache_stats():
+    return {"products": product_cache.stats(), "listings": listing_cache.stats(), "search": name_index.stats()}
+
+def refresh_name_index(iter_rows):
+    """Index products above the index's high-water mark; iter_rows(after_id, batch_size) yields product dicts."""
+    if not name_index.needs_refresh():
+        return
+    with _name_index_lock:
+        if not name_index.needs_refresh():
+            return
+        name_index.mark_refreshed()
+        for p in iter_rows(max(name_index.high_water - NAME_INDEX_OVERLAP, 0), 10000):
+            name_index.add(p["id"], p["product_name"])
+
+def search_hits(query, limit):
+    hits = name_index.search(query, limit)
+    return {"query": query, "items": [{"id": i, "product_name": name, "score": score} for i, name, score in hits]}
+
+def _load_products():
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, LIST_PRODUCTS)
+            products = cur.fetchall()
+    return [_row_to_product(p) for p in products]
 
 def list_products():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT id, product_name, quantity, price, created_at FROM productos;")
-    products = cur.fetchall()
-    cur.close()
-    conn.close()
-    return [{"id": p[0], "product_name": p[1], "quantity": p[2], "price": p[3], "created_at": p[4]} for p in products]
+    return listing_cache.get_or_load(("all",), _load_products)
+
+def _load_products_page(after_id, limit):
+    # Paginacion por keyset sobre id: cada pagina es un index range scan, sin OFFSET.
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, PRODUCTS_PAGE, (after_id, limit))
+            products = cur.fetchall()
+    items = [_row_to_product(p) for p in products]
+    next_cursor = items[-1]["id"] if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def list_products_page(after_id: int = 0, limit: int = 100):
+    return listing_cache.get_or_load(("page", after_id, limit), lambda: _load_products_page(after_id, limit))
+
+def iter_products(after_id: int = 0, batch_size: int = 1000):
+    # Keyset por lotes de batch_size: la memoria no crece con la tabla y la conexion vuelve al pool
+    # antes de cada yield. Asi un cliente que corta el stream a mitad (y un generador que nadie
+    # cierra) no retiene una conexion del pool hasta que el recolector pase por el generador.
+    while True:
+        with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+            with conn.cursor() as cur:
+                run(cur, PRODUCTS_PAGE, (after_id, batch_size))
+                rows = cur.fetchall()
+        for p in rows:
+            yield _row_to_product(p)
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1][0]
+
+def search_products(query: str, limit: int = 10):
+    refresh_name_index(iter_products)
+    return search_hits(query, limit)
 
 def add_product(product):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO productos (product_name, quantity, price)
-        VALUES (%s, %s, %s) RETURNING id, created_at;
-    """, (product.product_name, product.quantity, product.price))
-    product_id, created_at = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, INSERT_PRODUCT, (product.product_name, product.quantity, product.price))
+            product_id, created_at = cur.fetchone()
+    invalidate_products()
+    name_index.add(product_id, product.product_name)
     return {"id": product_id, "product_name": product.product_name, "quantity": product.quantity, "price": product.price, "created_at": created_at}
 
 def update_product_by_id(product_id, cantidad):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE productos SET quantity = quantity - %s WHERE id = %s RETURNING id, product_name, quantity, price, created_at;
-    """, (cantidad, product_id))
-    product = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
-    return {"id": product[0], "product_name": product[1], "quantity": product[2], "price": product[3], "created_at": product[4]}
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, DECREMENT_PRODUCT, (cantidad, product_id, cantidad))
+            product = cur.fetchone()
+    if product is None:
+        raise InsufficientStockError(f"Stock insuficiente o producto {product_id} inexistente (si tiene sub-contadores, {RESERVATION_ONLY_HINT})")
+    invalidate_products([product_id])
+    return _row_to_product(product)
+
+def _load_product(product_id):
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, PRODUCT_BY_ID, (product_id,))
+            product = cur.fetchone()
+    return _row_to_product(product)
 
 def get_product_by_id(product_id:int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT id, product_name, quantity, price, created_at FROM productos WHERE id = %s;", (product_id,))
-    product = cur.fetchone()
-    cur.close()
-    conn.close()
-    return {"id": product[0], "product_name": product[1], "quantity": product[2], "price": product[3], "created_at": product[4]}
-    
\ No newline at end of file
+    return dict(product_cache.get_or_load(product_id, lambda: _load_product(product_id)))
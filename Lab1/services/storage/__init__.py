@@ -0,0 +1,18 @@
+import os
+from importlib import import_module
+
+# Backend de almacenamiento de los endpoints sync: cada modulo expone las mismas funciones
+# (productos, carrito, billetera, usuarios, checkout, carga masiva, migrate y close).
+#   postgres: los servicios de services/ sobre el pool de psycopg2 (por defecto).
+#   sqlite:   base embebida en un archivo, sin servidor; pensada para pruebas de carga en proceso.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "postgres")
+
+BACKENDS = {
+    "postgres": "services.storage.postgres",
+    "sqlite": "services.storage.sqlite",
+}
+
+if STORAGE_BACKEND not in BACKENDS:
+    raise ValueError(f"STORAGE_BACKEND debe ser uno de {sorted(BACKENDS)}, no {STORAGE_BACKEND!r}")
+
+storage = import_module(BACKENDS[STORAGE_BACKEND])
@@ -0,0 +1,25 @@
+# Backend Postgres: los servicios existentes tal cual (pool, consultas preparadas, cache, replicas).
+from database.connection import close_pool
+from database.migrations import migrate
+from services.product_service import (
+    list_products, list_products_page, iter_products, search_products, add_product, update_product_by_id, get_product_by_id,
+)
+from services.cart_service import add_to_cart, add_many_to_cart, get_cart, delete_all_cart, cart_buffer
+from services.wallet_service import add_funds, get_balance, get_history, discount_wallet_by_user_id
+from services.user_service import get_user_by_id, create_user
+from services.checkout_service import checkout
+from services.bulk_service import bulk_load_products
+
+def close():
+    cart_buffer.close()  # ultimo flush del carrito antes de cerrar el pool
+    close_pool()
+
+__all__ = [
+    "close", "migrate",
+    "list_products", "list_products_page", "iter_products", "search_products", "add_product", "update_product_by_id", "get_product_by_id",
+    "add_to_cart", "add_many_to_cart", "get_cart", "delete_all_cart",
+    "add_funds", "get_balance", "get_history", "discount_wallet_by_user_id",
+    "get_user_by_id", "create_user",
+    "checkout",
+    "bulk_load_products",
+]
@@ -0,0 +1,289 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from services.product_service import InsufficientStockError, name_index, refresh_name_index, search_hits
+from services.checkout_service import CheckoutError
+from services.bulk_service import load_in_batches, DEFAULT_BATCH_SIZE
+
+# Backend embebido: mismo contrato que services.storage.postgres, sin servidor de base de datos.
+# WAL deja leer mientras otro hilo escribe; cada hilo reutiliza su propia conexion (threading.local).
+# No hay cache, replicas ni snapshots de billetera: el saldo es la suma del libro. El indice de
+# busqueda por nombre (product_service.name_index) si se comparte.
+SQLITE_PATH = os.getenv("SQLITE_PATH", "lab1.sqlite3")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS productos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_name TEXT NOT NULL,
+        quantity INTEGER NOT NULL CHECK (quantity >= 0),
+        price REAL NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        password TEXT NOT NULL,
+        saldo REAL NOT NULL,
+        monedero_ahorro REAL NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tiendas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL,
+        direccion TEXT NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cart (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id),
+        product_id INTEGER NOT NULL REFERENCES productos(id),
+        cantidad INTEGER NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cart_user_product ON cart (user_id, product_id);",
+    """
+    CREATE TABLE IF NOT EXISTS wallet_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id),
+        amount REAL NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('opening', 'credit', 'debit')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_wallet_ledger_user_id ON wallet_ledger (user_id, id);",
+]
+
+PRODUCT_COLUMNS = "id, product_name, quantity, price, created_at"
+BALANCE_SQL = """
+    SELECT COALESCE((SELECT SUM(amount) FROM wallet_ledger WHERE user_id = u.id), 0)
+    FROM users u WHERE u.id = ?;
+"""
+
+# CURRENT_TIMESTAMP se guarda como texto; se devuelve como datetime igual que psycopg2.
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+
+def _connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # isolation_level=None: autocommit; las escrituras abren su transaccion con transaction().
+        conn = sqlite3.connect(SQLITE_PATH, detect_types=sqlite3.PARSE_DECLTYPES,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA foreign_keys=ON;")
+        conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS};")
+        _local.conn = conn
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction():
+    """Run a write transaction on this thread's connection; commits on success, rolls back on error.
+
+    BEGIN IMMEDIATE takes the write lock up front, so read-then-write sequences (checkout) are serialized.
+    """
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        yield conn
+        conn.execute("COMMIT;")
+    except BaseException:
+        conn.execute("ROLLBACK;")
+        raise
+
+
+def migrate():
+    with transaction() as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+
+def close():
+    global _local
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+        _local = threading.local()
+    for conn in connections:
+        conn.close()
+
+
+def _row_to_product(p):
+    return {"id": p[0], "product_name": p[1], "quantity": p[2], "price": p[3], "created_at": p[4]}
+
+
+# Productos
+def list_products():
+    rows = _connection().execute(f"SELECT {PRODUCT_COLUMNS} FROM productos;").fetchall()
+    return [_row_to_product(p) for p in rows]
+
+def list_products_page(after_id: int = 0, limit: int = 100):
+    rows = _connection().execute(
+        f"SELECT {PRODUCT_COLUMNS} FROM productos WHERE id > ? ORDER BY id LIMIT ?;", (after_id, limit)
+    ).fetchall()
+    items = [_row_to_product(p) for p in rows]
+    return {"items": items, "next_cursor": items[-1]["id"] if len(items) == limit else None}
+
+def iter_products(after_id: int = 0, batch_size: int = 1000):
+    # Una consulta por lote en vez de un cursor abierto: StreamingResponse puede avanzar el
+    # generador desde distintos hilos y cada uno tiene su propia conexion.
+    while True:
+        page = list_products_page(after_id, batch_size)
+        yield from page["items"]
+        if page["next_cursor"] is None:
+            return
+        after_id = page["next_cursor"]
+
+def search_products(query: str, limit: int = 10):
+    refresh_name_index(iter_products)
+    return search_hits(query, limit)
+
+def add_product(product):
+    with transaction() as conn:
+        cur = conn.execute("INSERT INTO productos (product_name, quantity, price) VALUES (?, ?, ?);",
+                           (product.product_name, product.quantity, product.price))
+        row = conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM productos WHERE id = ?;", (cur.lastrowid,)).fetchone()
+    name_index.add(row[0], row[1])
+    return _row_to_product(row)
+
+def update_product_by_id(product_id, cantidad):
+    with transaction() as conn:
+        cur = conn.execute("UPDATE productos SET quantity = quantity - ? WHERE id = ? AND quantity >= ?;",
+                           (cantidad, product_id, cantidad))
+        if cur.rowcount == 0:
+            raise InsufficientStockError(f"Stock insuficiente o producto {product_id} inexistente")
+        row = conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM productos WHERE id = ?;", (product_id,)).fetchone()
+    return _row_to_product(row)
+
+def get_product_by_id(product_id: int):
+    row = _connection().execute(f"SELECT {PRODUCT_COLUMNS} FROM productos WHERE id = ?;", (product_id,)).fetchone()
+    return _row_to_product(row)
+
+def bulk_load_products(stream, fmt="csv", batch_size=DEFAULT_BATCH_SIZE):
+    def insert_batch(rows):
+        with transaction() as conn:
+            conn.executemany("INSERT INTO productos (product_name, quantity, price) VALUES (?, ?, ?);", rows)
+    report = load_in_batches(stream, fmt, batch_size, insert_batch, sqlite3.Error)
+    if report["loaded"]:
+        name_index.mark_dirty()
+    return report
+
+
+# Carrito
+def add_many_to_cart(user_id: int, items):
+    rows = [(user_id, item.product_id, item.quantity) for item in items]
+    if rows:
+        with transaction() as conn:
+            conn.executemany("INSERT INTO cart (user_id, product_id, cantidad) VALUES (?, ?, ?);", rows)
+    return {"user_id": user_id, "added": len(rows)}
+
+def add_to_cart(item):
+    add_many_to_cart(item.user_id, [item])
+    return {"item": item,}
+
+def get_cart(user_id: int):
+    items = _connection().execute("SELECT product_id, cantidad FROM cart WHERE user_id = ?;", (user_id,)).fetchall()
+    return {"user_id": user_id, "items": [{"product_id": item[0], "quantity": item[1]} for item in items]}
+
+def delete_all_cart(user_id: int):
+    with transaction() as conn:
+        conn.execute("DELETE FROM cart WHERE user_id = ?;", (user_id,))
+    return {"text": f"Carrito del usuario {user_id} ha sido eliminado"}
+
+
+# Billetera
+def _balance(conn, user_id):
+    row = conn.execute(BALANCE_SQL, (user_id,)).fetchone()
+    return row[0] if row else None
+
+def _add_entry(user_id, amount, kind):
+    with transaction() as conn:
+        conn.execute("INSERT INTO wallet_ledger (user_id, amount, kind) VALUES (?, ?, ?);", (user_id, amount, kind))
+        new_balance = _balance(conn, user_id)
+    return {"saldo": new_balance}
+
+def add_funds(amount, user_id):
+    return _add_entry(user_id, amount, "credit")
+
+def get_balance(user_id):
+    return {"saldo": _balance(_connection(), user_id)}
+
+def get_history(user_id, limit=100):
+    entries = _connection().execute(
+        "SELECT id, amount, kind, created_at FROM wallet_ledger WHERE user_id = ? ORDER BY id DESC LIMIT ?;",
+        (user_id, limit),
+    ).fetchall()
+    return {"user_id": user_id, "entries": [{"id": e[0], "amount": e[1], "kind": e[2], "created_at": e[3]} for e in entries]}
+
+def discount_wallet_by_user_id(amount, user_id):
+    return _add_entry(user_id, -amount, "debit")
+
+
+# Usuarios
+def get_user_by_id(user_id: int):
+    return _connection().execute("SELECT * FROM users WHERE id = ?;", (user_id,)).fetchone()
+
+def create_user(user):
+    with transaction() as conn:
+        cur = conn.execute("INSERT INTO users (name, email, password, saldo, monedero_ahorro) VALUES (?, ?, ?, ?, ?);",
+                           (user.name, user.email, user.password, user.saldo, user.monedero_ahorro))
+        user_id = cur.lastrowid
+        conn.execute("INSERT INTO wallet_ledger (user_id, amount, kind) VALUES (?, ?, 'opening');", (user_id, user.saldo))
+    return user_id
+
+
+# Checkout
+def checkout(user_id: int):
+    # BEGIN IMMEDIATE ya serializa a los escritores, asi que no hace falta bloquear filas.
+    with transaction() as conn:
+        saldo = _balance(conn, user_id)
+        if saldo is None:
+            raise CheckoutError(f"Usuario {user_id} no existe", status_code=404)
+
+        lines = conn.execute("""
+            SELECT p.id, p.product_name, p.price, p.quantity, l.cantidad
+            FROM productos p
+            JOIN (
+                SELECT product_id, SUM(cantidad) AS cantidad
+                FROM cart WHERE user_id = ? GROUP BY product_id
+            ) l ON l.product_id = p.id
+            ORDER BY p.id;
+        """, (user_id,)).fetchall()
+        if not lines:
+            raise CheckoutError(f"El carrito del usuario {user_id} esta vacio")
+
+        out_of_stock = [line[0] for line in lines if line[3] < line[4]]
+        if out_of_stock:
+            raise CheckoutError(f"Stock insuficiente para los productos {out_of_stock}", status_code=409)
+
+        total = sum(line[2] * line[4] for line in lines)
+        if saldo < total:
+            raise CheckoutError("Saldo insuficiente para realizar la compra", status_code=409)
+
+        conn.execute("INSERT INTO wallet_ledger (user_id, amount, kind) VALUES (?, ?, 'debit');", (user_id, -total))
+        conn.executemany("UPDATE productos SET quantity = quantity - ? WHERE id = ?;",
+                         [(line[4], line[0]) for line in lines])
+        conn.execute("DELETE FROM cart WHERE user_id = ?;", (user_id,))
+
+    return {
+        "user_id": user_id,
+        "total": total,
+        "saldo": saldo - total,
+        "items": [{"product_id": line[0], "product_name": line[1], "price": line[2], "quantity": line[4]} for line in lines],
+    }
@@ -0,0 +1,127 @@
+import psycopg2
+from database.connection import get_connection
+from database.queries import register, run
+from services.product_service import listing_cache, invalidate_products, name_index, InsufficientStockError, PRODUCT_PIN_KEYS
+from services.product_service import PRODUCT_COLUMNS, NOT_SPLIT_SQL, RESERVATION_ONLY_HINT
+from services.cart_service import add_many_to_cart, get_cart
+
+# productos esta particionada por store_id (migracion 5): todas estas consultas filtran por store_id,
+# asi Postgres poda las demas particiones y el costo depende del tamano de la tienda, no del catalogo.
+LIST_STORES = register("list_stores", "SELECT id, nombre, direccion FROM tiendas ORDER BY id;")
+INSERT_STORE = register("insert_store", "INSERT INTO tiendas (nombre, direccion) VALUES (%s, %s) RETURNING id;")
+STORE_EXISTS = register("store_exists", "SELECT 1 FROM tiendas WHERE id = %s;")
+STORE_PRODUCTS_PAGE = register("store_products_page", f"""
+    SELECT {PRODUCT_COLUMNS} FROM productos
+    WHERE store_id = %s AND id > %s ORDER BY id LIMIT %s;
+""")
+STORE_PRODUCT_BY_ID = register("store_product_by_id", f"""
+    SELECT {PRODUCT_COLUMNS} FROM productos WHERE store_id = %s AND id = %s;
+""")
+INSERT_STORE_PRODUCT = register("insert_store_product", """
+    INSERT INTO productos (store_id, product_name, quantity, price)
+    VALUES (%s, %s, %s, %s) RETURNING id, created_at;
+""")
+DECREMENT_STORE_PRODUCT = register("decrement_store_product", f"""
+    UPDATE productos SET quantity = quantity - %s
+    WHERE store_id = %s AND id = %s AND quantity >= %s AND {NOT_SPLIT_SQL}
+    RETURNING id, product_name, quantity, price, created_at;
+""")
+STORE_PRODUCT_IDS = register("store_product_ids", "SELECT id FROM productos WHERE store_id = %s AND id = ANY(%s);")
+
+
+def _row_to_product(p):
+    return {"id": p[0], "product_name": p[1], "quantity": p[2], "price": p[3], "created_at": p[4]}
+
+
+class StoreError(Exception):
+    def __init__(self, message, status_code=404):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def list_stores():
+    with get_connection(readonly=True) as conn:
+        with conn.cursor() as cur:
+            run(cur, LIST_STORES)
+            stores = cur.fetchall()
+    return [{"id": s[0], "nombre": s[1], "direccion": s[2]} for s in stores]
+
+def create_store(store):
+    # El trigger de tiendas crea la particion productos_tienda_<id> en la misma transaccion.
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            run(cur, INSERT_STORE, (store.nombre, store.direccion))
+            store_id = cur.fetchone()[0]
+    return {"id": store_id, "nombre": store.nombre, "direccion": store.direccion}
+
+def _check_store(cur, store_id):
+    run(cur, STORE_EXISTS, (store_id,))
+    if cur.fetchone() is None:
+        raise StoreError(f"Tienda {store_id} no existe")
+
+def _load_store_products_page(store_id, after_id, limit):
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            _check_store(cur, store_id)
+            run(cur, STORE_PRODUCTS_PAGE, (store_id, after_id, limit))
+            products = cur.fetchall()
+    items = [_row_to_product(p) for p in products]
+    next_cursor = items[-1]["id"] if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def list_store_products_page(store_id: int, after_id: int = 0, limit: int = 100):
+    return listing_cache.get_or_load(("store", store_id, after_id, limit),
+                                     lambda: _load_store_products_page(store_id, after_id, limit))
+
+def get_store_product(store_id: int, product_id: int):
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, STORE_PRODUCT_BY_ID, (store_id, product_id))
+            product = cur.fetchone()
+    if product is None:
+        raise StoreError(f"Producto {product_id} no existe en la tienda {store_id}")
+    return _row_to_product(product)
+
+def add_store_product(store_id: int, product):
+    try:
+        with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+            with conn.cursor() as cur:
+                run(cur, INSERT_STORE_PRODUCT, (store_id, product.product_name, product.quantity, product.price))
+                product_id, created_at = cur.fetchone()
+    except psycopg2.errors.ForeignKeyViolation:
+        raise StoreError(f"Tienda {store_id} no existe")
+    invalidate_products()
+    name_index.add(product_id, product.product_name)
+    return {"id": product_id, "product_name": product.product_name, "quantity": product.quantity, "price": product.price, "created_at": created_at}
+
+def update_store_product(store_id: int, product_id: int, cantidad: int):
+    with get_connection(pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, DECREMENT_STORE_PRODUCT, (cantidad, store_id, product_id, cantidad))
+            product = cur.fetchone()
+    if product is None:
+        raise InsufficientStockError(f"Stock insuficiente o producto {product_id} inexistente en la tienda {store_id} "
+                                     f"(si tiene sub-contadores, {RESERVATION_ONLY_HINT})")
+    invalidate_products([product_id])
+    return _row_to_product(product)
+
+def _store_product_ids(store_id, product_ids):
+    if not product_ids:
+        return set()
+    with get_connection(readonly=True, pin_keys=PRODUCT_PIN_KEYS) as conn:
+        with conn.cursor() as cur:
+            run(cur, STORE_PRODUCT_IDS, (store_id, list(product_ids)))
+            return {row[0] for row in cur.fetchall()}
+
+def add_to_store_cart(store_id: int, user_id: int, items):
+    # Se valida contra la particion de la tienda; el trigger de cart completa store_id al escribir.
+    requested = {item.product_id for item in items}
+    missing = requested - _store_product_ids(store_id, requested)
+    if missing:
+        raise StoreError(f"Los productos {sorted(missing)} no existen en la tienda {store_id}")
+    return {**add_many_to_cart(user_id, items), "store_id": store_id}
+
+def get_store_cart(store_id: int, user_id: int):
+    cart = get_cart(user_id)
+    in_store = _store_product_ids(store_id, {item["product_id"] for item in cart["items"]})
+    return {"user_id": user_id, "store_id": store_id, "items": [item for item in cart["items"] if item["product_id"] in in_store]}
@@ -0,0 +1,164 @@
+import re
+import time
+import heapq
+import bisect
+import threading
+import unicodedata
+from collections import Counter
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Similitud que se le da a una palabra del vocabulario que empieza con la palabra buscada ("parac").
+PREFIX_SIMILARITY = 0.9
+MAX_QUERY_WORDS = 6
+
+
+def normalize(text):
+    # Minusculas y sin tildes: "Jabón" y "jabon" deben dar los mismos trigramas.
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def words(text):
+    return _WORD_RE.findall(normalize(text))
+
+
+def trigrams(word):
+    """Trigrams of one word, padded like pg_trgm ("  w", " wo", "wor", "ord", "rd ")."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """In-process typo-tolerant name search: trigrams over the word vocabulary, then word -> ids.
+
+    Each query word is matched against the vocabulary with pg_trgm's similarity
+    (shared / (a + b - shared)) plus prefix matches. Items are scored by the mean similarity of
+    their best word for each query word. Posting sets are visited rarest word first and the scan
+    stops once no unseen item can beat the current top `limit` (or after max_scan items).
+    """
+
+    def __init__(self, min_similarity=0.3, expansions=5, max_scan=5000, refresh_interval=5.0):
+        self.min_similarity = min_similarity
+        self.expansions = expansions
+        self.max_scan = max_scan
+        self.refresh_interval = refresh_interval
+        self._names = {}
+        self._postings = {}      # palabra -> set de ids
+        self._word_grams = {}    # trigrama -> palabras del vocabulario
+        self._gram_counts = {}   # palabra -> cantidad de trigramas
+        self._vocabulary = []    # ordenado, para buscar prefijos con bisect
+        self._expansions = {}    # palabra buscada -> _expand(); se vacia cuando el vocabulario crece
+        self._high_water = 0
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._refreshed_at = 0.0
+
+    def add(self, item_id, name):
+        with self._lock:
+            if item_id in self._names:
+                return
+            self._names[item_id] = name
+            for word in set(words(name)):
+                ids = self._postings.get(word)
+                if ids is None:
+                    ids = self._postings[word] = set()
+                    grams = trigrams(word)
+                    self._gram_counts[word] = len(grams)
+                    for gram in grams:
+                        self._word_grams.setdefault(gram, []).append(word)
+                    bisect.insort(self._vocabulary, word)
+                    self._expansions.clear()
+                ids.add(item_id)
+            self._high_water = max(self._high_water, item_id)
+
+    @property
+    def high_water(self):
+        """Largest indexed id; a refresh only needs rows above it."""
+        return self._high_water
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def needs_refresh(self):
+        return self._dirty or time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    def mark_refreshed(self):
+        self._dirty = False
+        self._refreshed_at = time.monotonic()
+
+    def _expand(self, word):
+        # Palabras del vocabulario parecidas a word: [(similitud, palabra)], mejores primero.
+        cached = self._expansions.get(word)
+        if cached is not None:
+            return cached
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._word_grams.get(gram, ()))
+        similar = {w: count / (len(grams) + self._gram_counts[w] - count) for w, count in shared.items()}
+        i = bisect.bisect_left(self._vocabulary, word)
+        for w in self._vocabulary[i:i + self.expansions * 4]:
+            if not w.startswith(word):
+                break
+            similar[w] = max(similar.get(w, 0.0), 1.0 if w == word else PREFIX_SIMILARITY)
+        best = heapq.nlargest(self.expansions, ((s, w) for w, s in similar.items() if s >= self.min_similarity))
+        if len(self._expansions) >= 10000:
+            self._expansions.clear()
+        self._expansions[word] = best
+        return best
+
+    def _score(self, item_id, options):
+        # Media, sobre las palabras buscadas, de la mejor palabra del item que coincide con cada una.
+        total = 0.0
+        for expansions in options:
+            for similarity, word in expansions:
+                if item_id in self._postings[word]:
+                    total += similarity
+                    break
+        return total / len(options)
+
+    def search(self, query, limit=10):
+        """Return up to limit (id, name, score) tuples, best match first."""
+        query_words = list(dict.fromkeys(words(query)))[:MAX_QUERY_WORDS]
+        if not query_words or limit <= 0:
+            return []
+        top, scored, scanned = [], set(), 0
+        with self._lock:
+            options = [self._expand(word) for word in query_words]
+            best = [expansions[0][0] if expansions else 0.0 for expansions in options]
+            # Palabras buscadas de la menos a la mas frecuente; cada item visto se puntua exacto.
+            order = sorted((i for i, expansions in enumerate(options) if expansions),
+                           key=lambda i: sum(len(self._postings[w]) for _, w in options[i]))
+            pending = set(order)
+            for i in order:
+                pending.discard(i)
+                rest = sum(best[j] for j in pending)
+                for similarity, word in options[i]:
+                    # Ningun item no visto que contenga word puede superar esta cota.
+                    bound = (similarity + rest) / len(options)
+                    if bound < self.min_similarity or (len(top) >= limit and top[0][0] >= bound):
+                        break
+                    for item_id in self._postings[word]:
+                        if item_id in scored:
+                            continue
+                        scored.add(item_id)
+                        scanned += 1
+                        entry = (self._score(item_id, options), item_id)
+                        if len(top) < limit:
+                            heapq.heappush(top, entry)
+                        elif entry > top[0]:
+                            heapq.heapreplace(top, entry)
+                        if scanned >= self.max_scan or (len(top) >= limit and top[0][0] >= bound):
+                            break
+                    if scanned >= self.max_scan:
+                        break
+                if scanned >= self.max_scan or (len(top) >= limit and top[0][0] >= rest / len(options)):
+                    break
+            hits = [(score, item_id, self._names[item_id]) for score, item_id in top if score >= self.min_similarity]
+        hits.sort(key=lambda h: (-h[0], len(h[2]), h[1]))
+        return [(item_id, name, round(score, 4)) for score, item_id, name in hits]
+
+    def stats(self):
+        with self._lock:
+            return {"items": len(self._names), "words": len(self._postings), "trigrams": len(self._word_grams),
+                    "high_water": self._high_water}
@@ -1,15 +1,21 @@
-from database.connection import get_connection
+from database.connection import get_connection, user_key
+from database.queries import register, run
+
+USER_BY_ID = register("user_by_id", "SELECT * FROM users WHERE id = %s")
+INSERT_USER = register("insert_user", "INSERT INTO users (name, email, password, saldo, monedero_ahorro) VALUES (%s, %s, %s, %s, %s) RETURNING id")
+INSERT_OPENING_ENTRY = register("insert_opening_entry", "INSERT INTO wallet_ledger (user_id, amount, kind) VALUES (%s, %s, 'opening');")
 
 def get_user_by_id(user_id: int):
-    connection = get_connection()
-    with connection.cursor() as cursor:
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        result = cursor.fetchone()
+    with get_connection(readonly=True, pin_keys=(user_key(user_id),)) as connection:
+        with connection.cursor() as cursor:
+            run(cursor, USER_BY_ID, (user_id,))
+            result = cursor.fetchone()
     return result
 
 def create_user(user):
-    connection = get_connection()
-    with connection.cursor() as cursor:
-        cursor.execute("INSERT INTO users (name, email, password, saldo, monedero_ahorro) VALUES (%s, %s, %s, %s, %s)", (user.name, user.email, user.password, user.saldo, user.monedero_ahorro))
-        connection.commit()
-    return cursor.lastrowid
\ No newline at end of file
+    with get_connection() as connection:
+        with connection.cursor() as cursor:
+            run(cursor, INSERT_USER, (user.name, user.email, user.password, user.saldo, user.monedero_ahorro))
+            user_id = cursor.fetchone()[0]
+            run(cursor, INSERT_OPENING_ENTRY, (user_id, user.saldo))
+    return user_id
@@ -1,43 +1,145 @@
-from database.connection import get_connection
+import os
+import logging
+import psycopg2
+from database.connection import get_connection, user_key
+from database.queries import register, run, prepare
+from services.group_commit import GroupCommitter
 
-def add_funds(amount, user_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(f"""
-        UPDATE users
-        SET saldo = saldo + %s
-        WHERE id = {user_id} RETURNING saldo;
-    """, (amount,))
-    new_balance = cur.fetchone()[0]
-    conn.commit()
-    cur.close()
-    conn.close()
+logger = logging.getLogger("lab1.wallet")
+
+# El saldo se calcula como snapshot + movimientos posteriores del libro (wallet_ledger).
+# Escribir es un INSERT con un advisory lock compartido por usuario, asi que los movimientos no
+# compiten entre si; el lock exclusivo solo lo toman el snapshot y el checkout.
+WALLET_LOCK_CLASS = 1
+SNAPSHOT_EVERY = int(os.getenv("WALLET_SNAPSHOT_EVERY", "50"))
+
+BALANCE_SQL = """
+    SELECT COALESCE(s.balance, 0) + COALESCE(t.total, 0), COALESCE(t.entries, 0)
+    FROM users u
+    LEFT JOIN wallet_snapshots s ON s.user_id = u.id
+    LEFT JOIN LATERAL (
+        SELECT SUM(l.amount) AS total, COUNT(*) AS entries
+        FROM wallet_ledger l
+        WHERE l.user_id = u.id AND l.id > COALESCE(s.last_entry_id, 0)
+    ) t ON TRUE
+    WHERE u.id = %s;
+"""
+
+SNAPSHOT_SQL = """
+    INSERT INTO wallet_snapshots (user_id, balance, last_entry_id, taken_at)
+    SELECT u.id, COALESCE(s.balance, 0) + t.total, t.last_id, CURRENT_TIMESTAMP
+    FROM users u
+    LEFT JOIN wallet_snapshots s ON s.user_id = u.id
+    JOIN LATERAL (
+        SELECT SUM(l.amount) AS total, MAX(l.id) AS last_id
+        FROM wallet_ledger l
+        WHERE l.user_id = u.id AND l.id > COALESCE(s.last_entry_id, 0)
+    ) t ON t.last_id IS NOT NULL
+    WHERE u.id = %s
+    ON CONFLICT (user_id) DO UPDATE
+    SET balance = EXCLUDED.balance, last_entry_id = EXCLUDED.last_entry_id, taken_at = EXCLUDED.taken_at;
+"""
+
+WALLET_BALANCE = register("wallet_balance", BALANCE_SQL)
+WALLET_SNAPSHOT = register("wallet_snapshot", SNAPSHOT_SQL)
+WALLET_LOCK = register("wallet_lock", "SELECT pg_advisory_xact_lock(%s::int, %s::int);")
+WALLET_LOCK_SHARED = register("wallet_lock_shared", "SELECT pg_advisory_xact_lock_shared(%s::int, %s::int);")
+INSERT_WALLET_ENTRY = register("insert_wallet_entry", "INSERT INTO wallet_ledger (user_id, amount, kind) VALUES (%s, %s, %s);")
+WALLET_HISTORY = register("wallet_history", """
+    SELECT id, amount, kind, created_at FROM wallet_ledger
+    WHERE user_id = %s ORDER BY id DESC LIMIT %s;
+""")
+
+def balance_for_update(cur, user_id):
+    """Lock the user's wallet against concurrent entries and return its balance (None if no user)."""
+    run(cur, WALLET_LOCK, (WALLET_LOCK_CLASS, user_id))
+    run(cur, WALLET_BALANCE, (user_id,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def append_entry(cur, user_id, amount, kind):
+    run(cur, WALLET_LOCK_SHARED, (WALLET_LOCK_CLASS, user_id))
+    run(cur, INSERT_WALLET_ENTRY, (user_id, amount, kind))
+
+def refresh_snapshot(user_id):
+    # Con el lock exclusivo no hay movimientos en vuelo: todo id <= last_entry_id ya esta confirmado.
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            run(cur, WALLET_LOCK, (WALLET_LOCK_CLASS, user_id))
+            run(cur, WALLET_SNAPSHOT, (user_id,))
+
+def _add_entry(user_id, amount, kind):
+    with get_connection(pin_keys=(user_key(user_id),)) as conn:
+        with conn.cursor() as cur:
+            append_entry(cur, user_id, amount, kind)
+            run(cur, WALLET_BALANCE, (user_id,))
+            new_balance, entries = cur.fetchone()
+    if entries >= SNAPSHOT_EVERY:
+        refresh_snapshot(user_id)
     return {"saldo": new_balance}
 
+def _apply_top_ups(top_ups):
+    # Un solo COMMIT para todo el lote; cada recarga va en su SAVEPOINT, asi una que falla
+    # (usuario inexistente, monto invalido) se deshace sola y las demas se confirman igual.
+    outcomes = [None] * len(top_ups)
+    entries_by_user = {}
+    with get_connection(pin_keys=tuple({user_key(user_id) for user_id, _ in top_ups})) as conn:
+        with conn.cursor() as cur:
+            # PREPARE antes del primer SAVEPOINT: un ROLLBACK TO lo descartaria.
+            for name in (WALLET_LOCK_SHARED, INSERT_WALLET_ENTRY, WALLET_BALANCE):
+                prepare(cur, name)
+            # Por usuario en orden de id, para que dos lotes tomen los advisory locks en el mismo orden.
+            for i in sorted(range(len(top_ups)), key=lambda i: top_ups[i][0]):
+                user_id, amount = top_ups[i]
+                cur.execute("SAVEPOINT top_up;")
+                try:
+                    append_entry(cur, user_id, amount, "credit")
+                    run(cur, WALLET_BALANCE, (user_id,))
+                    new_balance, entries = cur.fetchone()
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT top_up;")
+                    outcomes[i] = (None, e)
+                else:
+                    cur.execute("RELEASE SAVEPOINT top_up;")
+                    outcomes[i] = ({"saldo": new_balance}, None)
+                    entries_by_user[user_id] = entries
+    # Las recargas ya estan confirmadas: un snapshot fallido no debe devolver error a nadie.
+    for user_id, entries in entries_by_user.items():
+        if entries >= SNAPSHOT_EVERY:
+            try:
+                refresh_snapshot(user_id)
+            except psycopg2.Error:
+                logger.exception("No se pudo actualizar el snapshot de la billetera %s", user_id)
+    return outcomes
+
+# Group commit de recargas: las que llegan dentro de WALLET_GROUP_COMMIT_MS milisegundos comparten
+# una transaccion (un solo COMMIT/fsync) y cada llamada recibe su propio saldo. 0 lo desactiva.
+top_up_committer = GroupCommitter(
+    _apply_top_ups,
+    window=float(os.getenv("WALLET_GROUP_COMMIT_MS", "0")) / 1000,
+    max_batch=int(os.getenv("WALLET_GROUP_COMMIT_MAX", "256")),
+)
+
+def add_funds(amount, user_id):
+    if top_up_committer.enabled:
+        return top_up_committer.submit((user_id, amount))
+    return _add_entry(user_id, amount, "credit")
+
 def get_balance(user_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(f"SELECT saldo FROM users WHERE id = {user_id};")
-        balance = cur.fetchone()[0]
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection(readonly=True, pin_keys=(user_key(user_id),)) as conn:
+        with conn.cursor() as cur:
+            run(cur, WALLET_BALANCE, (user_id,))
+            balance, entries = cur.fetchone()
+    if entries >= SNAPSHOT_EVERY:
+        refresh_snapshot(user_id)
     return {"saldo": balance}
 
+def get_history(user_id, limit=100):
+    with get_connection(readonly=True, pin_keys=(user_key(user_id),)) as conn:
+        with conn.cursor() as cur:
+            run(cur, WALLET_HISTORY, (user_id, limit))
+            entries = cur.fetchall()
+    return {"user_id": user_id, "entries": [{"id": e[0], "amount": e[1], "kind": e[2], "created_at": e[3]} for e in entries]}
+
 def discount_wallet_by_user_id(amount, user_id):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE users
-        SET saldo = saldo - %s
-        WHERE id = %s RETURNING saldo;
-    """, (amount, user_id))
-    new_balance = cur.fetchone()[0]
-    conn.commit()
-    cur.close()
-    conn.close()
-    return {"saldo": new_balance}
\ No newline at end of file
+    return _add_entry(user_id, -amount, "debit")
@@ -0,0 +1,132 @@
+import pytest
+
+from services.cart_buffer import CartBuffer
+
+
+class FakeCartTable:
+    """Stand-in for the cart table: records each flushed batch and can fail lines or whole flushes."""
+
+    def __init__(self):
+        self.rows = {}      # user_id -> {product_id: cantidad}
+        self.batches = []   # cada batch que recibio flush_rows
+        self.bad_products = set()
+        self.fail_next = None
+
+    def flush_rows(self, batch):
+        self.batches.append(batch)
+        if self.fail_next is not None:
+            hook, self.fail_next = self.fail_next, None
+            hook()
+        failed = []
+        for user_id, lines in batch.items():
+            for product_id, quantity in lines:
+                if product_id in self.bad_products:
+                    failed.append((user_id, product_id, quantity, "producto inexistente"))
+                    continue
+                cart = self.rows.setdefault(user_id, {})
+                cart[product_id] = cart.get(product_id, 0) + quantity
+        return failed
+
+    def load_rows(self, user_id):
+        return dict(self.rows.get(user_id, {}))
+
+
+# --- Fixtures ---
+
+@pytest.fixture()
+def table():
+    return FakeCartTable()
+
+@pytest.fixture()
+def buffer(table):
+    """Buffer whose flusher thread never wakes on its own: every flush in a test is explicit."""
+    buffer = CartBuffer(table.flush_rows, table.load_rows, interval=3600, max_pending=10**6)
+    yield buffer
+    table.fail_next = None
+    buffer.close()
+
+def quantities(view):
+    return {line["product_id"]: line["quantity"] for line in view}
+
+# --- Test Functions ---
+
+def test_repeated_adds_coalesce(buffer, table):
+    """Adding the same product several times leaves one pending line, written once with the sum."""
+    table.rows[1] = {10: 1}
+    buffer.add(1, [(10, 2)])
+    buffer.add(1, [(10, 3), (11, 1)])
+    buffer.add(1, [(10, 1)])
+    stats = buffer.stats()
+    assert stats["adds"] == 4 and stats["pending_lines"] == 2
+    # La lectura suma lo persistido y lo pendiente
+    assert quantities(buffer.get(1)) == {10: 7, 11: 1}
+
+    assert buffer.flush() == 2
+    assert table.batches == [{1: [(10, 6), (11, 1)]}]
+    assert table.rows[1] == {10: 7, 11: 1}
+    assert buffer.stats()["pending_lines"] == 0
+    # Servido desde memoria, sin volver a leer la tabla
+    assert quantities(buffer.get(1)) == {10: 7, 11: 1}
+    assert buffer.stats()["loads"] == 1
+    assert buffer.flush() == 0
+
+def test_failed_flush_requeues_lines(buffer, table):
+    """A flush whose transaction fails puts its lines back as pending, merged with lines added meanwhile."""
+    buffer.add(1, [(10, 2)])
+    buffer.add(2, [(20, 1)])
+
+    def fail():
+        # Llega otra linea del mismo producto mientras el flush esta en curso
+        buffer.add(1, [(10, 5)])
+        raise ConnectionError("sin conexion")
+
+    table.fail_next = fail
+    with pytest.raises(ConnectionError):
+        buffer.flush()
+    stats = buffer.stats()
+    assert stats["failed_flushes"] == 1 and stats["flushes"] == 0
+    assert stats["pending_lines"] == 2
+    assert table.rows == {}
+
+    assert buffer.flush() == 2
+    assert table.batches[-1] == {1: [(10, 7)], 2: [(20, 1)]}
+    assert table.rows == {1: {10: 7}, 2: {20: 1}}
+    assert buffer.stats()["pending_lines"] == 0
+
+def test_failed_lines_are_dropped(buffer, table):
+    """Lines the table rejects one by one are reported and dropped; the rest of the batch is written."""
+    table.bad_products.add(99)
+    buffer.add(1, [(10, 1), (99, 1)])
+    assert buffer.flush() == 1
+    stats = buffer.stats()
+    assert stats["dropped_lines"] == 1 and stats["pending_lines"] == 0
+    assert stats["last_dropped"] == [{"user_id": 1, "product_id": 99, "quantity": 1, "error": "producto inexistente"}]
+    assert table.rows == {1: {10: 1}}
+
+def test_checkout_excludes_background_flush(buffer, table):
+    """During a checkout the flusher skips that user; its lines added meanwhile are written after the block."""
+    buffer.add(1, [(10, 2)])
+    with buffer.checkout(1):
+        # El checkout escribio lo que habia antes de empezar
+        assert table.batches == [{1: [(10, 2)]}]
+        buffer.add(1, [(11, 1)])
+        buffer.add(2, [(20, 1)])
+        # flush() sin usuario es el del hilo de fondo: solo toma al usuario 2
+        assert buffer.flush() == 1
+        assert table.batches[-1] == {2: [(20, 1)]}
+        assert buffer.stats()["pending_lines"] == 1
+        table.rows.pop(1)  # el checkout vacia el carrito en la tabla
+    assert quantities(buffer.get(1)) == {11: 1}
+
+    assert buffer.flush() == 1
+    assert table.batches[-1] == {1: [(11, 1)]}
+    assert table.rows[1] == {11: 1}
+
+def test_checkout_failure_releases_the_user(buffer, table):
+    """A checkout that raises lets the background flusher take the user's lines again."""
+    with pytest.raises(RuntimeError):
+        with buffer.checkout(1):
+            buffer.add(1, [(10, 1)])
+            raise RuntimeError("saldo insuficiente")
+    assert buffer.flush() == 1
+    assert table.rows == {1: {10: 1}}
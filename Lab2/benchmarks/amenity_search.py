@@ -0,0 +1,119 @@
+"""Amenity search over a synthetic fleet: inverted index vs. the per-spot scan it replaced.
+
+    python -m benchmarks.amenity_search
+    python -m benchmarks.amenity_search --spots 500000 --amenities 30 --queries 50
+
+Amenity popularity is skewed (the first types are common, the last rare), like real listings.
+Queries ask for 1-4 amenities, half of them also filtered by district and price range. Both
+methods run the same queries, so their latencies are comparable.
+"""
+import sys
+import math
+import time
+import random
+import argparse
+
+import database
+from models import Cochera, CocheraStatus
+
+DISTRICTS = ["Chorrillos", "Miraflores", "Surco", "Barranco", "San Isidro", "San Borja", "Lince", "Jesus Maria",
+             "Magdalena", "Pueblo Libre", "La Molina", "San Miguel"]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def build_fleet(n_spots, amenity_types, rng):
+    database.init_sample_data()
+    # Popularidad decreciente: la primera amenidad la tiene ~60% de las cocheras, la ultima ~2%
+    weights = [0.6 * (0.02 / 0.6) ** (k / max(len(amenity_types) - 1, 1)) for k in range(len(amenity_types))]
+    statuses = list(CocheraStatus)
+    for i in range(n_spots):
+        database.add_cochera(Cochera(
+            id=f"bench-{i}",
+            location=rng.choice(DISTRICTS),
+            price=round(rng.uniform(2, 30), 1),
+            status=statuses[0] if rng.random() < 0.7 else rng.choice(statuses),
+            size=rng.choice(["Standard", "Compact", "Large"]),
+            amenities=[a for a, w in zip(amenity_types, weights) if rng.random() < w]
+        ))
+
+
+def scan_search(district, min_price, max_price, amenities):
+    # El recorrido que hacia search_cocheras antes del indice
+    result = []
+    for c_id, data in database.cocheras_db.items():
+        if data.status != CocheraStatus.available:
+            continue
+        if district and district.lower() not in data.location.lower():
+            continue
+        if min_price is not None and data.price < min_price:
+            continue
+        if max_price is not None and data.price > max_price:
+            continue
+        if amenities and not all(amenity in data.amenities for amenity in amenities):
+            continue
+        result.append(c_id)
+    return result
+
+
+def index_search(district, min_price, max_price, amenities):
+    return database.cochera_index.query(status=CocheraStatus.available, location=district,
+                                        min_price=min_price, max_price=max_price, amenities=amenities)
+
+
+def make_queries(n, amenity_types, rng):
+    queries = []
+    for _ in range(n):
+        amenities = rng.sample(amenity_types, rng.randint(1, 4))
+        if rng.random() < 0.5:
+            low = rng.uniform(2, 20)
+            queries.append((rng.choice(DISTRICTS), low, low + rng.uniform(2, 10), amenities))
+        else:
+            queries.append((None, None, None, amenities))
+    return queries
+
+
+def measure(search, queries):
+    latencies, results = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        results += len(search(*query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return percentile(latencies, 50), percentile(latencies, 99), results / len(queries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busqueda por amenidades: indice invertido vs recorrido.")
+    parser.add_argument("--spots", type=int, default=500000)
+    parser.add_argument("--amenities", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=20, help="Consultas medidas con cada metodo (el recorrido es lento)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    amenity_types = [f"amenidad-{k}" for k in range(args.amenities)]
+    start = time.perf_counter()
+    build_fleet(args.spots, amenity_types, rng)
+    print(f"{len(database.cocheras_db)} cocheras, {args.amenities} amenidades, "
+          f"cargadas en {time.perf_counter() - start:.1f}s")
+
+    queries = make_queries(args.queries, amenity_types, rng)
+    for query in queries:
+        assert index_search(*query) == scan_search(*query), query
+
+    print(f"{'metodo':<10}{'p50 ms':>10}{'p99 ms':>10}{'resultados':>12}")
+    # Las mismas consultas para los dos metodos
+    for name, search in (("indice", index_search), ("recorrido", scan_search)):
+        p50, p99, avg = measure(search, queries)
+        print(f"{name:<10}{p50:>10.3f}{p99:>10.3f}{avg:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Window availability and occupancy per distrito: the occupancy matrix vs. a loop over cocheras and reservas.
+
+    python -m benchmarks.availability
+    python -m benchmarks.availability --spots 100000 --reservations 4 --queries 50
+
+The matrix covers a week of OCCUPANCY_SLOT_MINUTES slots from today at 00:00. Reservations last
+1 to 16 slots at random slot-aligned times of that week; queries ask for 1 to 6 hour windows,
+half of them in one distrito. Both methods run the same queries.
+"""
+import sys
+import math
+import time
+import random
+import argparse
+from datetime import timedelta
+
+import database
+from models import Cochera, CocheraStatus, Reserva, ReservationStatus, PaymentStatus
+
+DISTRICTS = ["Chorrillos", "Miraflores", "Surco", "Barranco", "San Isidro", "San Borja", "Lince", "Jesus Maria",
+             "Magdalena", "Pueblo Libre", "La Molina", "San Miguel"]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def build_fleet(n_spots, reservations_per_spot, rng):
+    database.init_sample_data()
+    for i in range(n_spots):
+        database.add_cochera(Cochera(
+            id=f"bench-{i}",
+            location=rng.choice(DISTRICTS),
+            price=round(rng.uniform(2, 30), 1),
+            status=CocheraStatus.maintenance if rng.random() < 0.05 else CocheraStatus.available,
+            size="Standard"
+        ))
+    occupancy = database.occupancy
+    # Las cocheras en mantenimiento no aceptan reservas (como en POST /reservas/)
+    rentable = [c_id for c_id in database.cocheras_db if c_id.startswith("bench-")
+                and database.cocheras_db[c_id].status != CocheraStatus.maintenance]
+    for i in range(int(n_spots * reservations_per_spot)):
+        # Alineadas a los slots, para que el recorrido exacto y la matriz den lo mismo
+        start = occupancy.origin + occupancy.slot * rng.randrange(occupancy.n_slots - 16)
+        database.book_reservation(Reserva(
+            id=f"bench-reserva-{i}",
+            cochera_id=rng.choice(rentable),
+            user_id="bench",
+            start_time=start,
+            end_time=start + occupancy.slot * rng.randint(1, 16),
+            status=ReservationStatus.active,
+            payment_status=PaymentStatus.pending
+        ))
+
+
+def make_windows(n, rng):
+    occupancy = database.occupancy
+    windows = []
+    for _ in range(n):
+        start = occupancy.origin + occupancy.slot * rng.randrange(occupancy.n_slots - 24)
+        end = start + timedelta(hours=rng.randint(1, 6))
+        windows.append((start, end, rng.choice(DISTRICTS) if rng.random() < 0.5 else None))
+    return windows
+
+
+# El recorrido: una pasada por las reservas y otra por las cocheras
+def scan_available(start, end, location):
+    busy = {r.cochera_id for r in database.reservas_db.values()
+            if r.status == ReservationStatus.active and r.start_time < end and start < r.end_time}
+    return [c_id for c_id, c in database.cocheras_db.items()
+            if c.status != CocheraStatus.maintenance and c_id not in busy
+            and (not location or location.lower() in c.location.lower())]
+
+
+def scan_occupancy(start, end):
+    busy_minutes, spots = {}, {}
+    for c in database.cocheras_db.values():
+        if c.status != CocheraStatus.maintenance:
+            spots[c.location] = spots.get(c.location, 0) + 1
+    for r in database.reservas_db.values():
+        c = database.cocheras_db[r.cochera_id]
+        if r.status != ReservationStatus.active or c.status == CocheraStatus.maintenance:
+            continue
+        overlap = (min(end, r.end_time) - max(start, r.start_time)).total_seconds() / 60
+        if overlap > 0:
+            busy_minutes[c.location] = busy_minutes.get(c.location, 0) + overlap
+    window = (end - start).total_seconds() / 60
+    return {location: busy_minutes.get(location, 0) / (n * window) for location, n in spots.items()}
+
+
+def matrix_available(start, end, location):
+    return database.occupancy.available(start, end, location)
+
+
+def matrix_occupancy(start, end):
+    return database.occupancy.occupancy_by_location(start, end)
+
+
+def measure(search, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(*query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return percentile(latencies, 50), percentile(latencies, 99)
+
+
+def check(windows):
+    for start, end, location in windows:
+        # Solo las cocheras del benchmark: la reserva de ejemplo no esta alineada a los slots
+        expected = [c_id for c_id in scan_available(start, end, location) if c_id.startswith("bench-")]
+        assert [c_id for c_id in matrix_available(start, end, location) if c_id.startswith("bench-")] == expected
+        rates = matrix_occupancy(start, end)
+        for location_name, rate in scan_occupancy(start, end).items():
+            assert abs(rates[location_name]["occupancy"] - rate) < 1e-3, (location_name, rate)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Disponibilidad por ventana: matriz de ocupacion vs recorrido.")
+    parser.add_argument("--spots", type=int, default=100000)
+    parser.add_argument("--reservations", type=float, default=4, help="Reservas por cochera en la semana")
+    parser.add_argument("--queries", type=int, default=20, help="Consultas medidas con cada metodo (el recorrido es lento)")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    build_fleet(args.spots, args.reservations, rng)
+    print(f"{args.spots} cocheras, {len(database.reservas_db)} reservas, cargadas en "
+          f"{time.perf_counter() - start:.1f}s; matriz: {database.occupancy.stats()}")
+
+    windows = make_windows(args.queries, rng)
+    check(windows)
+
+    reports = [(start, end) for start, end, _ in windows]
+    print(f"{'consulta':<14}{'metodo':<11}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, matrix, scan, queries in (("disponibles", matrix_available, scan_available, windows),
+                                         ("ocupacion", matrix_occupancy, scan_occupancy, reports)):
+        # Las mismas consultas para los dos metodos
+        for name, search in (("matriz", matrix), ("recorrido", scan)):
+            p50, p99 = measure(search, queries)
+            print(f"{label:<14}{name:<11}{p50:>10.3f}{p99:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
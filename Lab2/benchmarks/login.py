@@ -0,0 +1,89 @@
+"""Login latency vs. number of users, with the username index and with the old linear scan.
+
+    python -m benchmarks.login
+    python -m benchmarks.login --sizes 100 10000 1000000 --lookups 20000
+
+"login" is get_user_by_username + verify_password (the work /api/auth/login does). Every
+user shares one low-cost bcrypt hash so the table fills quickly and the hash cost stays
+constant; what changes with the table size is only the lookup.
+"""
+import sys
+import math
+import time
+import random
+import argparse
+import datetime
+
+import bcrypt  # type: ignore
+
+import database
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def linear_lookup(username):
+    # La busqueda que habia antes del indice: recorre users_db entero.
+    for user_id, user_data in database.users_db.items():
+        if user_data["username"] == username:
+            return {"user_id": user_id, **user_data}
+    return None
+
+
+def fill_users(n, password_hash):
+    database.users_db.clear()
+    database.users_by_username.clear()
+    now = datetime.datetime.now()
+    for i in range(n):
+        database.add_user(f"user-{i}", {"username": f"user{i}", "password": password_hash, "role": "client",
+                                        "email": f"user{i}@example.com", "created_at": now})
+
+
+def measure(lookup, usernames, verify=None):
+    latencies = []
+    for username in usernames:
+        start = time.perf_counter()
+        user = lookup(username)
+        if verify is not None:
+            verify(user)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return round(percentile(latencies, 50), 1), round(percentile(latencies, 99), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latencia de login segun la cantidad de usuarios.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=10000, help="Busquedas medidas por tamano")
+    parser.add_argument("--logins", type=int, default=200, help="Logins completos (con bcrypt) por tamano")
+    parser.add_argument("--scan-max", type=int, default=100000, help="Mayor tamano en que se mide el recorrido lineal")
+    args = parser.parse_args(argv)
+
+    password = "secret123"
+    password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+    def verify(user):
+        assert user is not None and database.verify_password(password, user["password"])
+
+    print(f"{'usuarios':>10}{'indice p50 us':>15}{'indice p99 us':>15}{'login p50 us':>14}{'login p99 us':>14}"
+          f"{'lineal p50 us':>15}")
+    for n in args.sizes:
+        fill_users(n, password_hash)
+        rng = random.Random(n)
+        usernames = [f"user{rng.randrange(n)}" for _ in range(args.lookups)]
+        index_p50, index_p99 = measure(database.get_user_by_username, usernames)
+        login_p50, login_p99 = measure(database.get_user_by_username, usernames[:args.logins], verify)
+        if n <= args.scan_max:
+            linear_p50, _ = measure(linear_lookup, usernames[:max(args.lookups * 100 // n, 20)])
+        else:
+            linear_p50 = "-"
+        print(f"{n:>10}{index_p50:>15}{index_p99:>15}{login_p50:>14}{login_p99:>14}{linear_p50:>15}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
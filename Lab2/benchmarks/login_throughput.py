@@ -0,0 +1,62 @@
+"""Concurrent login throughput: bcrypt inline on the event loop vs. the hashing process pool.
+
+    python -m benchmarks.login_throughput
+    python -m benchmarks.login_throughput --rounds 12 --logins 64 --workers 1 2 4 8
+
+Each run fires --logins password checks at once through asyncio.gather, the way concurrent
+/api/auth/login requests reach the async handler, and reports logins per second.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+from hashing import PasswordHasher, hash_password_sync, verify_password_sync
+
+
+async def inline_logins(password, hashed, n):
+    async def one():
+        return verify_password_sync(password, hashed)
+    return await asyncio.gather(*(one() for _ in range(n)))
+
+
+async def pool_logins(hasher, password, hashed, n):
+    return await asyncio.gather(*(hasher.verify(password, hashed) for _ in range(n)))
+
+
+def timed(coro_factory):
+    start = time.perf_counter()
+    results = asyncio.run(coro_factory())
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Logins por segundo con bcrypt en linea o en el pool de procesos.")
+    parser.add_argument("--rounds", type=int, default=10, help="Factor de costo de bcrypt")
+    parser.add_argument("--logins", type=int, default=32, help="Logins simultaneos por corrida")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Tamanos de pool a medir")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, 2, max(cores // 2, 1), cores})
+    password = "secret123"
+    hashed = hash_password_sync(password, args.rounds)
+
+    print(f"cores={cores} rounds={args.rounds} logins={args.logins}")
+    print(f"{'modo':<16}{'segundos':>10}{'logins/s':>10}")
+    elapsed = timed(lambda: inline_logins(password, hashed, args.logins))
+    print(f"{'inline':<16}{elapsed:>10.2f}{args.logins / elapsed:>10.1f}")
+    for n in workers:
+        hasher = PasswordHasher(workers=n, max_queue=args.logins, rounds=args.rounds)
+        timed(lambda: pool_logins(hasher, password, hashed, n))  # arranca los procesos fuera de la medicion
+        elapsed = timed(lambda: pool_logins(hasher, password, hashed, args.logins))
+        print(f"{f'pool x{n}':<16}{elapsed:>10.2f}{args.logins / elapsed:>10.1f}")
+        hasher.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Nearest available cocheras at city scale: the geo grid vs. a scan over every spot.
+
+    python -m benchmarks.nearby
+    python -m benchmarks.nearby --spots 100000 --radius 1000 --limit 10 --queries 50
+
+Spots are spread over Lima's bounding box; 5% are in maintenance and 30% have a two-hour
+reservation at a random time of the next day. Queries are random points in the same box, free
+for the next hour, like GET /cocheras/nearby without a window. Both methods run the same queries.
+"""
+import sys
+import math
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import database
+from geo_index import haversine_m
+from models import Cochera, CocheraStatus, Reserva, ReservationStatus, PaymentStatus
+
+# Aproximadamente Lima Metropolitana
+LAT_RANGE = (-12.25, -11.95)
+LON_RANGE = (-77.15, -76.90)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def build_fleet(n_spots, now, rng):
+    database.init_sample_data()
+    for i in range(n_spots):
+        maintenance = rng.random() < 0.05
+        database.add_cochera(Cochera(
+            id=f"bench-{i}",
+            location="Lima",
+            price=round(rng.uniform(2, 30), 1),
+            status=CocheraStatus.maintenance if maintenance else CocheraStatus.available,
+            size="Standard",
+            lat=rng.uniform(*LAT_RANGE),
+            lon=rng.uniform(*LON_RANGE)
+        ))
+        if not maintenance and rng.random() < 0.3:
+            # Algunas empiezan dentro de la proxima hora y ocupan la ventana; el resto es para despues
+            start = now + timedelta(minutes=rng.randrange(-60, 24 * 60))
+            database.book_reservation(Reserva(
+                id=f"bench-reserva-{i}",
+                cochera_id=f"bench-{i}",
+                user_id="bench",
+                start_time=start,
+                end_time=start + timedelta(hours=2),
+                status=ReservationStatus.active,
+                payment_status=PaymentStatus.pending
+            ))
+
+
+def grid_nearest(lat, lon, radius, limit, start, end):
+    def free(cochera_id):
+        return database.is_free(cochera_id, start, end)
+
+    return [cochera_id for _, cochera_id in database.cochera_geo.nearest(lat, lon, radius, limit, accept=free)]
+
+
+# El recorrido: una pasada por las reservas y otra por las cocheras
+def scan_nearest(lat, lon, radius, limit, start, end):
+    busy = {r.cochera_id for r in database.reservas_db.values()
+            if r.status == ReservationStatus.active and r.start_time < end and start < r.end_time}
+    hits = []
+    for cochera_id, cochera in database.cocheras_db.items():
+        if cochera.lat is None or cochera.status == CocheraStatus.maintenance or cochera_id in busy:
+            continue
+        distance = haversine_m(lat, lon, cochera.lat, cochera.lon)
+        if distance <= radius:
+            hits.append((distance, cochera_id))
+    hits.sort()
+    return [cochera_id for _, cochera_id in hits[:limit]]
+
+
+def measure(search, queries, radius, limit, window):
+    latencies = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        search(lat, lon, radius, limit, *window)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return percentile(latencies, 50), percentile(latencies, 99)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cocheras cercanas: grilla geografica vs recorrido.")
+    parser.add_argument("--spots", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=20, help="Consultas medidas con cada metodo (el recorrido es lento)")
+    parser.add_argument("--radius", type=float, default=1000, help="Radio en metros")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    window = (now, now + timedelta(hours=1))
+    start = time.perf_counter()
+    build_fleet(args.spots, now, rng)
+    print(f"{args.spots} cocheras cargadas en {time.perf_counter() - start:.1f}s; grilla: {database.cochera_geo.stats()}")
+
+    queries = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(args.queries)]
+    for lat, lon in queries:
+        assert grid_nearest(lat, lon, args.radius, args.limit, *window) == scan_nearest(lat, lon, args.radius, args.limit, *window)
+
+    print(f"{'metodo':<10}{'p50 ms':>10}{'p99 ms':>10}")
+    # Las mismas consultas para los dos metodos
+    for name, search in (("grilla", grid_nearest), ("recorrido", scan_nearest)):
+        p50, p99 = measure(search, queries, args.radius, args.limit, window)
+        print(f"{name:<10}{p50:>10.3f}{p99:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
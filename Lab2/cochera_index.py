@@ -0,0 +1,240 @@
+# cochera_index.py
+import bisect
+import itertools
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_EMPTY: Set[str] = frozenset()
+
+
+def _key(value) -> str:
+    # CocheraStatus is a str Enum: index by its value so "available" and the enum hit the same set
+    return getattr(value, "value", value)
+
+
+class SortedList:
+    """
+    Sorted list kept as chunks of at most 2 * CHUNK items plus the max of each chunk, so an
+    insert or delete moves one chunk instead of the whole list (bisect.insort is O(n) memmove).
+    """
+
+    CHUNK = 512
+
+    def __init__(self):
+        self._chunks: List[list] = []
+        self._maxes: list = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._maxes.clear()
+        self._len = 0
+
+    def add(self, item) -> None:
+        self._len += 1
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+            return
+        i = bisect.bisect_left(self._maxes, item)
+        if i == len(self._chunks):
+            i -= 1
+            self._chunks[i].append(item)
+        else:
+            bisect.insort(self._chunks[i], item)
+        chunk = self._chunks[i]
+        if len(chunk) > 2 * self.CHUNK:
+            tail = chunk[self.CHUNK:]
+            del chunk[self.CHUNK:]
+            self._chunks.insert(i + 1, tail)
+            self._maxes.insert(i + 1, tail[-1])
+        self._maxes[i] = chunk[-1]
+
+    def remove(self, item) -> None:
+        i = bisect.bisect_left(self._maxes, item)
+        chunk = self._chunks[i]
+        del chunk[bisect.bisect_left(chunk, item)]
+        self._len -= 1
+        if chunk:
+            self._maxes[i] = chunk[-1]
+        else:
+            del self._chunks[i]
+            del self._maxes[i]
+
+    def _bounds(self, low, high) -> Tuple[int, int, int, int]:
+        # (first chunk, offset in it, last chunk, end offset in it) of the items in [low, high]
+        first = bisect.bisect_left(self._maxes, low)
+        last = min(bisect.bisect_left(self._maxes, high), len(self._chunks) - 1)
+        if first > last:
+            return 0, 0, -1, 0
+        return (first, bisect.bisect_left(self._chunks[first], low),
+                last, bisect.bisect_right(self._chunks[last], high))
+
+    def count(self, low, high) -> int:
+        first, start, last, end = self._bounds(low, high)
+        if first > last:
+            return 0
+        if first == last:
+            return max(end - start, 0)
+        middle = sum(len(chunk) for chunk in self._chunks[first + 1:last])
+        return len(self._chunks[first]) - start + middle + end
+
+    def irange(self, low, high):
+        first, start, last, end = self._bounds(low, high)
+        for i in range(first, last + 1):
+            chunk = self._chunks[i]
+            yield from chunk[start if i == first else 0:end if i == last else len(chunk)]
+
+
+class CocheraIndex:
+    """
+    Secondary indexes over cocheras_db for the listing and search filters:
+
+    - price: SortedList of (price, seq, cochera_id), range queries with bisect
+    - status, size: value -> set of cochera ids
+    - location: lowercased location -> set of ids (the district inverted index); the partial
+      match of the filter is checked against the distinct locations, not against every spot
+    - amenities: lowercased amenity -> set of ids (inverted index)
+
+    A query starts from the smallest candidate set (or price range) and checks the other
+    filters by set membership, so it costs about the size of the most selective filter.
+    Results keep insertion order, like iterating cocheras_db.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, int, str, str, str, Tuple[str, ...]]] = {}  # id -> (price, seq, status, size, location, amenities)
+        self._prices = SortedList()  # (price, seq, cochera_id)
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_size: Dict[str, Set[str]] = {}
+        self._by_location: Dict[str, Set[str]] = {}
+        self._by_amenity: Dict[str, Set[str]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._prices.clear()
+            self._by_status.clear()
+            self._by_size.clear()
+            self._by_location.clear()
+            self._by_amenity.clear()
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, cochera_id: str) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(cochera_id)
+            if not ids:
+                del index[key]
+
+    def _insert(self, cochera_id: str, price: float, seq: int, status: str, size: str, location: str,
+                amenities: Tuple[str, ...]) -> None:
+        self._entries[cochera_id] = (price, seq, status, size, location, amenities)
+        self._prices.add((price, seq, cochera_id))
+        self._by_status.setdefault(status, set()).add(cochera_id)
+        self._by_size.setdefault(size, set()).add(cochera_id)
+        self._by_location.setdefault(location, set()).add(cochera_id)
+        for amenity in amenities:
+            self._by_amenity.setdefault(amenity, set()).add(cochera_id)
+
+    def _delete(self, cochera_id: str) -> Optional[Tuple[float, int, str, str, str, Tuple[str, ...]]]:
+        entry = self._entries.pop(cochera_id, None)
+        if entry is None:
+            return None
+        price, seq, status, size, location, amenities = entry
+        self._prices.remove((price, seq, cochera_id))
+        self._discard(self._by_status, status, cochera_id)
+        self._discard(self._by_size, size, cochera_id)
+        self._discard(self._by_location, location, cochera_id)
+        for amenity in amenities:
+            self._discard(self._by_amenity, amenity, cochera_id)
+        return entry
+
+    def add(self, cochera) -> None:
+        """Index a Cochera (or re-index it, keeping its position, if it is already indexed)."""
+        with self._lock:
+            old = self._delete(cochera.id)
+            seq = old[1] if old is not None else next(self._seq)
+            amenities = tuple(sorted({amenity.lower() for amenity in cochera.amenities}))
+            self._insert(cochera.id, cochera.price, seq, _key(cochera.status), cochera.size, cochera.location.lower(), amenities)
+
+    def remove(self, cochera_id: str) -> None:
+        with self._lock:
+            self._delete(cochera_id)
+
+    def set_status(self, cochera_id: str, status) -> None:
+        status = _key(status)
+        with self._lock:
+            entry = self._entries.get(cochera_id)
+            if entry is None or entry[2] == status:
+                return
+            self._discard(self._by_status, entry[2], cochera_id)
+            self._by_status.setdefault(status, set()).add(cochera_id)
+            self._entries[cochera_id] = entry[:2] + (status,) + entry[3:]
+
+    def query(
+        self,
+        status=None,
+        location: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        size: Optional[str] = None,
+        amenities: Optional[Iterable[str]] = None
+    ) -> List[str]:
+        """
+        Ids of the cocheras matching every given filter. location is a case-insensitive partial
+        match; a cochera must have all the given amenities (case-insensitive).
+        """
+        with self._lock:
+            sets: List[Set[str]] = []
+            if status is not None:
+                sets.append(self._by_status.get(_key(status), _EMPTY))
+            if size is not None:
+                sets.append(self._by_size.get(size, _EMPTY))
+            if location:
+                needle = location.lower()
+                matches = [ids for loc, ids in self._by_location.items() if needle in loc]
+                sets.append(matches[0] if len(matches) == 1 else set().union(*matches))
+            for amenity in set(amenities or ()):
+                sets.append(self._by_amenity.get(amenity.lower(), _EMPTY))
+
+            by_price = min_price is not None or max_price is not None
+            if by_price:
+                low = (float("-inf"),) if min_price is None else (min_price,)
+                high = (float("inf"),) if max_price is None else (max_price, float("inf"))
+                in_range = self._prices.count(low, high)
+            elif not sets:
+                sets.append(self._entries.keys())
+
+            # Smallest set first: every intersection after it only shrinks the candidates
+            sets.sort(key=len)
+            if by_price and (not sets or in_range <= len(sets[0])):
+                # The price range is the most selective filter: walk it and drop ids missing from a set
+                candidates = [cochera_id for _, _, cochera_id in self._prices.irange(low, high)]
+                for ids in sets:
+                    candidates = [cochera_id for cochera_id in candidates if cochera_id in ids]
+            else:
+                candidates = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+                if by_price:
+                    low, high = low[0], high[0]
+                    candidates = [cochera_id for cochera_id in candidates if low <= self._entries[cochera_id][0] <= high]
+            entries = self._entries
+            result = sorted(candidates, key=lambda cochera_id: entries[cochera_id][1])
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cocheras": len(self._entries),
+                "statuses": {status: len(ids) for status, ids in self._by_status.items()},
+                "sizes": len(self._by_size),
+                "locations": len(self._by_location),
+                "amenities": {amenity: len(ids) for amenity, ids in self._by_amenity.items()},
+            }
@@ -1,12 +1,18 @@
 # database.py
 import uuid
-import bcrypt # type: ignore
 import datetime
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 from models import (
     Distrito, Cochera, Autos, Reserva, Ticket, Disponibilidad, Tarifas,
     ReservationStatus, CocheraStatus, PaymentStatus
 )
+from sessions import session_store
+from hashing import hash_password_sync, verify_password_sync
+from cochera_index import CocheraIndex
+from geo_index import GeoGrid
+from reservation_calendar import ReservationCalendar
+from occupancy import OccupancyMatrix
 # from functions import cocheras 
 
 # Simulated tables (dictionaries)
@@ -19,25 +25,120 @@ distrito_db: Dict[str, Distrito] = {}         # Distrito DB
 tarifa_db: Dict[str, Tarifas] = {}            # Tarifas DB
 tickets_db: Dict[str, Ticket] = {}            # Tickets DB
 
+# Secondary indexes (kept in sync by add_user, add_cochera, set_cochera_status and book/release_reservation)
+users_by_username: Dict[str, str] = {}        # username -> user_id
+cochera_index = CocheraIndex()                # price / status / size / location -> cochera ids
+cochera_geo = GeoGrid()                       # lat/lon grid of cocheras with coordinates
+reservation_calendar = ReservationCalendar()  # cochera_id -> intervals of its active reservas
+occupancy = OccupancyMatrix()                 # time slots x cocheras matrix of active reservas
+_users_lock = threading.Lock()
+_occupancy_lock = threading.Lock()  # keeps bookings out while the occupancy matrix rolls forward
+
 def generate_id() -> str:
     return str(uuid.uuid4())
 
+# Blocking versions for scripts and sample data; request handlers await hashing.password_hasher
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
+    return hash_password_sync(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"), 
-        hashed_password.encode("utf-8")
-    )
+    return verify_password_sync(plain_password, hashed_password)
+
+def add_user(user_id: str, user_data: Dict[str, Any]) -> None:
+    """Insert a user into users_db and the username index; raises ValueError if the username is taken."""
+    with _users_lock:
+        if user_data["username"] in users_by_username:
+            raise ValueError(f"Username {user_data['username']} already taken.")
+        users_db[user_id] = user_data
+        users_by_username[user_data["username"]] = user_id
 
 def get_user_by_username(username: str) -> Dict[str, Any]:
-    for user_id, user_data in users_db.items():
-        if user_data["username"] == username:
-            return {"user_id": user_id, **user_data}
-    return None
+    user_id = users_by_username.get(username)
+    if user_id is None:
+        return None
+    return {"user_id": user_id, **users_db[user_id]}
+
+def add_cochera(cochera: Cochera) -> Cochera:
+    """Insert a cochera into cocheras_db, its availability row and the cochera index."""
+    if cochera.id in cocheras_db:
+        raise ValueError(f"Cochera with ID {cochera.id} already exists.")
+    cocheras_db[cochera.id] = cochera
+    disponibilidad_db[cochera.id] = Disponibilidad(
+        cochera_id=cochera.id,
+        start_time=datetime.datetime.now(),
+        end_time=None,
+        status=cochera.status
+    )
+    cochera_index.add(cochera)
+    occupancy.add_cochera(cochera.id, cochera.location, cochera.status)
+    if cochera.lat is not None and cochera.lon is not None:
+        cochera_geo.add(cochera.id, cochera.lat, cochera.lon)
+    return cochera
+
+def set_cochera_status(cochera_id: str, status: CocheraStatus) -> None:
+    """Change a cochera's status; every status transition must go through here to keep the index in sync."""
+    cocheras_db[cochera_id].status = status
+    cochera_index.set_status(cochera_id, status)
+    occupancy.set_status(cochera_id, status)
+
+def check_window(start: datetime.datetime, end: datetime.datetime) -> None:
+    """Raise ValueError unless [start, end) is a non-empty window of naive local times, like the stored reservations."""
+    if start.tzinfo is not None or end.tzinfo is not None:
+        # Comparing an aware time with the stored naive ones raises TypeError
+        raise ValueError("Use local times without a timezone offset")
+    if end <= start:
+        raise ValueError("End time must be after start time")
+
+def book_reservation(reserva: Reserva) -> Optional[str]:
+    """
+    Store an active reservation if its [start_time, end_time) window is free on that cochera.
+    Returns the id of the overlapping reservation instead when it is not. An invalid window
+    raises ValueError before anything is stored.
+    """
+    check_window(reserva.start_time, reserva.end_time)
+    with _occupancy_lock:
+        conflict = reservation_calendar.book(reserva.cochera_id, reserva.id, reserva.start_time, reserva.end_time)
+        if conflict is None:
+            try:
+                occupancy.book(reserva.cochera_id, reserva.start_time, reserva.end_time)
+            except Exception:
+                # Leave no interval in the calendar without its reservation in reservas_db
+                reservation_calendar.release(reserva.cochera_id, reserva.id, reserva.start_time)
+                raise
+    if conflict is None:
+        reservas_db[reserva.id] = reserva
+        set_cochera_status(reserva.cochera_id, CocheraStatus.reserved)
+    return conflict
+
+def release_reservation(reserva: Reserva) -> None:
+    """Free a reservation's window (cancel, complete or delete); the cochera is available again once none is left."""
+    with _occupancy_lock:
+        released = reservation_calendar.release(reserva.cochera_id, reserva.id, reserva.start_time)
+        if released:
+            occupancy.release(reserva.cochera_id, reserva.start_time, reserva.end_time)
+    if released:
+        if not reservation_calendar.has_active(reserva.cochera_id) and reserva.cochera_id in cocheras_db:
+            set_cochera_status(reserva.cochera_id, CocheraStatus.available)
+
+def is_free(cochera_id: str, start: datetime.datetime, end: datetime.datetime) -> bool:
+    """
+    Whether a cochera can be rented for [start, end): not in maintenance and without an active
+    reservation overlapping it. Unlike its status, this ignores reservations outside the window.
+    """
+    cochera = cocheras_db.get(cochera_id)
+    return (cochera is not None and cochera.status != CocheraStatus.maintenance
+            and reservation_calendar.conflict(cochera_id, start, end) is None)
+
+def roll_occupancy(now: Optional[datetime.datetime] = None) -> None:
+    """Move the occupancy matrix to start today at 00:00 and book the reservations of the days it uncovers."""
+    origin = (now or datetime.datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    if origin <= occupancy.origin:
+        return
+    with _occupancy_lock:
+        start, end = occupancy.roll(origin)
+        for cochera_id, interval_start, interval_end, _ in reservation_calendar.overlapping(start, end):
+            # Only the uncovered part: the rest of the reservation is already in the matrix
+            occupancy.book(cochera_id, max(interval_start, start), interval_end)
 
 def update_disponibilidad(cochera_id: str, available: bool) -> None:
     """Update the availability status of a cochera."""
@@ -46,7 +147,7 @@ def update_disponibilidad(cochera_id: str, available: bool) -> None:
         disponibilidad_db[cochera_id].start_time = datetime.datetime.now()
         disponibilidad_db[cochera_id].end_time = None
         # Update cochera status in cocheras_db as well
-        cocheras_db[cochera_id].status = CocheraStatus.available if available else CocheraStatus.reserved
+        set_cochera_status(cochera_id, CocheraStatus.available if available else CocheraStatus.reserved)
     else:
         raise ValueError(f"Cochera with ID {cochera_id} does not exist.")
 
@@ -54,8 +155,14 @@ def init_sample_data():
     """Initialize sample data for development and testing"""
     # Clear existing data
     users_db.clear()
+    users_by_username.clear()
+    session_store.clear()
     autos_db.clear()
     cocheras_db.clear()
+    reservation_calendar.clear()
+    occupancy.clear()
+    cochera_index.clear()
+    cochera_geo.clear()
     reservas_db.clear()
     disponibilidad_db.clear()
     distrito_db.clear()
@@ -66,23 +173,23 @@ def init_sample_data():
     owner_id = generate_id()
     client_id = generate_id()
     
-    users_db[owner_id] = {
+    add_user(owner_id, {
         "id": owner_id,
         "username": "parking_owner",
         "password": hash_password("owner123"),
         "role": "owner",
-        "created_at": datetime.datetime.now(),
+        "created_at": datetime.datetime.now().isoformat(),
         "email": "owner@example.com"
-    }
+    })
     
-    users_db[client_id] = {
+    add_user(client_id, {
         "id": client_id,
         "username": "parking_client",
         "password": hash_password("client123"),
         "role": "client",
-        "created_at": datetime.datetime.now(),
+        "created_at": datetime.datetime.now().isoformat(),
         "email": "client@example.com"
-    }
+    })
     
     # Create sample districts
     distrito_db["1"] = Distrito(id="1", name="Chorrillos")
@@ -93,32 +200,32 @@ def init_sample_data():
     # Create sample cocheras
     locations = ["Chorrillos", "Miraflores", "Surco", "Barranco"]
     prices = [5.0, 7.5, 10.0, 15.0]  # Prices per hour
+    amenities = [["techada", "vigilancia"], ["techada"], ["vigilancia", "carga electrica"], []]
+    coordinates = [(-12.1686, -77.0156), (-12.1211, -77.0297), (-12.1456, -76.9916), (-12.1444, -77.0206)]
     
     cochera_ids = []
     for i in range(len(locations)):
         cochera_id = generate_id()
         cochera_ids.append(cochera_id)
         # cocheras_db[cochera_id] = cocheras.create_cochera(cochera_id, locations[i], prices[i], CocheraStatus.available, "Standard" if i % 2 == 0 else "Compact")
-        cocheras_db[cochera_id] = Cochera(
+        add_cochera(Cochera(
             id=cochera_id, 
             location=locations[i], 
             price=prices[i], 
             status=CocheraStatus.available, 
-            size="Standard" if i % 2 == 0 else "Compact"
-        )
-        disponibilidad_db[cochera_id] = Disponibilidad(
-            cochera_id=cochera_id,
-            start_time=datetime.datetime.now(),
-            end_time=None,
-            status=CocheraStatus.available
-        )
+            size="Standard" if i % 2 == 0 else "Compact",
+            amenities=amenities[i],
+            lat=coordinates[i][0],
+            lon=coordinates[i][1]
+        ))
     
     # Create a sample reservation
     reserva_id = generate_id()
     start_time = datetime.datetime.now() + datetime.timedelta(hours=1)
     end_time = start_time + datetime.timedelta(hours=3)
     
-    reservas_db[reserva_id] = Reserva(
+    # book_reservation also marks the cochera as reserved
+    book_reservation(Reserva(
         id=reserva_id,
         cochera_id=cochera_ids[0],
         user_id=client_id,
@@ -126,10 +233,9 @@ def init_sample_data():
         end_time=end_time,
         status=ReservationStatus.active,
         payment_status=PaymentStatus.pending
-    )
+    ))
     
-    # Update cochera status
-    cocheras_db[cochera_ids[0]].status = CocheraStatus.reserved
+    # Update availability as well
     disponibilidad_db[cochera_ids[0]].status = CocheraStatus.reserved
     
     # Create sample tariffs
@@ -1,13 +1,45 @@
-from fastapi import APIRouter, HTTPException, Body, status
-from typing import Dict, Any
-from database import users_db, generate_id, hash_password, verify_password, get_user_by_username
-from models import UserCreate, UserResponse
+from fastapi import APIRouter, HTTPException, Body, Depends, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Dict, Any, Optional
+from database import users_db, add_user, generate_id, verify_password, get_user_by_username
+from models import UserCreate, UserResponse, LoginResponse
+from sessions import session_store
+from hashing import password_hasher, HashPoolBusy
 from datetime import datetime
 
 router = APIRouter()
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> Dict[str, Any]:
+    """
+    Resolve the user behind the bearer token issued by /login.
+    Checks the token signature, expiry and revocation; no bcrypt involved.
+    """
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    user_id = session_store.verify(credentials.credentials)
+    if user_id is None or user_id not in users_db:
+        raise _unauthorized("Invalid or expired token")
+    return {"user_id": user_id, **users_db[user_id]}
 
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate):
+async def register_user(user: UserCreate):
     # Check if username already exists
     if get_user_by_username(user.username):
         raise HTTPException(
@@ -18,13 +50,25 @@ def register_user(user: UserCreate):
     user_id = generate_id()
     created_at = datetime.now().isoformat()
     
-    users_db[user_id] = {
-        "username": user.username,
-        "password": hash_password(user.password),
-        "role": user.role,
-        "email": user.email,
-        "created_at": created_at
-    }
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except HashPoolBusy:
+        raise _busy()
+    
+    try:
+        add_user(user_id, {
+            "username": user.username,
+            "password": hashed_password,
+            "role": user.role,
+            "email": user.email,
+            "created_at": created_at
+        })
+    except ValueError:
+        # Another request registered the same username in the meantime
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken."
+        )
     
     return {
         "user_id": user_id,
@@ -34,44 +78,58 @@ def register_user(user: UserCreate):
         "created_at": created_at
     }
 
-@router.post("/login", response_model=UserResponse)
-def login_for_user(
+@router.post("/login", response_model=LoginResponse)
+async def login_for_user(
     username: str = Body(..., embed=True),
     password: str = Body(..., embed=True)
 ):
     user = get_user_by_username(username)
-    if not user or not verify_password(password, user["password"]):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if not user:
+        raise _unauthorized("Incorrect username or password")
     
+    # bcrypt runs once here, in the hashing pool; later requests send the token instead
+    try:
+        valid = await password_hasher.verify(password, user["password"])
+    except HashPoolBusy:
+        raise _busy()
+    if not valid:
+        raise _unauthorized("Incorrect username or password")
+    
+    token, expires_at = session_store.issue(user["user_id"])
     return {
         "user_id": user["user_id"],
         "username": user["username"],
         "role": user["role"],
         "email": user["email"],
-        "created_at": user["created_at"]
+        "created_at": user["created_at"],
+        "access_token": token,
+        "token_type": "bearer",
+        "expires_at": datetime.fromtimestamp(expires_at).isoformat()
     }
 
-@router.get("/me", response_model=UserResponse)
-def read_users_me(
-    username: str = Body(..., embed=True),
-    password: str = Body(..., embed=True)
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
 ):
-    user = get_user_by_username(username)
-    if not user or not verify_password(password, user["password"]):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
+    """
+    Revoke the bearer token; later requests with it get 401.
+    """
+    if credentials is None or not session_store.revoke(credentials.credentials):
+        raise _unauthorized("Invalid or expired token")
+
+@router.get("/me", response_model=UserResponse)
+def read_users_me(current_user: Dict[str, Any] = Depends(get_current_user)):
     return {
-        "user_id": user["user_id"],
-        "username": user["username"],
-        "role": user["role"],
-        "email": user["email"],
-        "created_at": user["created_at"]
+        "user_id": current_user["user_id"],
+        "username": current_user["username"],
+        "role": current_user["role"],
+        "email": current_user["email"],
+        "created_at": current_user["created_at"]
     }
+
+@router.get("/stats")
+def auth_stats():
+    """
+    Hashing pool queue depth and session store counters.
+    """
+    return {"hashing": password_hasher.stats(), "sessions": session_store.stats()}
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, Query, Body
 from typing import Dict, Any, List, Optional
-from datetime import datetime
-from database import cocheras_db, reservas_db
+from datetime import datetime, timedelta
+from database import cocheras_db, reservas_db, cochera_index, cochera_geo, occupancy, add_cochera, roll_occupancy, is_free, check_window
 from models import Cochera
 from functions.auth import verify_password
 
 router = APIRouter()
 
+def _cochera_response(cochera: Cochera) -> Dict[str, Any]:
+    return {"cochera_id": cochera.id, **cochera.model_dump()}
+
 @router.get("/")
 def list_cocheras(
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -17,24 +20,70 @@ def list_cocheras(
 ):
     """
     List all parking spots with optional filtering.
+    Filters are resolved with database.cochera_index instead of scanning every spot.
+    """
+    ids = cochera_index.query(status=status, location=location, min_price=min_price, max_price=max_price, size=size)
+    return [_cochera_response(cocheras_db[cochera_id]) for cochera_id in ids]
+
+@router.get("/nearby")
+def nearby_cocheras(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search point"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the search point"),
+    radius: float = Query(1000, gt=0, le=50000, description="Search radius in meters"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of spots"),
+    start_time: Optional[datetime] = Query(None, description="Start of the window (ISO format, default now)"),
+    end_time: Optional[datetime] = Query(None, description="End of the window (ISO format, default one hour after start)")
+):
     """
-    result = []
-    for cochera_id, data in cocheras_db.items():
-        if status and data["status"] != status:
-            continue
-        if location and location.lower() not in data["location"].lower():
-            continue
-        if min_price is not None and data["price"] < min_price:
-            continue
-        if max_price is not None and data["price"] > max_price:
-            continue
-        if size and data["size"] != size:
-            continue
-        result.append({
-            "cochera_id": cochera_id,
-            **data
-        })
-    return result
+    The nearest parking spots around a point that are free between start_time and end_time, closest first.
+    Uses the database.cochera_geo grid, so only the cells around the point are visited, and checks
+    each candidate against its reservations in the window: a spot booked only for later still shows up.
+    """
+    start_time = start_time or datetime.now()
+    end_time = end_time or start_time + timedelta(hours=1)
+    try:
+        check_window(start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    hits = cochera_geo.nearest(lat, lon, radius, limit, accept=lambda cochera_id: is_free(cochera_id, start_time, end_time))
+    return [
+        {**_cochera_response(cocheras_db[cochera_id]), "distance_m": round(distance, 1)}
+        for distance, cochera_id in hits
+    ]
+
+@router.get("/available")
+def available_cocheras(
+    start_time: datetime = Query(..., description="Start of the window (ISO format)"),
+    end_time: datetime = Query(..., description="End of the window (ISO format)"),
+    location: Optional[str] = Query(None, description="Filter by location (partial match)")
+):
+    """
+    Parking spots with no reservation between start_time and end_time.
+    Answered from the database.occupancy matrix (slots of OCCUPANCY_SLOT_MINUTES), so a
+    reservation that touches a slot of the window makes the spot busy for it.
+    """
+    roll_occupancy()
+    try:
+        ids = occupancy.available(start_time, end_time, location)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return [_cochera_response(cocheras_db[cochera_id]) for cochera_id in ids]
+
+@router.get("/occupancy")
+def occupancy_report(
+    start_time: datetime = Query(..., description="Start of the window (ISO format)"),
+    end_time: datetime = Query(..., description="End of the window (ISO format)")
+):
+    """
+    Occupancy rate per distrito (cochera location) between start_time and end_time:
+    the share of the slots of its spots, maintenance excluded, that are reserved.
+    """
+    roll_occupancy()
+    try:
+        return occupancy.occupancy_by_location(start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/{cochera_id}")
 def get_cochera(cochera_id: str):
@@ -43,17 +92,25 @@ def get_cochera(cochera_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Parking spot not found"
         )
-    return {
-        "cochera_id": cochera_id,
-        **cocheras_db[cochera_id]
-    }
+    return _cochera_response(cocheras_db[cochera_id])
 
 @router.post("/")
-def create_cochera(id, location, price, status, size):
-    return Cochera(
+def create_cochera(
+    id, location, price, status, size,
+    amenities: Optional[List[str]] = Query(None),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180)
+):
+    try:
+        return add_cochera(Cochera(
             id=id,
             location=location,
             price=price,
             status=status,
-            size=size
-        )
\ No newline at end of file
+            size=size,
+            amenities=amenities or [],
+            lat=lat,
+            lon=lon
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
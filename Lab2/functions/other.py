@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Query, Body
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from models import PaymentCreate, PaymentResponse
+from models import CocheraStatus
 import uuid
 
 from database import cocheras_db, reservas_db, get_user_by_username
@@ -19,28 +19,20 @@ def search_cocheras(
 ):
     """
     Enhanced search function for finding parking spots.
+    Every filter, amenities included, is resolved with database.cochera_index.
     """
-    from database import cocheras_db
-    
-    result = {}
-    for c_id, data in cocheras_db.items():
-        # Apply filters
-        if available_only and data["status"] != "available":
-            continue
-        if district and district.lower() not in data["location"].lower():
-            continue
-        if min_price is not None and data["price"] < min_price:
-            continue
-        if max_price is not None and data["price"] > max_price:
-            continue
-        if amenities:
-            if not all(amenity in data["amenities"] for amenity in amenities):
-                continue
-        result[c_id] = data
+    from database import cocheras_db, cochera_index
     
+    ids = cochera_index.query(
+        status=CocheraStatus.available if available_only else None,
+        location=district,
+        min_price=min_price,
+        max_price=max_price,
+        amenities=amenities
+    )
     return {
-        "count": len(result),
-        "results": [{"cochera_id": c_id, **data} for c_id, data in result.items()]
+        "count": len(ids),
+        "results": [{"cochera_id": c_id, **cocheras_db[c_id].model_dump()} for c_id in ids]
     }
 
 # @router.post("/payment", response_model=PaymentResponse)
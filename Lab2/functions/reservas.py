@@ -1,15 +1,16 @@
-from fastapi import APIRouter, HTTPException, Body, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-from database import get_user_by_username, reservas_db, cocheras_db, generate_id
+from database import reservas_db, cocheras_db, generate_id, book_reservation, release_reservation, check_window
+from functions.auth import get_current_user
 from models import ReservaCreate, ReservaUpdate, ReservaResponse, ReservationStatus, CocheraStatus, PaymentStatus, Reserva
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ReservaResponse])
 def list_reservations(
-    username: str = Body(...),
+    current_user: Dict[str, Any] = Depends(get_current_user),
     reservaStatus: Optional[ReservationStatus] = None
 ):
     """
@@ -17,10 +18,6 @@ def list_reservations(
     Owners see reservations for their parking spots.
     Clients see their own reservations.
     """
-    current_user = get_user_by_username(username)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username")
-    
     result = []
     if current_user["role"] == "client":
         for reserva in reservas_db.values():
@@ -44,15 +41,11 @@ def list_reservations(
 @router.get("/{reserva_id}", response_model=ReservaResponse)
 def get_reservation(
     reserva_id: str,
-    username: str = Body(...)
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Get details for a specific reservation.
     """
-    current_user = get_user_by_username(username)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username")
-    
     reserva = reservas_db.get(reserva_id)
     if not reserva:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservation not found")
@@ -76,15 +69,11 @@ def get_reservation(
 @router.post("/", response_model=ReservaResponse)
 def create_reservation(
     reserva: ReservaCreate,
-    username: str = Body(...)
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Create a new reservation (only for clients).
     """
-    current_user = get_user_by_username(username)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username")
-    
     if current_user["role"] != "client":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -98,7 +87,8 @@ def create_reservation(
             detail="Parking spot not found"
         )
     
-    if cochera.status != CocheraStatus.available:
+    # A reserved spot can still take bookings for other periods; overlaps are checked below
+    if cochera.status == CocheraStatus.maintenance:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Parking spot is not available"
@@ -113,6 +103,12 @@ def create_reservation(
             detail="Invalid time format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"
         )
     
+    # Naive local times only, like the stored reservations; checked before comparing with now()
+    try:
+        check_window(start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     if start_time < datetime.now():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -132,9 +128,11 @@ def create_reservation(
         status=ReservationStatus.active,
         payment_status=PaymentStatus.pending
     )
-    reservas_db[reserva_id] = new_reserva
-    
-    cochera.status = CocheraStatus.reserved
+    if book_reservation(new_reserva) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Parking spot is already reserved for an overlapping period"
+        )
     
     return new_reserva
 
@@ -142,17 +140,13 @@ def create_reservation(
 def update_reservation(
     reserva_id: str,
     update_data: ReservaUpdate,
-    username: str = Body(...)
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Update a reservation.
     Clients can cancel their reservations.
     Owners can mark reservations as completed.
     """
-    current_user = get_user_by_username(username)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username")
-    
     reserva = reservas_db.get(reserva_id)
     if not reserva:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservation not found")
@@ -175,9 +169,20 @@ def update_reservation(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Clients can only cancel reservations"
             )
+        was_active = reserva.status == ReservationStatus.active
+        if update_data.status == ReservationStatus.active and not was_active:
+            try:
+                check_window(reserva.start_time, reserva.end_time)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            if book_reservation(reserva) is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Parking spot is already reserved for an overlapping period"
+                )
+        elif update_data.status != ReservationStatus.active and was_active:
+            release_reservation(reserva)
         reserva.status = update_data.status
-        if update_data.status in [ReservationStatus.cancelled, ReservationStatus.completed]:
-            cochera.status = CocheraStatus.available
     
     if update_data.payment_status and current_user["role"] == "owner":
         reserva.payment_status = update_data.payment_status
@@ -187,21 +192,16 @@ def update_reservation(
 @router.delete("/{reserva_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_reservation(
     reserva_id: str,
-    username: str = Body(...)
+    current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Delete a reservation.
     """
-    current_user = get_user_by_username(username)
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username")
-    
     reserva = reservas_db.get(reserva_id)
     if not reserva:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservation not found")
     
-    cochera = cocheras_db.get(reserva.cochera_id)
-    if cochera:
-        cochera.status = CocheraStatus.available
+    if reserva.status == ReservationStatus.active:
+        release_reservation(reserva)
     
     del reservas_db[reserva_id]
@@ -0,0 +1,123 @@
+# geo_index.py
+import os
+import math
+import heapq
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+# One degree of latitude on the sphere haversine_m uses; the ring bounds must not exceed real distances
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+# Grid cell side in degrees (~280 m at Lima's latitude); a few spots per cell at city density
+GEO_CELL_DEG = float(os.getenv("GEO_CELL_DEG", "0.0025"))
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGrid:
+    """
+    Uniform lat/lon grid (a fixed-precision geohash): cell -> {id: (lat, lon)}.
+
+    nearest() visits the cells in rings around the query point and stops once the ring is
+    farther than the radius, or farther than the k-th best distance found so far, so it only
+    touches the spots around the point whatever the size of the fleet.
+    """
+
+    def __init__(self, cell_deg: float = GEO_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._cell_of.clear()
+
+    def _remove(self, item_id: str) -> None:
+        cell = self._cell_of.pop(item_id, None)
+        if cell is not None:
+            items = self._cells[cell]
+            del items[item_id]
+            if not items:
+                del self._cells[cell]
+
+    def add(self, item_id: str, lat: float, lon: float) -> None:
+        """Insert item_id at (lat, lon), moving it if it was already in the grid."""
+        cell = self._cell(lat, lon)
+        with self._lock:
+            self._remove(item_id)
+            self._cells.setdefault(cell, {})[item_id] = (lat, lon)
+            self._cell_of[item_id] = cell
+
+    def remove(self, item_id: str) -> None:
+        with self._lock:
+            self._remove(item_id)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        radius_m: float,
+        limit: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[float, str]]:
+        """Up to limit (distance_m, id) within radius_m of (lat, lon), nearest first; accept filters ids."""
+        if limit <= 0:
+            return []
+        # Shortest side of a cell near this latitude: a lower bound on the distance to ring r
+        cell_m = self.cell_deg * METERS_PER_DEGREE * math.cos(math.radians(min(abs(lat) + 1.0, 89.0)))
+        max_ring = int(radius_m // cell_m) + 1
+        cy, cx = self._cell(lat, lon)
+        best: List[Tuple[float, str]] = []  # max-heap by distance: (-distance, id)
+        with self._lock:
+            for ring in range(max_ring + 1):
+                ring_min_m = (ring - 1) * cell_m
+                if ring_min_m > radius_m or (len(best) >= limit and ring_min_m > -best[0][0]):
+                    break
+                for cell in self._ring(cy, cx, ring):
+                    items = self._cells.get(cell)
+                    if not items:
+                        continue
+                    for item_id, (item_lat, item_lon) in items.items():
+                        distance = haversine_m(lat, lon, item_lat, item_lon)
+                        if distance > radius_m or (len(best) >= limit and distance >= -best[0][0]):
+                            continue
+                        if accept is not None and not accept(item_id):
+                            continue
+                        if len(best) < limit:
+                            heapq.heappush(best, (-distance, item_id))
+                        else:
+                            heapq.heapreplace(best, (-distance, item_id))
+        return sorted((-neg_distance, item_id) for neg_distance, item_id in best)
+
+    @staticmethod
+    def _ring(cy: int, cx: int, ring: int):
+        if ring == 0:
+            yield cy, cx
+            return
+        for dx in range(-ring, ring + 1):
+            yield cy - ring, cx + dx
+            yield cy + ring, cx + dx
+        for dy in range(-ring + 1, ring):
+            yield cy + dy, cx - ring
+            yield cy + dy, cx + ring
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            cells = len(self._cells)
+            return {"items": len(self._cell_of), "cells": cells, "cell_deg": self.cell_deg,
+                    "avg_per_cell": round(len(self._cell_of) / cells, 2) if cells else 0.0}
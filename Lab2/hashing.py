@@ -0,0 +1,100 @@
+# hashing.py
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import bcrypt # type: ignore
+
+# bcrypt cost factor: each +1 doubles the time per hash (12 is ~250ms of CPU)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+# Requests waiting for a worker beyond this are rejected instead of piling up
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "256"))
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds))
+    return hashed_password.decode("utf-8")
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8"),
+        hashed_password.encode("utf-8")
+    )
+
+
+class HashPoolBusy(Exception):
+    """Raised when HASH_MAX_QUEUE requests are already waiting for a worker."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded pool of worker processes, so hashing uses every core and
+    never blocks the event loop. Handlers await hash() / verify().
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_queue: int = HASH_MAX_QUEUE, rounds: int = BCRYPT_ROUNDS):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"hashed": 0, "verified": 0, "rejected": 0, "max_queued": 0, "total_ms": 0.0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Created on first use: importing the module does not fork
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _run(self, kind: str, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise HashPoolBusy("Password hashing queue is full")
+            self._in_flight += 1
+            self._stats["max_queued"] = max(self._stats["max_queued"], self._in_flight - self.workers)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._stats[kind] += 1
+                self._stats["total_ms"] += (time.perf_counter() - start) * 1000
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hashed", hash_password_sync, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verified", verify_password_sync, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        done = stats["hashed"] + stats["verified"]
+        stats["avg_ms"] = round(stats.pop("total_ms") / done, 2) if done else 0.0
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            "queued": max(in_flight - self.workers, 0),
+            **stats
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+password_hasher = PasswordHasher()
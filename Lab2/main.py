@@ -8,7 +8,9 @@ from database import (
     reservas_db,
     tickets_db,
     generate_id,
-    get_user_by_username
+    get_user_by_username,
+    cochera_index,
+    book_reservation
 )
 from models import (
     Reserva,
@@ -30,29 +32,22 @@ def reservar_cochera_y_generar_ticket(client_username: str):
     print(f"--- Iniciando flujo de reserva para el usuario: {client_username} ---")
 
     # 1. Buscar al usuario cliente
-    # En lugar de un login complejo, buscamos directamente en la DB simulada
-    user_info = None
-    client_id = None
-    for uid, data in users_db.items():
-        if data["username"] == client_username and data["role"] == "client":
-            user_info = data
-            client_id = uid 
-            break
-
-    if not user_info:
+    # En lugar de un login complejo, buscamos directamente en el indice por username
+    user_info = get_user_by_username(client_username)
+    client_id = user_info["user_id"] if user_info else None
+
+    if not user_info or user_info["role"] != "client":
         print(f"Error: No se encontró al usuario cliente '{client_username}' o no tiene el rol 'client'.")
         return
 
     print(f"Usuario encontrado: {user_info['username']} (ID: {client_id})")
 
     # 2. Buscar una cochera disponible
-    cocheras_disponibles = []
-    for cochera_id, cochera_data in cocheras_db.items():
-        # Asumiendo que cochera_data es un objeto Cochera o un dict con 'status'
-        status = cochera_data.status 
-        if status == CocheraStatus.available:
-             # Necesitamos el ID y el objeto/dict completo
-            cocheras_disponibles.append({"id": cochera_id, "data": cochera_data})
+    # El indice de cocheras devuelve directamente los ids con ese estado
+    cocheras_disponibles = [
+        {"id": cochera_id, "data": cocheras_db[cochera_id]}
+        for cochera_id in cochera_index.query(status=CocheraStatus.available)
+    ]
 
     if not cocheras_disponibles:
         print("Error: No hay cocheras disponibles en este momento.")
@@ -85,7 +80,11 @@ def reservar_cochera_y_generar_ticket(client_username: str):
     )
 
     # 6. Guardar la reserva en la "base de datos" (diccionario)
-    reservas_db[reserva_id] = nueva_reserva
+    # book_reservation verifica que no se cruce con otra reserva de la cochera,
+    # la guarda en reservas_db y marca la cochera como 'reserved'
+    if book_reservation(nueva_reserva) is not None:
+        print("La cochera ya tiene una reserva en ese horario.")
+        return
     print("\n--- Reserva Creada ---")
     print(f"ID Reserva: {nueva_reserva.id}")
     print(f"Usuario: {client_username}")
@@ -96,20 +95,8 @@ def reservar_cochera_y_generar_ticket(client_username: str):
     print(f"Estado Pago: {nueva_reserva.payment_status.value}")
 
 
-    # 7. Actualizar el estado de la cochera a 'reserved'
-    # modificar el status directamente en el objeto. Si almacena dicts, necesitas
-    # reemplazar el dict o actualizar la clave 'status'.
-    # Si cocheras_db[cochera_seleccionada_id] es un objeto Cochera:
-    try:
-         cocheras_db[cochera_seleccionada_id].status = CocheraStatus.reserved
-         print(f"\nEstado de la cochera {cochera_seleccionada_id} actualizado a: {CocheraStatus.reserved.value}")
-    except AttributeError:
-         # Si es un diccionario:
-         if isinstance(cocheras_db[cochera_seleccionada_id], dict):
-              cocheras_db[cochera_seleccionada_id]['status'] = CocheraStatus.reserved
-              print(f"\nEstado de la cochera {cochera_seleccionada_id} actualizado a: {CocheraStatus.reserved.value}")
-         else:
-              print(f"Advertencia: No se pudo actualizar el estado de la cochera {cochera_seleccionada_id}.")
+    # 7. El estado de la cochera ya quedo en 'reserved' (lo hizo book_reservation)
+    print(f"\nEstado de la cochera {cochera_seleccionada_id} actualizado a: {CocheraStatus.reserved.value}")
 
 
     # 8. Generar el Ticket
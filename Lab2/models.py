@@ -2,7 +2,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 class ReservationStatus(str, Enum):
     active = "active"
@@ -32,6 +32,9 @@ class Cochera(BaseModel):
     price: float
     status: CocheraStatus
     size: str
+    amenities: List[str] = []
+    lat: Optional[float] = None
+    lon: Optional[float] = None
 
 class Autos(BaseModel):
     id : str
@@ -95,6 +98,11 @@ class UserResponse(BaseModel):
     email: str
     created_at: str
 
+class LoginResponse(UserResponse):
+    access_token: str
+    token_type: str = "bearer"
+    expires_at: str
+
 # Reservation Models
 class ReservaCreate(BaseModel):
     cochera_id: str
@@ -102,8 +110,8 @@ class ReservaCreate(BaseModel):
     end_time: str
 
 class ReservaUpdate(BaseModel):
-    status: Optional[ReservationStatus]
-    payment_status: Optional[PaymentStatus]
+    status: Optional[ReservationStatus] = None
+    payment_status: Optional[PaymentStatus] = None
 
 class ReservaResponse(BaseModel):
     reserva_id: str
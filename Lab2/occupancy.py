@@ -0,0 +1,201 @@
+# occupancy.py
+import os
+import datetime
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Slot size and how far ahead the matrix looks; a week of 15-minute slots is 672 slots
+OCCUPANCY_SLOT_MINUTES = int(os.getenv("OCCUPANCY_SLOT_MINUTES", "15"))
+OCCUPANCY_HORIZON_DAYS = int(os.getenv("OCCUPANCY_HORIZON_DAYS", "7"))
+_MAINTENANCE = "maintenance"
+
+
+def _key(value) -> str:
+    # CocheraStatus is a str Enum: compare by its value
+    return getattr(value, "value", value)
+
+
+def _midnight(moment: datetime.datetime) -> datetime.datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class OccupancyMatrix:
+    """
+    Time slots x cocheras matrix of active reservations, starting at origin and covering
+    horizon_days. A cell counts the reservations touching that slot, so a reservation that
+    covers part of a slot marks the whole slot as busy.
+
+    The matrix is slot-major: the slots of a time window are contiguous rows, and "which
+    cocheras are free in the window" is one any() over them. Columns are cocheras in insertion
+    order, with their location code and a maintenance flag kept in parallel arrays.
+    """
+
+    def __init__(
+        self,
+        slot_minutes: int = OCCUPANCY_SLOT_MINUTES,
+        horizon_days: int = OCCUPANCY_HORIZON_DAYS,
+        origin: Optional[datetime.datetime] = None
+    ):
+        self.slot = datetime.timedelta(minutes=slot_minutes)
+        self.n_slots = horizon_days * 24 * 60 // slot_minutes
+        self._lock = threading.Lock()
+        self.clear(origin)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self, origin: Optional[datetime.datetime] = None) -> None:
+        """Drop every cochera and reservation; the matrix starts at origin (default: today at 00:00)."""
+        with self._lock:
+            self.origin = origin if origin is not None else _midnight(datetime.datetime.now())
+            self._cells = np.zeros((self.n_slots, 1024), dtype=np.uint8)
+            self._location = np.zeros(1024, dtype=np.int32)
+            self._maintenance = np.zeros(1024, dtype=bool)
+            self._ids: List[str] = []
+            self._column: Dict[str, int] = {}
+            self._location_codes: Dict[str, int] = {}  # lowercased location -> code
+            self._location_names: List[str] = []
+
+    @property
+    def end(self) -> datetime.datetime:
+        return self.origin + self.slot * self.n_slots
+
+    def _grow(self) -> None:
+        capacity = 2 * self._cells.shape[1]
+        cells = np.zeros((self.n_slots, capacity), dtype=np.uint8)
+        cells[:, :self._cells.shape[1]] = self._cells
+        self._cells = cells
+        self._location = np.resize(self._location, capacity)
+        self._maintenance = np.resize(self._maintenance, capacity)
+
+    def _slots(self, start: datetime.datetime, end: datetime.datetime) -> Tuple[int, int]:
+        # Slots touched by [start, end), clipped to the matrix
+        first = (start - self.origin) // self.slot
+        last = -((self.origin - end) // self.slot)
+        return max(first, 0), min(last, self.n_slots)
+
+    def add_cochera(self, cochera_id: str, location: str, status) -> None:
+        with self._lock:
+            if cochera_id in self._column:
+                return
+            column = len(self._ids)
+            if column == self._cells.shape[1]:
+                self._grow()
+            code = self._location_codes.get(location.lower())
+            if code is None:
+                code = self._location_codes[location.lower()] = len(self._location_names)
+                self._location_names.append(location)
+            self._location[column] = code
+            self._maintenance[column] = _key(status) == _MAINTENANCE
+            self._ids.append(cochera_id)
+            self._column[cochera_id] = column
+
+    def set_status(self, cochera_id: str, status) -> None:
+        with self._lock:
+            column = self._column.get(cochera_id)
+            if column is not None:
+                self._maintenance[column] = _key(status) == _MAINTENANCE
+
+    def _cells_of(self, cochera_id: str, start: datetime.datetime, end: datetime.datetime) -> Optional[np.ndarray]:
+        # View of the cells of one cochera in [start, end), or None when there is nothing to mark
+        column = self._column.get(cochera_id)
+        first, last = self._slots(start, end)
+        if column is None or first >= last:
+            return None
+        return self._cells[first:last, column]
+
+    def book(self, cochera_id: str, start: datetime.datetime, end: datetime.datetime) -> None:
+        """Mark [start, end) as busy; the part outside the matrix is ignored."""
+        with self._lock:
+            cells = self._cells_of(cochera_id, start, end)
+            if cells is not None:
+                cells += 1
+
+    def release(self, cochera_id: str, start: datetime.datetime, end: datetime.datetime) -> None:
+        with self._lock:
+            cells = self._cells_of(cochera_id, start, end)
+            if cells is not None:
+                cells -= 1
+
+    def roll(self, origin: datetime.datetime) -> Tuple[datetime.datetime, datetime.datetime]:
+        """
+        Move the matrix forward to start at origin (a slot boundary after the current one),
+        dropping the slots before it. Returns the newly uncovered [start, end) period, which
+        the caller must book again from the reservations it knows about.
+        """
+        with self._lock:
+            shift = (origin - self.origin) // self.slot
+            if shift <= 0:
+                return self.end, self.end
+            old_end = self.end
+            n = len(self._ids)
+            if shift < self.n_slots:
+                self._cells[:self.n_slots - shift, :n] = self._cells[shift:, :n]
+                self._cells[self.n_slots - shift:, :n] = 0
+            else:
+                self._cells[:, :n] = 0
+            self.origin += self.slot * shift
+            return max(old_end, self.origin), self.end
+
+    def _check_window(self, start: datetime.datetime, end: datetime.datetime) -> Tuple[int, int]:
+        if start.tzinfo is not None or end.tzinfo is not None:
+            # Reservations are stored as naive local times
+            raise ValueError("Use local times without a timezone offset")
+        if end <= start:
+            raise ValueError("End time must be after start time")
+        if start < self.origin or end > self.end:
+            raise ValueError(f"Window must be between {self.origin.isoformat()} and {self.end.isoformat()}")
+        return self._slots(start, end)
+
+    def _location_mask(self, location: Optional[str], n: int) -> Optional[np.ndarray]:
+        # Same partial, case-insensitive match as CocheraIndex, resolved over the distinct locations
+        if not location:
+            return None
+        needle = location.lower()
+        codes = [code for name, code in self._location_codes.items() if needle in name]
+        return np.isin(self._location[:n], codes)
+
+    def available(self, start: datetime.datetime, end: datetime.datetime, location: Optional[str] = None) -> List[str]:
+        """Ids of the cocheras not in maintenance and without reservations in [start, end)."""
+        with self._lock:
+            first, last = self._check_window(start, end)
+            n = len(self._ids)
+            free = ~self._cells[first:last, :n].any(axis=0) & ~self._maintenance[:n]
+            in_location = self._location_mask(location, n)
+            if in_location is not None:
+                free &= in_location
+            ids = self._ids
+            return [ids[column] for column in np.flatnonzero(free)]
+
+    def occupancy_by_location(self, start: datetime.datetime, end: datetime.datetime) -> Dict[str, Dict[str, Any]]:
+        """Per location: cocheras (not in maintenance) and the share of their slots in [start, end) that are reserved."""
+        with self._lock:
+            first, last = self._check_window(start, end)
+            n = len(self._ids)
+            rentable = ~self._maintenance[:n]
+            locations = self._location[:n][rentable]
+            busy = np.count_nonzero(self._cells[first:last, :n], axis=0)[rentable]
+            minlength = len(self._location_names)
+            cocheras = np.bincount(locations, minlength=minlength)
+            busy_slots = np.bincount(locations, weights=busy, minlength=minlength)
+            report = {}
+            for code, name in enumerate(self._location_names):
+                if cocheras[code]:
+                    report[name] = {
+                        "cocheras": int(cocheras[code]),
+                        "occupancy": round(float(busy_slots[code]) / (int(cocheras[code]) * (last - first)), 4)
+                    }
+            return report
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cocheras": len(self._ids),
+                "slots": self.n_slots,
+                "slot_minutes": int(self.slot.total_seconds() // 60),
+                "origin": self.origin.isoformat(),
+                "end": self.end.isoformat(),
+                "megabytes": round(self._cells.nbytes / 2 ** 20, 1),
+            }
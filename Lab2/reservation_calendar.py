@@ -0,0 +1,105 @@
+# reservation_calendar.py
+import bisect
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class IntervalList:
+    """
+    Active reservations of one cochera as sorted, non-overlapping [start, end) intervals.
+
+    Because they never overlap, sorting by start also sorts the ends, so the only interval
+    that can overlap a new one is the first whose end is after the new start: one bisect.
+    """
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def conflict(self, start: datetime, end: datetime) -> Optional[str]:
+        """Id of an interval overlapping [start, end), or None."""
+        i = bisect.bisect_right(self.ends, start)
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.ids[i]
+        return None
+
+    def add(self, reserva_id: str, start: datetime, end: datetime) -> None:
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, reserva_id)
+
+    def remove(self, reserva_id: str, start: datetime) -> bool:
+        i = bisect.bisect_left(self.starts, start)
+        if i < len(self.ids) and self.ids[i] == reserva_id:
+            del self.starts[i], self.ends[i], self.ids[i]
+            return True
+        return False
+
+
+class ReservationCalendar:
+    """cochera_id -> IntervalList of its active reservations."""
+
+    def __init__(self):
+        self._by_cochera: Dict[str, IntervalList] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_cochera.clear()
+
+    def book(self, cochera_id: str, reserva_id: str, start: datetime, end: datetime) -> Optional[str]:
+        """
+        Add [start, end) for cochera_id unless it overlaps an active reservation.
+        Returns the id of the conflicting reservation, or None if it was booked.
+        """
+        with self._lock:
+            intervals = self._by_cochera.get(cochera_id)
+            if intervals is None:
+                intervals = self._by_cochera[cochera_id] = IntervalList()
+            conflict = intervals.conflict(start, end)
+            if conflict is None:
+                intervals.add(reserva_id, start, end)
+            return conflict
+
+    def release(self, cochera_id: str, reserva_id: str, start: datetime) -> bool:
+        """Remove a reservation's interval; returns False if it was not booked."""
+        with self._lock:
+            intervals = self._by_cochera.get(cochera_id)
+            if intervals is None or not intervals.remove(reserva_id, start):
+                return False
+            if not intervals:
+                del self._by_cochera[cochera_id]
+            return True
+
+    def conflict(self, cochera_id: str, start: datetime, end: datetime) -> Optional[str]:
+        """Id of an active reservation of cochera_id overlapping [start, end), or None."""
+        with self._lock:
+            intervals = self._by_cochera.get(cochera_id)
+            return intervals.conflict(start, end) if intervals is not None else None
+
+    def has_active(self, cochera_id: str) -> bool:
+        with self._lock:
+            return cochera_id in self._by_cochera
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[str, datetime, datetime, str]]:
+        """(cochera_id, start, end, reserva_id) of every active reservation overlapping [start, end)."""
+        with self._lock:
+            return [
+                (cochera_id, interval_start, interval_end, reserva_id)
+                for cochera_id, intervals in self._by_cochera.items()
+                for interval_start, interval_end, reserva_id in zip(intervals.starts, intervals.ends, intervals.ids)
+                if interval_start < end and start < interval_end
+            ]
+
+    def intervals(self, cochera_id: str) -> List[Tuple[datetime, datetime, str]]:
+        with self._lock:
+            intervals = self._by_cochera.get(cochera_id)
+            if intervals is None:
+                return []
+            return list(zip(intervals.starts, intervals.ends, intervals.ids))
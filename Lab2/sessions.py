@@ -0,0 +1,118 @@
+# sessions.py
+import os
+import hmac
+import time
+import heapq
+import hashlib
+import secrets
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+# Without SESSION_SECRET the key is random per process: restarting the app logs everyone out
+SESSION_SECRET = os.getenv("SESSION_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+
+
+class TokenStore:
+    """In-memory session store for bearer tokens of the form "<session_id>.<expires_at>.<signature>".
+
+    The HMAC signature rejects forged or edited tokens without touching the store; the store
+    lookup then rejects revoked ones. Expired sessions are evicted lazily, oldest first.
+    """
+
+    def __init__(self, secret: bytes, ttl: int):
+        self.secret = secret
+        self.ttl = ttl
+        self._sessions: Dict[str, Tuple[str, int]] = {}   # session_id -> (user_id, expires_at)
+        self._by_user: Dict[str, Set[str]] = {}           # user_id -> session_ids
+        self._expiry: List[Tuple[int, str]] = []           # heap of (expires_at, session_id)
+        self._lock = threading.Lock()
+        self._stats = {"issued": 0, "revoked": 0, "evicted": 0, "rejected": 0}
+
+    def _sign(self, session_id: str, expires_at: int) -> str:
+        return hmac.new(self.secret, f"{session_id}.{expires_at}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _drop(self, session_id: str) -> None:
+        user_id, _ = self._sessions.pop(session_id)
+        sessions = self._by_user.get(user_id)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._by_user[user_id]
+
+    def _evict(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._expiry)
+            session = self._sessions.get(session_id)
+            if session is not None and session[1] == expires_at:
+                self._drop(session_id)
+                self._stats["evicted"] += 1
+
+    def issue(self, user_id: str) -> Tuple[str, int]:
+        """Create a session for user_id; returns (token, expires_at as a unix timestamp)."""
+        session_id = secrets.token_urlsafe(16)
+        now = time.time()
+        expires_at = int(now) + self.ttl
+        with self._lock:
+            self._evict(now)
+            self._sessions[session_id] = (user_id, expires_at)
+            self._by_user.setdefault(user_id, set()).add(session_id)
+            heapq.heappush(self._expiry, (expires_at, session_id))
+            self._stats["issued"] += 1
+        return f"{session_id}.{expires_at}.{self._sign(session_id, expires_at)}", expires_at
+
+    def _parse(self, token: str) -> Optional[Tuple[str, int]]:
+        try:
+            session_id, expires, signature = token.split(".")
+            expires_at = int(expires)
+        except ValueError:
+            return None
+        if not hmac.compare_digest(signature, self._sign(session_id, expires_at)):
+            return None
+        return session_id, expires_at
+
+    def verify(self, token: str) -> Optional[str]:
+        """Return the user_id of a valid, unexpired, unrevoked token, or None."""
+        parsed = self._parse(token)
+        if parsed is not None and parsed[1] > time.time():
+            with self._lock:
+                session = self._sessions.get(parsed[0])
+            if session is not None and session[1] == parsed[1]:
+                return session[0]
+        with self._lock:
+            self._stats["rejected"] += 1
+        return None
+
+    def revoke(self, token: str) -> bool:
+        parsed = self._parse(token)
+        if parsed is None:
+            return False
+        with self._lock:
+            if parsed[0] not in self._sessions:
+                return False
+            self._drop(parsed[0])
+            self._stats["revoked"] += 1
+        return True
+
+    def revoke_user(self, user_id: str) -> int:
+        """Revoke every session of user_id (e.g. after a password change); returns how many."""
+        with self._lock:
+            session_ids = list(self._by_user.get(user_id, ()))
+            for session_id in session_ids:
+                self._drop(session_id)
+            self._stats["revoked"] += len(session_ids)
+        return len(session_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._by_user.clear()
+            self._expiry.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._evict(time.time())
+            return {"active": len(self._sessions), "ttl_seconds": self.ttl, **self._stats}
+
+
+session_store = TokenStore(SESSION_SECRET, SESSION_TTL_SECONDS)
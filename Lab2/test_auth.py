@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import users_db, init_sample_data
+from functions import auth
+from sessions import TokenStore, session_store
+
+
+# --- Fixtures ---
+
+@pytest.fixture(scope="module")
+def client():
+    """
+    TestClient over an app built from the auth router only, mounted where the
+    rest of the tests expect it (/api/auth).
+    """
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/auth")
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_data_before_each_test():
+    """Reset users and sessions before every test."""
+    init_sample_data()
+
+# --- Test Data ---
+OWNER_USER = {"username": "parking_owner", "password": "owner123"}
+CLIENT_USER = {"username": "parking_client", "password": "client123"}
+
+def login(client: TestClient, user_credentials):
+    response = client.post("/api/auth/login", json=user_credentials)
+    assert response.status_code == 200
+    return response.json()
+
+def bearer(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+# --- Test Functions ---
+
+def test_login_returns_token(client: TestClient):
+    """Test login returns a bearer token bound to the user."""
+    data = login(client, CLIENT_USER)
+    assert data["token_type"] == "bearer"
+    assert data["username"] == CLIENT_USER["username"]
+    assert session_store.verify(data["access_token"]) == data["user_id"]
+    assert data["user_id"] in users_db
+
+def test_login_wrong_password_issues_no_token(client: TestClient):
+    """Test a failed login does not create a session."""
+    response = client.post("/api/auth/login", json={"username": CLIENT_USER["username"], "password": "nope"})
+    assert response.status_code == 401
+    assert "access_token" not in response.json()
+    assert session_store.stats()["active"] == 0
+
+def test_me_with_token(client: TestClient):
+    """Test /me accepts the token issued by login and rejects a tampered one."""
+    token = login(client, CLIENT_USER)["access_token"]
+    response = client.get("/api/auth/me", headers=bearer(token))
+    assert response.status_code == 200
+    assert response.json()["username"] == CLIENT_USER["username"]
+
+    tampered = token[:-1] + ("1" if token.endswith("0") else "0")
+    assert client.get("/api/auth/me", headers=bearer(tampered)).status_code == 401
+    assert client.get("/api/auth/me", headers=bearer("not-a-token")).status_code == 401
+    assert client.get("/api/auth/me").status_code == 401
+
+def test_me_resolves_each_users_token(client: TestClient):
+    """Test two sessions resolve to their own users."""
+    owner_token = login(client, OWNER_USER)["access_token"]
+    client_token = login(client, CLIENT_USER)["access_token"]
+    assert client.get("/api/auth/me", headers=bearer(owner_token)).json()["role"] == "owner"
+    assert client.get("/api/auth/me", headers=bearer(client_token)).json()["role"] == "client"
+
+def test_logout_revokes_token(client: TestClient):
+    """Test a token stops working after logout, and a second logout with it is rejected."""
+    token = login(client, CLIENT_USER)["access_token"]
+    assert client.post("/api/auth/logout", headers=bearer(token)).status_code == 204
+    assert client.get("/api/auth/me", headers=bearer(token)).status_code == 401
+    assert client.post("/api/auth/logout", headers=bearer(token)).status_code == 401
+
+def test_logout_keeps_other_sessions(client: TestClient):
+    """Test logging out one session leaves the user's other sessions valid."""
+    first = login(client, CLIENT_USER)["access_token"]
+    second = login(client, CLIENT_USER)["access_token"]
+    assert client.post("/api/auth/logout", headers=bearer(first)).status_code == 204
+    assert client.get("/api/auth/me", headers=bearer(second)).status_code == 200
+
+def test_logout_without_token(client: TestClient):
+    """Test logout needs a bearer token."""
+    assert client.post("/api/auth/logout").status_code == 401
+
+def test_revoke_user_revokes_every_session(client: TestClient):
+    """Test revoke_user logs the user out everywhere."""
+    data = login(client, CLIENT_USER)
+    other = login(client, CLIENT_USER)["access_token"]
+    assert session_store.revoke_user(data["user_id"]) == 2
+    for token in (data["access_token"], other):
+        assert client.get("/api/auth/me", headers=bearer(token)).status_code == 401
+
+def test_token_store_expiry():
+    """Test an expired token is rejected and evicted."""
+    store = TokenStore(b"secret", ttl=1)
+    token, expires_at = store.issue("user-1")
+    assert store.verify(token) == "user-1"
+    time.sleep(max(expires_at - time.time(), 0) + 0.01)
+    assert store.verify(token) is None
+    assert store.stats()["active"] == 0
+
+def test_token_store_rejects_other_secret():
+    """Test a token signed with another key is rejected."""
+    token, _ = TokenStore(b"one", ttl=60).issue("user-1")
+    assert TokenStore(b"two", ttl=60).verify(token) is None
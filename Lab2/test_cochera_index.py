@@ -0,0 +1,272 @@
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import database
+from functions import other
+from cochera_index import CocheraIndex, SortedList
+from models import Cochera, CocheraStatus
+
+LOCATIONS = ["Chorrillos", "Miraflores", "Surco", "Barranco", "San Isidro", "San Borja"]
+SIZES = ["Standard", "Compact", "Large"]
+PRICES = [2.0, 5.0, 5.0, 7.5, 10.0, 10.0, 15.0]  # repeated prices: ranges must include every equal one
+STATUSES = list(CocheraStatus)
+AMENITIES = ["techada", "vigilancia", "carga electrica", "lavado", "valet"]
+
+
+# --- Helpers ---
+
+def small_chunks(index: CocheraIndex) -> CocheraIndex:
+    # Chunks of 2 to 8 items, so a few hundred cocheras split and drop chunks many times
+    index._prices.CHUNK = 4
+    return index
+
+def make_cochera(rng: random.Random, cochera_id: str) -> Cochera:
+    return Cochera(
+        id=cochera_id,
+        location=rng.choice(LOCATIONS),
+        price=rng.choice(PRICES),
+        status=rng.choice(STATUSES),
+        size=rng.choice(SIZES),
+        # Mixed case: the index matches amenities case-insensitively
+        amenities=[a if rng.random() < 0.5 else a.upper() for a in AMENITIES if rng.random() < 0.4]
+    )
+
+def scan(cocheras, status=None, location=None, min_price=None, max_price=None, size=None, amenities=None):
+    """The same filters as CocheraIndex.query, checked one cochera at a time in insertion order."""
+    wanted = {a.lower() for a in amenities or ()}
+    return [c.id for c in cocheras.values()
+            if (status is None or c.status == status)
+            and (not location or location.lower() in c.location.lower())
+            and (min_price is None or c.price >= min_price)
+            and (max_price is None or c.price <= max_price)
+            and (size is None or c.size == size)
+            and wanted <= {a.lower() for a in c.amenities}]
+
+def random_filters(rng: random.Random):
+    filters = {}
+    if rng.random() < 0.4:
+        filters["status"] = rng.choice(STATUSES)
+    if rng.random() < 0.4:
+        # Partial matches too: "San" hits two districts
+        filters["location"] = rng.choice(LOCATIONS + ["san", "RRANCO", "nowhere"])
+    if rng.random() < 0.5:
+        filters["min_price"] = rng.choice(PRICES)
+    if rng.random() < 0.5:
+        filters["max_price"] = rng.choice(PRICES)
+    if rng.random() < 0.3:
+        filters["size"] = rng.choice(SIZES)
+    if rng.random() < 0.5:
+        filters["amenities"] = [a.title() if rng.random() < 0.3 else a
+                                for a in rng.sample(AMENITIES + ["jacuzzi"], rng.randint(1, 3))]
+    return filters
+
+
+# --- SortedList ---
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sorted_list_matches_sorted(seed):
+    """Random adds and removes keep the same items, counts and ranges as a sorted Python list."""
+    rng = random.Random(seed)
+    items = SortedList()
+    items.CHUNK = 4
+    expected = []
+    for step in range(2000):
+        if expected and rng.random() < 0.45:
+            item = rng.choice(expected)
+            expected.remove(item)
+            items.remove(item)
+        else:
+            item = (rng.randint(0, 50), step)
+            expected.append(item)
+            items.add(item)
+        if step % 50 == 0:
+            expected.sort()
+            assert len(items) == len(expected)
+            assert list(items.irange((float("-inf"),), (float("inf"),))) == expected
+            assert all(len(chunk) <= 2 * items.CHUNK for chunk in items._chunks)
+            assert items._maxes == [chunk[-1] for chunk in items._chunks]
+            low, high = sorted(rng.randint(-5, 55) for _ in range(2))
+            # (price,) sorts before every (price, seq); (price, inf) after all of them
+            in_range = [item for item in expected if low <= item[0] <= high]
+            assert list(items.irange((low,), (high, float("inf")))) == in_range
+            assert items.count((low,), (high, float("inf"))) == len(in_range)
+
+def test_sorted_list_split_and_drop_chunks():
+    """A chunk splits past 2 * CHUNK items, and a chunk emptied by removals is dropped."""
+    items = SortedList()
+    items.CHUNK = 2
+    for i in range(5):
+        items.add((i,))
+    assert [len(chunk) for chunk in items._chunks] == [2, 3]
+    for i in range(2):
+        items.remove((i,))
+    assert [len(chunk) for chunk in items._chunks] == [3]
+    assert list(items.irange((0,), (10,))) == [(2,), (3,), (4,)]
+    for i in range(2, 5):
+        items.remove((i,))
+    assert len(items) == 0 and items._chunks == [] and items._maxes == []
+    assert list(items.irange((0,), (10,))) == []
+    assert items.count((0,), (10,)) == 0
+
+def test_sorted_list_range_outside_items():
+    items = SortedList()
+    for i in range(10):
+        items.add((i,))
+    assert items.count((20,), (30, float("inf"))) == 0
+    assert list(items.irange((-10,), (-1, float("inf")))) == []
+    assert items.count((5,), (4, float("inf"))) == 0
+
+
+# --- CocheraIndex ---
+
+@pytest.mark.parametrize("seed", range(5))
+def test_query_matches_scan(seed):
+    """Adds, updates, status moves and removals; every query returns what a full scan returns."""
+    rng = random.Random(seed)
+    index = small_chunks(CocheraIndex())
+    cocheras = {}
+    next_id = 0
+    for step in range(1500):
+        action = rng.random()
+        if not cocheras or action < 0.5:
+            cochera = make_cochera(rng, f"c-{next_id}")
+            next_id += 1
+            cocheras[cochera.id] = cochera
+            index.add(cochera)
+        elif action < 0.65:
+            # Re-indexing an existing cochera keeps its place in the results, like updating cocheras_db
+            cochera_id = rng.choice(list(cocheras))
+            cochera = make_cochera(rng, cochera_id)
+            cocheras[cochera_id] = cochera
+            index.add(cochera)
+        elif action < 0.85:
+            cochera_id = rng.choice(list(cocheras))
+            status = rng.choice(STATUSES)
+            cocheras[cochera_id] = cocheras[cochera_id].model_copy(update={"status": status})
+            index.set_status(cochera_id, status)
+        else:
+            cochera_id = rng.choice(list(cocheras))
+            del cocheras[cochera_id]
+            index.remove(cochera_id)
+        if step % 10 == 0:
+            filters = random_filters(rng)
+            assert index.query(**filters) == scan(cocheras, **filters), filters
+    assert len(index) == len(cocheras)
+    assert index.query() == list(cocheras)
+
+def test_price_bounds_include_equal_prices():
+    """min_price and max_price are inclusive for every cochera at that exact price."""
+    index = small_chunks(CocheraIndex())
+    cocheras = {}
+    for i in range(30):
+        cochera = Cochera(id=f"c-{i}", location="Surco", price=[5.0, 7.5, 10.0][i % 3],
+                          status=CocheraStatus.available, size="Standard")
+        cocheras[cochera.id] = cochera
+        index.add(cochera)
+    assert index.query(min_price=7.5, max_price=7.5) == scan(cocheras, min_price=7.5, max_price=7.5)
+    assert len(index.query(min_price=7.5, max_price=7.5)) == 10
+    assert index.query(max_price=5.0) == scan(cocheras, max_price=5.0)
+    assert index.query(min_price=10.0) == scan(cocheras, min_price=10.0)
+    assert index.query(min_price=7.6, max_price=9.9) == []
+    assert index.query(min_price=10.0, max_price=5.0) == []
+
+def test_status_moves():
+    """set_status moves a cochera between status sets; the same status, or an unknown id, is a no-op."""
+    index = CocheraIndex()
+    index.add(Cochera(id="a", location="Surco", price=5.0, status=CocheraStatus.available, size="Standard"))
+    index.add(Cochera(id="b", location="Surco", price=5.0, status=CocheraStatus.available, size="Standard"))
+    index.set_status("a", CocheraStatus.reserved)
+    assert index.query(status=CocheraStatus.available) == ["b"]
+    assert index.query(status="reserved") == ["a"]
+    index.set_status("a", "reserved")
+    index.set_status("missing", CocheraStatus.maintenance)
+    assert index.query(status=CocheraStatus.maintenance) == []
+    index.set_status("a", CocheraStatus.available)
+    assert index.query(status=CocheraStatus.available) == ["a", "b"]
+    assert "reserved" not in index.stats()["statuses"]
+
+def test_remove():
+    """A removed cochera leaves every index; removing it twice is a no-op."""
+    index = CocheraIndex()
+    index.add(Cochera(id="a", location="Barranco", price=5.0, status=CocheraStatus.available,
+                      size="Compact", amenities=["techada"]))
+    index.add(Cochera(id="b", location="Surco", price=5.0, status=CocheraStatus.available, size="Standard"))
+    index.remove("a")
+    index.remove("a")
+    assert index.query() == ["b"]
+    assert index.query(location="barranco") == []
+    assert index.query(size="Compact") == []
+    assert index.query(min_price=5.0, max_price=5.0) == ["b"]
+    assert index.query(amenities=["techada"]) == []
+    assert index.stats()["locations"] == 1 and index.stats()["amenities"] == {}
+
+
+# --- Amenities ---
+
+@pytest.fixture()
+def amenity_index():
+    index = CocheraIndex()
+    rows = [
+        ("a", "Miraflores", 5.0, CocheraStatus.available, ["techada", "vigilancia"]),
+        ("b", "Miraflores", 8.0, CocheraStatus.available, ["Techada"]),
+        ("c", "Surco", 5.0, CocheraStatus.available, ["techada", "vigilancia", "lavado"]),
+        ("d", "Miraflores", 5.0, CocheraStatus.reserved, ["techada", "vigilancia"]),
+        ("e", "San Isidro", 12.0, CocheraStatus.available, []),
+    ]
+    for cochera_id, location, price, status, amenities in rows:
+        index.add(Cochera(id=cochera_id, location=location, price=price, status=status,
+                          size="Standard", amenities=amenities))
+    return index
+
+def test_amenities_intersect(amenity_index):
+    """A cochera must have every requested amenity; matching ignores case and repeats."""
+    assert amenity_index.query(amenities=["techada"]) == ["a", "b", "c", "d"]
+    assert amenity_index.query(amenities=["TECHADA", "vigilancia"]) == ["a", "c", "d"]
+    assert amenity_index.query(amenities=["techada", "techada", "lavado"]) == ["c"]
+    assert amenity_index.query(amenities=["techada", "jacuzzi"]) == []
+    assert amenity_index.query(amenities=[]) == ["a", "b", "c", "d", "e"]
+
+def test_amenities_with_other_filters(amenity_index):
+    """Amenities combine with status, location, price and size like any other filter."""
+    available = CocheraStatus.available
+    assert amenity_index.query(status=available, amenities=["vigilancia"]) == ["a", "c"]
+    assert amenity_index.query(status=available, location="mira", amenities=["techada"]) == ["a", "b"]
+    assert amenity_index.query(location="miraflores", max_price=5.0, amenities=["vigilancia"]) == ["a", "d"]
+    assert amenity_index.query(status=available, min_price=5.0, max_price=5.0,
+                               amenities=["techada", "vigilancia"]) == ["a", "c"]
+    assert amenity_index.query(min_price=6.0, amenities=["techada"]) == ["b"]
+    assert amenity_index.query(size="Compact", amenities=["techada"]) == []
+
+def test_amenities_follow_updates(amenity_index):
+    """Re-indexing a cochera replaces its amenities; removing it drops it from every amenity set."""
+    amenity_index.add(Cochera(id="b", location="Miraflores", price=8.0, status=CocheraStatus.available,
+                              size="Standard", amenities=["vigilancia"]))
+    assert amenity_index.query(amenities=["techada"]) == ["a", "c", "d"]
+    assert amenity_index.query(amenities=["vigilancia"]) == ["a", "b", "c", "d"]
+    amenity_index.remove("c")
+    assert amenity_index.query(amenities=["lavado"]) == []
+    assert "lavado" not in amenity_index.stats()["amenities"]
+    amenity_index.set_status("d", CocheraStatus.available)
+    assert amenity_index.query(status=CocheraStatus.available, amenities=["techada"]) == ["a", "d"]
+
+def test_search_endpoint_amenities():
+    """GET /search applies amenities together with district, price and availability."""
+    app = FastAPI()
+    app.include_router(other.router, prefix="/api")
+    database.init_sample_data()
+    with TestClient(app) as client:
+        def search(**params):
+            response = client.get("/api/search", params=params)
+            assert response.status_code == 200
+            return sorted(result["location"] for result in response.json()["results"])
+
+        # The sample reservation leaves the Chorrillos spot reserved
+        assert search(amenities=["techada"]) == ["Miraflores"]
+        assert search(amenities=["techada"], available_only=False) == ["Chorrillos", "Miraflores"]
+        assert search(amenities=["techada", "vigilancia"], available_only=False) == ["Chorrillos"]
+        assert search(amenities=["Vigilancia"], min_price=6) == ["Surco"]
+        assert search(amenities=["techada"], district="mira", max_price=10) == ["Miraflores"]
+        assert search(amenities=["techada"], max_price=4) == []
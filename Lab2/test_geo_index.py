@@ -0,0 +1,193 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import database
+from functions import cocheras
+from geo_index import GeoGrid, haversine_m
+from models import Cochera, CocheraStatus, Reserva, ReservationStatus, PaymentStatus
+
+CELL_DEG = 0.0025
+
+
+# --- Helpers ---
+
+def scan_nearest(points, lat, lon, radius_m, limit, accept=None):
+    """Every point within radius_m of (lat, lon), nearest first: what GeoGrid.nearest must return."""
+    hits = sorted((haversine_m(lat, lon, p_lat, p_lon), item_id) for item_id, (p_lat, p_lon) in points.items()
+                  if accept is None or accept(item_id))
+    return [hit for hit in hits if hit[0] <= radius_m][:limit]
+
+def random_points(rng, n, lat_range, lon_range):
+    return {f"p-{i}": (rng.uniform(*lat_range), rng.uniform(*lon_range)) for i in range(n)}
+
+def grid_of(points, cell_deg=CELL_DEG):
+    grid = GeoGrid(cell_deg)
+    for item_id, (lat, lon) in points.items():
+        grid.add(item_id, lat, lon)
+    return grid
+
+
+# --- Test Functions ---
+
+@pytest.mark.parametrize("center", [(-12.1, -77.03), (0.0, 0.0), (1.0, 30.0), (59.9, 10.7)])
+def test_nearest_matches_scan(center):
+    """Random points around Lima, the equator and a high latitude: same hits and order as a full scan."""
+    rng = random.Random(hash(center))
+    lat_range = (center[0] - 0.05, center[0] + 0.05)
+    lon_range = (center[1] - 0.05, center[1] + 0.05)
+    points = random_points(rng, 3000, lat_range, lon_range)
+    grid = grid_of(points)
+    for _ in range(200):
+        lat, lon = rng.uniform(*lat_range), rng.uniform(*lon_range)
+        radius = rng.choice([50, 300, 1000, 5000])
+        limit = rng.choice([1, 5, 20])
+        assert grid.nearest(lat, lon, radius, limit) == scan_nearest(points, lat, lon, radius, limit)
+
+def test_radius_stops_the_search():
+    """Points just outside the radius are left out, even when fewer than limit are found."""
+    grid = GeoGrid(CELL_DEG)
+    meters_per_deg = haversine_m(0.0, 0.0, 1.0, 0.0)
+    for i, meters in enumerate([100, 499, 501, 2000]):
+        grid.add(f"east-{i}", 0.0, meters / meters_per_deg)
+    hits = grid.nearest(0.0, 0.0, 500, 10)
+    assert [item_id for _, item_id in hits] == ["east-0", "east-1"]
+    assert all(distance <= 500 for distance, _ in hits)
+    assert grid.nearest(0.0, 0.0, 50, 10) == []
+    assert len(grid.nearest(0.0, 0.0, 3000, 10)) == 4
+
+def test_ring_bound_at_radius_edge():
+    """A point just inside the radius, many rings away, is found: the ring bound never exceeds the real distance."""
+    grid = GeoGrid(CELL_DEG)
+    # Right below the edge of the cell 11 rings south of the query point, about 2779.9 m away
+    grid.add("edge", -10 * CELL_DEG - 1e-9, 0.0)
+    distance = haversine_m(1e-9, 0.0, -10 * CELL_DEG - 1e-9, 0.0)
+    assert [item_id for _, item_id in grid.nearest(1e-9, 0.0, distance + 1, 1)] == ["edge"]
+    assert grid.nearest(1e-9, 0.0, distance - 1, 1) == []
+
+def test_neighbors_across_cell_boundaries():
+    """The nearest point can sit in the next cell, including across the zero lines where floor() changes sign."""
+    grid = GeoGrid(CELL_DEG)
+    # Query a hair inside a cell; the nearest point is a hair across its edge, a farther one in the same cell
+    grid.add("same-cell", 2 * CELL_DEG + 0.0020, 0.0001)
+    grid.add("next-cell", 2 * CELL_DEG - 0.00001, 0.0001)
+    hits = grid.nearest(2 * CELL_DEG + 0.00001, 0.0001, 1000, 1)
+    assert [item_id for _, item_id in hits] == ["next-cell"]
+
+    grid = GeoGrid(CELL_DEG)
+    corners = {"ne": (0.0001, 0.0001), "nw": (0.0001, -0.0001), "se": (-0.0001, 0.0001), "sw": (-0.0001, -0.0001)}
+    for item_id, (lat, lon) in corners.items():
+        grid.add(item_id, lat, lon)
+    assert len({grid._cell(lat, lon) for lat, lon in corners.values()}) == 4
+    assert sorted(item_id for _, item_id in grid.nearest(0.0, 0.0, 100, 10)) == ["ne", "nw", "se", "sw"]
+    assert [item_id for _, item_id in grid.nearest(-0.00005, -0.00008, 100, 1)] == ["sw"]
+
+def test_results_sorted_by_distance():
+    """Hits come nearest first with their distances, whatever the insertion order."""
+    grid = GeoGrid(CELL_DEG)
+    for i, offset in enumerate([0.004, 0.0005, 0.002, 0.0001, 0.003]):
+        grid.add(f"p-{i}", -12.1 + offset, -77.03)
+    hits = grid.nearest(-12.1, -77.03, 1000, 10)
+    assert [item_id for _, item_id in hits] == ["p-3", "p-1", "p-2", "p-4", "p-0"]
+    assert [distance for distance, _ in hits] == sorted(distance for distance, _ in hits)
+    assert hits[0][0] == pytest.approx(haversine_m(-12.1, -77.03, -12.0999, -77.03))
+    assert [item_id for _, item_id in grid.nearest(-12.1, -77.03, 1000, 2)] == ["p-3", "p-1"]
+
+def test_accept_filters_before_limit():
+    """Rejected ids do not use up the limit: the next accepted ones fill it."""
+    rng = random.Random(3)
+    points = random_points(rng, 500, (-12.11, -12.09), (-77.04, -77.02))
+    grid = grid_of(points)
+    even = lambda item_id: int(item_id.split("-")[1]) % 2 == 0
+    assert grid.nearest(-12.1, -77.03, 2000, 15, accept=even) == scan_nearest(points, -12.1, -77.03, 2000, 15, even)
+    assert grid.nearest(-12.1, -77.03, 2000, 15, accept=lambda item_id: False) == []
+    assert grid.nearest(-12.1, -77.03, 2000, 0) == []
+
+def test_move_and_remove():
+    """Adding an id again moves it; removing it leaves no empty cell behind."""
+    grid = GeoGrid(CELL_DEG)
+    grid.add("a", -12.1, -77.03)
+    grid.add("a", -12.2, -77.03)
+    assert len(grid) == 1
+    assert grid.nearest(-12.1, -77.03, 1000, 10) == []
+    assert [item_id for _, item_id in grid.nearest(-12.2, -77.03, 1000, 10)] == ["a"]
+    grid.remove("a")
+    grid.remove("a")
+    assert len(grid) == 0 and grid.stats()["cells"] == 0
+    assert grid.nearest(-12.2, -77.03, 1000, 10) == []
+
+def test_large_radius_covers_many_rings():
+    """A radius many cells wide still finds a lone far point."""
+    grid = GeoGrid(CELL_DEG)
+    grid.add("far", -12.1 + 0.09, -77.03)
+    hits = grid.nearest(-12.1, -77.03, 20000, 1)
+    assert [item_id for _, item_id in hits] == ["far"]
+    assert math.isclose(hits[0][0], haversine_m(-12.1, -77.03, -12.01, -77.03))
+
+
+# --- GET /cocheras/nearby ---
+
+@pytest.fixture()
+def nearby_client():
+    """App with the cocheras router and four spots 100-400 m north of the search point."""
+    database.init_sample_data()
+    for i, status in enumerate([CocheraStatus.available, CocheraStatus.available,
+                                CocheraStatus.available, CocheraStatus.maintenance]):
+        database.add_cochera(Cochera(id=f"near-{i}", location="Lima", price=5.0, status=status, size="Standard",
+                                     lat=-30.0 + (i + 1) * 0.0009, lon=-70.0))
+    app = FastAPI()
+    app.include_router(cocheras.router, prefix="/api/cocheras")
+    with TestClient(app) as client:
+        yield client
+
+def book(cochera_id, start, end, reserva_id):
+    assert database.book_reservation(Reserva(
+        id=reserva_id, cochera_id=cochera_id, user_id="u", start_time=start, end_time=end,
+        status=ReservationStatus.active, payment_status=PaymentStatus.pending
+    )) is None
+
+def nearby_ids(client, **params):
+    response = client.get("/api/cocheras/nearby", params={"lat": -30.0, "lon": -70.0, "radius": 1000, **params})
+    assert response.status_code == 200, response.text
+    return [spot["cochera_id"] for spot in response.json()]
+
+def test_nearby_ignores_reservations_outside_the_window(nearby_client):
+    """A spot booked only for tomorrow is listed now; it is hidden for a window that overlaps the booking."""
+    tomorrow = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    book("near-0", tomorrow, tomorrow + timedelta(hours=2), "r-tomorrow")
+    assert database.cocheras_db["near-0"].status == CocheraStatus.reserved
+    assert nearby_ids(nearby_client) == ["near-0", "near-1", "near-2"]
+    window = {"start_time": (tomorrow + timedelta(hours=1)).isoformat(),
+              "end_time": (tomorrow + timedelta(hours=3)).isoformat()}
+    assert nearby_ids(nearby_client, **window) == ["near-1", "near-2"]
+    # Touching the reservation's end is not an overlap
+    window = {"start_time": (tomorrow + timedelta(hours=2)).isoformat(),
+              "end_time": (tomorrow + timedelta(hours=3)).isoformat()}
+    assert nearby_ids(nearby_client, **window) == ["near-0", "near-1", "near-2"]
+
+def test_nearby_default_window_is_the_next_hour(nearby_client):
+    """Without a window, a reservation that starts within the hour hides the spot; maintenance is always hidden."""
+    now = datetime.now().replace(microsecond=0)
+    book("near-1", now + timedelta(minutes=30), now + timedelta(hours=2), "r-soon")
+    book("near-2", now + timedelta(hours=3), now + timedelta(hours=4), "r-later")
+    assert nearby_ids(nearby_client) == ["near-0", "near-2"]
+    assert nearby_ids(nearby_client, start_time=(now + timedelta(hours=3, minutes=30)).isoformat()) == ["near-0", "near-1"]
+
+def test_nearby_sorted_with_distances(nearby_client):
+    response = nearby_client.get("/api/cocheras/nearby", params={"lat": -30.0, "lon": -70.0, "radius": 250})
+    spots = response.json()
+    assert [spot["cochera_id"] for spot in spots] == ["near-0", "near-1"]
+    assert spots[0]["distance_m"] < spots[1]["distance_m"] <= 250
+
+def test_nearby_rejects_bad_windows(nearby_client):
+    now = datetime.now().replace(microsecond=0)
+    params = {"lat": -30.0, "lon": -70.0}
+    response = nearby_client.get("/api/cocheras/nearby", params={
+        **params, "start_time": now.isoformat(), "end_time": (now - timedelta(hours=1)).isoformat()})
+    assert response.status_code == 400
+    response = nearby_client.get("/api/cocheras/nearby", params={**params, "start_time": now.isoformat() + "+00:00"})
+    assert response.status_code == 400
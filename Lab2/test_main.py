@@ -51,6 +51,12 @@ def get_user_id(client: TestClient, user_credentials):
         return response.json().get("user_id")
     return None
 
+def auth_headers(client: TestClient, user_credentials):
+    """Helper to log in and build the bearer header for authenticated routes."""
+    response = client.post("/api/auth/login", json=user_credentials)
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
 # --- Test Functions ---
 
 # == Core Authentication Tests (/api/auth) ==
@@ -176,7 +182,7 @@ def test_delete_cochera_with_active_reservation_fails(client: TestClient):
 def test_list_reservations_client(client: TestClient):
     """Test listing reservations for the logged-in client."""
     client_id = get_user_id(client, CLIENT_USER)
-    response = client.get("/api/reservas/", json={"username": CLIENT_USER["username"]})
+    response = client.get("/api/reservas/", headers=auth_headers(client, CLIENT_USER))
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
@@ -191,7 +197,7 @@ def test_get_reservation_client_success(client: TestClient):
     reserva_id = next((rid for rid, r in reservas_db.items() if r.get("user_id") == client_id), None)
     assert reserva_id is not None, "Client should have an initial reservation."
 
-    response = client.get(f"/api/reservas/{reserva_id}", json={"username": CLIENT_USER["username"]})
+    response = client.get(f"/api/reservas/{reserva_id}", headers=auth_headers(client, CLIENT_USER))
     assert response.status_code == 200
     assert response.json()["reserva_id"] == reserva_id
 
@@ -204,11 +210,8 @@ def test_create_reservation_client_success(client: TestClient):
 
     start_time = (datetime.now() + timedelta(days=1)).isoformat()
     end_time = (datetime.now() + timedelta(days=1, hours=2)).isoformat()
-    reservation_data = {
-        "reserva": {"cochera_id": cochera_id, "start_time": start_time, "end_time": end_time},
-        "username": CLIENT_USER["username"]
-    }
-    response = client.post("/api/reservas/", json=reservation_data)
+    reservation_data = {"cochera_id": cochera_id, "start_time": start_time, "end_time": end_time}
+    response = client.post("/api/reservas/", json=reservation_data, headers=auth_headers(client, CLIENT_USER))
     assert response.status_code == 200
     data = response.json()
     assert data["cochera_id"] == cochera_id
@@ -224,11 +227,8 @@ def test_update_reservation_client_cancel_success(client: TestClient):
     assert reserva_id is not None, "Client should have an active reservation to cancel."
     cochera_id = reservas_db[reserva_id]["cochera_id"]
 
-    update_payload = {
-        "update_data": {"status": "cancelled"},
-        "username": CLIENT_USER["username"]
-    }
-    response = client.patch(f"/api/reservas/{reserva_id}", json=update_payload)
+    update_payload = {"status": "cancelled"}
+    response = client.patch(f"/api/reservas/{reserva_id}", json=update_payload, headers=auth_headers(client, CLIENT_USER))
     assert response.status_code == 200
     assert response.json()["status"] == "cancelled"
     assert reservas_db[reserva_id]["status"] == "cancelled" # Verify in DB
@@ -248,17 +248,14 @@ def completed_reservation_for_review(client: TestClient):
     # Create reservation as client
     start_time = (datetime.now() + timedelta(minutes=1)).isoformat() # Short times for testing
     end_time = (datetime.now() + timedelta(minutes=5)).isoformat()
-    create_payload = {
-        "reserva": {"cochera_id": available_cochera_id, "start_time": start_time, "end_time": end_time},
-        "username": CLIENT_USER["username"]
-    }
-    create_resp = client.post("/api/reservas/", json=create_payload)
+    create_payload = {"cochera_id": available_cochera_id, "start_time": start_time, "end_time": end_time}
+    create_resp = client.post("/api/reservas/", json=create_payload, headers=auth_headers(client, CLIENT_USER))
     if create_resp.status_code != 200: pytest.fail("Failed to create reservation for review.")
     reserva_id = create_resp.json()["reserva_id"]
 
     # Mark as completed by owner
-    complete_payload = {"update_data": {"status": "completed"}, "username": OWNER_USER["username"]}
-    complete_resp = client.patch(f"/api/reservas/{reserva_id}", json=complete_payload)
+    complete_payload = {"status": "completed"}
+    complete_resp = client.patch(f"/api/reservas/{reserva_id}", json=complete_payload, headers=auth_headers(client, OWNER_USER))
     if complete_resp.status_code != 200: pytest.fail("Failed to complete reservation for review.")
 
     client_user_id = get_user_id(client, CLIENT_USER)
@@ -0,0 +1,277 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import database
+from functions import cocheras
+from models import Cochera, CocheraStatus, Reserva, ReservationStatus, PaymentStatus
+from occupancy import OccupancyMatrix, OCCUPANCY_SLOT_MINUTES
+
+T0 = datetime(2025, 5, 10)
+SLOT = timedelta(minutes=OCCUPANCY_SLOT_MINUTES)  # slots of database.occupancy
+
+
+# --- Helpers ---
+
+def rebuilt(matrix: OccupancyMatrix, cochera_ids, reservations) -> OccupancyMatrix:
+    """A fresh matrix at matrix's origin with every (cochera_id, start, end) booked: what a roll must leave."""
+    slot_minutes = int(matrix.slot.total_seconds() // 60)
+    fresh = OccupancyMatrix(slot_minutes, matrix.n_slots * slot_minutes // (24 * 60), origin=matrix.origin)
+    for cochera_id in cochera_ids:
+        fresh.add_cochera(cochera_id, "Surco", CocheraStatus.available)
+    for cochera_id, start, end in reservations:
+        fresh.book(cochera_id, start, end)
+    return fresh
+
+def assert_same_cells(matrix: OccupancyMatrix, expected: OccupancyMatrix) -> None:
+    n = len(matrix)
+    assert matrix.origin == expected.origin
+    np.testing.assert_array_equal(matrix._cells[:, :n], expected._cells[:, :n])
+
+def roll_and_rebook(matrix: OccupancyMatrix, origin: datetime, reservations) -> None:
+    """What database.roll_occupancy does, with a plain list instead of the reservation calendar."""
+    start, end = matrix.roll(origin)
+    for cochera_id, r_start, r_end in reservations:
+        if r_start < end and start < r_end:
+            matrix.book(cochera_id, max(r_start, start), r_end)
+
+
+# --- OccupancyMatrix.roll ---
+
+def test_roll_partial_day():
+    """A roll to a time that is not a slot boundary moves by whole slots and re-books the uncovered part."""
+    matrix = OccupancyMatrix(15, 2, origin=T0)
+    matrix.add_cochera("c-1", "Surco", CocheraStatus.available)
+    reservations = [("c-1", T0 + timedelta(hours=1), T0 + timedelta(hours=2)),
+                    # Runs past the end of the horizon: only its first hour is in the matrix
+                    ("c-1", T0 + timedelta(hours=47), T0 + timedelta(hours=50))]
+    for reservation in reservations:
+        matrix.book(*reservation)
+
+    start, end = matrix.roll(T0 + timedelta(hours=6, minutes=7))
+    assert matrix.origin == T0 + timedelta(hours=6)
+    assert (start, end) == (T0 + timedelta(hours=48), T0 + timedelta(hours=54))
+    for cochera_id, r_start, r_end in reservations:
+        if r_start < end and start < r_end:
+            matrix.book(cochera_id, max(r_start, start), r_end)
+    assert_same_cells(matrix, rebuilt(matrix, ["c-1"], reservations))
+    # The re-booked tail counts once per slot, not twice
+    assert matrix._cells[:, 0].max() == 1
+
+@pytest.mark.parametrize("days", [2, 3, 10])
+def test_roll_by_horizon_or_more(days):
+    """Rolling by the whole horizon or more clears the matrix and returns the new horizon as uncovered."""
+    matrix = OccupancyMatrix(15, 2, origin=T0)
+    matrix.add_cochera("c-1", "Surco", CocheraStatus.available)
+    matrix.book("c-1", T0 + timedelta(hours=1), T0 + timedelta(hours=40))
+    origin = T0 + timedelta(days=days)
+    assert matrix.roll(origin) == (origin, origin + timedelta(days=2))
+    assert matrix.origin == origin
+    assert not matrix._cells.any()
+    later = ("c-1", origin + timedelta(hours=3), origin + timedelta(hours=5))
+    roll_and_rebook(matrix, origin, [later])
+    assert not matrix._cells.any()
+
+def test_roll_backwards_is_a_no_op():
+    matrix = OccupancyMatrix(15, 2, origin=T0)
+    matrix.add_cochera("c-1", "Surco", CocheraStatus.available)
+    matrix.book("c-1", T0, T0 + timedelta(hours=1))
+    before = matrix._cells.copy()
+    assert matrix.roll(T0) == (matrix.end, matrix.end)
+    assert matrix.roll(T0 - timedelta(days=1)) == (matrix.end, matrix.end)
+    assert matrix.roll(T0 + timedelta(minutes=14)) == (matrix.end, matrix.end)
+    assert matrix.origin == T0
+    np.testing.assert_array_equal(matrix._cells, before)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_rolls_match_a_rebuilt_matrix(seed):
+    """Random bookings, releases and rolls (partial, whole days, past the horizon) leave the same cells as a rebuild."""
+    rng = random.Random(seed)
+    matrix = OccupancyMatrix(15, 2, origin=T0)
+    cochera_ids = [f"c-{i}" for i in range(6)]
+    for cochera_id in cochera_ids:
+        matrix.add_cochera(cochera_id, "Surco", CocheraStatus.available)
+    reservations = []
+    for step in range(300):
+        action = rng.random()
+        if action < 0.6:
+            # Not slot-aligned, and anywhere from before the matrix to well past its end
+            start = matrix.origin + timedelta(minutes=rng.randrange(-6 * 60, 4 * 24 * 60))
+            reservation = (rng.choice(cochera_ids), start, start + timedelta(minutes=rng.randrange(5, 10 * 60)))
+            reservations.append(reservation)
+            matrix.book(*reservation)
+        elif action < 0.8 and reservations:
+            matrix.release(*reservations.pop(rng.randrange(len(reservations))))
+        else:
+            step_minutes = rng.choice([7, 15, 6 * 60 + 7, 24 * 60, 2 * 24 * 60, 5 * 24 * 60])
+            roll_and_rebook(matrix, matrix.origin + timedelta(minutes=step_minutes), reservations)
+            # Reservations that ended before the new origin are gone from the matrix for good
+            reservations = [r for r in reservations if r[2] > matrix.origin]
+            assert_same_cells(matrix, rebuilt(matrix, cochera_ids, reservations))
+    assert_same_cells(matrix, rebuilt(matrix, cochera_ids, reservations))
+
+
+# --- database.roll_occupancy and the endpoints ---
+
+def floor_slot(moment: datetime, origin: datetime) -> datetime:
+    return origin + (moment - origin) // SLOT * SLOT
+
+def ceil_slot(moment: datetime, origin: datetime) -> datetime:
+    return origin - (origin - moment) // SLOT * SLOT
+
+def busy_slots(cochera_id: str, start: datetime, end: datetime, origin: datetime) -> int:
+    """Slots of [start, end) touched by an active reservation of the cochera, from the reservation calendar."""
+    intervals = database.reservation_calendar.intervals(cochera_id)
+    slot, count = floor_slot(start, origin), 0
+    while slot < ceil_slot(end, origin):
+        count += any(r_start < slot + SLOT and slot < r_end for r_start, r_end, _ in intervals)
+        slot += SLOT
+    return count
+
+def expected_available(start: datetime, end: datetime, origin: datetime):
+    return [c.id for c in database.cocheras_db.values()
+            if c.status != CocheraStatus.maintenance and not busy_slots(c.id, start, end, origin)]
+
+def expected_occupancy(start: datetime, end: datetime, origin: datetime):
+    slots = (ceil_slot(end, origin) - floor_slot(start, origin)) // SLOT
+    report = {}
+    for c in database.cocheras_db.values():
+        if c.status != CocheraStatus.maintenance:
+            cocheras_count, busy = report.get(c.location, (0, 0))
+            report[c.location] = (cocheras_count + 1, busy + busy_slots(c.id, start, end, origin))
+    return {location: {"cocheras": n, "occupancy": round(busy / (n * slots), 4)}
+            for location, (n, busy) in report.items()}
+
+@pytest.fixture()
+def started_days_ago():
+    """
+    State of a process whose matrix was built three days ago and never rolled since, with
+    reservations that end before today, cross the old horizon's end, or start after it.
+    """
+    database.init_sample_data()
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    matrix = database.occupancy
+    matrix.clear(today - timedelta(days=3))
+    for c in database.cocheras_db.values():
+        matrix.add_cochera(c.id, c.location, c.status)
+    for r in database.reservas_db.values():
+        matrix.book(r.cochera_id, r.start_time, r.end_time)
+
+    rng = random.Random(25)
+    for i in range(24):
+        database.add_cochera(Cochera(
+            id=f"occ-{i}", location=["Surco", "Lince", "Barranco"][i % 3], price=5.0, size="Standard",
+            status=CocheraStatus.maintenance if i % 8 == 7 else CocheraStatus.available
+        ))
+    old_end = matrix.end
+    fixed = [("occ-0", today - timedelta(days=1), today - timedelta(hours=20)),
+             ("occ-1", old_end - timedelta(hours=2, minutes=10), old_end + timedelta(hours=3, minutes=5)),
+             ("occ-2", old_end + timedelta(days=1, hours=10), old_end + timedelta(days=1, hours=12)),
+             ("occ-3", today - timedelta(hours=2), today + timedelta(hours=1, minutes=20))]
+    randoms = []
+    for _ in range(150):
+        start = today - timedelta(days=3) + timedelta(minutes=rng.randrange(0, 10 * 24 * 60))
+        randoms.append((f"occ-{rng.randrange(24)}", start, start + timedelta(minutes=rng.randrange(10, 8 * 60))))
+    for i, (cochera_id, start, end) in enumerate(fixed + randoms):
+        if database.cocheras_db[cochera_id].status == CocheraStatus.maintenance:
+            continue
+        database.book_reservation(Reserva(
+            id=f"occ-r{i}", cochera_id=cochera_id, user_id="u", start_time=start, end_time=end,
+            status=ReservationStatus.active, payment_status=PaymentStatus.pending
+        ))
+
+    app = FastAPI()
+    app.include_router(cocheras.router, prefix="/api/cocheras")
+    with TestClient(app) as client:
+        yield client, today, old_end
+
+def test_roll_occupancy_matches_the_calendar(started_days_ago):
+    """After roll_occupancy the matrix equals one built from scratch from the reservation calendar."""
+    _, today, old_end = started_days_ago
+    database.roll_occupancy()
+    matrix = database.occupancy
+    assert matrix.origin == today and matrix.end == today + timedelta(days=7) > old_end
+    ids = list(database.cocheras_db)
+    reservations = [(cochera_id, start, end) for cochera_id in ids
+                    for start, end, _ in database.reservation_calendar.intervals(cochera_id)]
+    assert_same_cells(matrix, rebuilt(matrix, ids, reservations))
+    # Rolling again the same day changes nothing
+    before = matrix._cells.copy()
+    database.roll_occupancy()
+    np.testing.assert_array_equal(matrix._cells, before)
+
+def test_endpoints_after_roll_match_the_calendar(started_days_ago):
+    """/available and /occupancy roll the matrix first; their answers match a slot-by-slot check of the calendar."""
+    client, today, old_end = started_days_ago
+    windows = [(today, today + timedelta(hours=2)),
+               (today + timedelta(hours=9, minutes=10), today + timedelta(hours=13, minutes=50)),
+               (old_end - timedelta(hours=3), old_end + timedelta(hours=1)),
+               (old_end + timedelta(hours=20), old_end + timedelta(days=1, hours=14)),
+               (today + timedelta(days=6, hours=20), today + timedelta(days=7))]
+    for start, end in windows:
+        params = {"start_time": start.isoformat(), "end_time": end.isoformat()}
+        response = client.get("/api/cocheras/available", params=params)
+        assert response.status_code == 200, response.text
+        assert database.occupancy.origin == today
+        assert [c["cochera_id"] for c in response.json()] == expected_available(start, end, today), (start, end)
+
+        response = client.get("/api/cocheras/occupancy", params=params)
+        assert response.status_code == 200, response.text
+        assert response.json() == expected_occupancy(start, end, today), (start, end)
+
+        response = client.get("/api/cocheras/available", params={**params, "location": "lince"})
+        assert [c["cochera_id"] for c in response.json()] == [
+            c_id for c_id in expected_available(start, end, today) if database.cocheras_db[c_id].location == "Lince"]
+
+def test_endpoints_reject_windows_outside_the_rolled_matrix(started_days_ago):
+    client, today, _ = started_days_ago
+    params = {"start_time": (today - timedelta(days=1)).isoformat(), "end_time": today.isoformat()}
+    assert client.get("/api/cocheras/available", params=params).status_code == 400
+    params = {"start_time": (today + timedelta(days=6)).isoformat(), "end_time": (today + timedelta(days=8)).isoformat()}
+    assert client.get("/api/cocheras/occupancy", params=params).status_code == 400
+
+
+# --- database.book_reservation keeps the calendar and the matrix together ---
+
+def new_reserva(reserva_id, start, end):
+    return Reserva(id=reserva_id, cochera_id="occ-book", user_id="u", start_time=start, end_time=end,
+                   status=ReservationStatus.active, payment_status=PaymentStatus.pending)
+
+@pytest.fixture()
+def bookable():
+    database.init_sample_data()
+    database.add_cochera(Cochera(id="occ-book", location="Surco", price=5.0, status=CocheraStatus.available,
+                                 size="Standard"))
+    return datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+@pytest.mark.parametrize("aware_end", [False, True])
+def test_book_rejects_aware_or_empty_windows_before_storing(bookable, aware_end):
+    start = bookable.replace(tzinfo=timezone.utc)
+    end = start + timedelta(hours=2)
+    with pytest.raises(ValueError):
+        database.book_reservation(new_reserva("tz", start, end.replace(tzinfo=None) if not aware_end else end))
+    with pytest.raises(ValueError):
+        database.book_reservation(new_reserva("empty", bookable, bookable))
+    assert database.reservation_calendar.intervals("occ-book") == []
+    assert "tz" not in database.reservas_db and "empty" not in database.reservas_db
+    assert database.cocheras_db["occ-book"].status == CocheraStatus.available
+    # Naive checks on the cochera still work
+    assert database.is_free("occ-book", bookable, bookable + timedelta(hours=1))
+    assert database.book_reservation(new_reserva("ok", bookable, bookable + timedelta(hours=1))) is None
+
+def test_book_rolls_back_the_calendar_when_the_matrix_fails(bookable, monkeypatch):
+    def broken_book(cochera_id, start, end):
+        raise RuntimeError("matrix unavailable")
+
+    monkeypatch.setattr(database.occupancy, "book", broken_book)
+    with pytest.raises(RuntimeError):
+        database.book_reservation(new_reserva("lost", bookable, bookable + timedelta(hours=1)))
+    assert database.reservation_calendar.intervals("occ-book") == []
+    assert "lost" not in database.reservas_db
+    monkeypatch.undo()
+    assert database.book_reservation(new_reserva("again", bookable, bookable + timedelta(hours=1))) is None
+    assert [reserva_id for _, _, reserva_id in database.reservation_calendar.intervals("occ-book")] == ["again"]
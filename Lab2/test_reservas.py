@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import database
+from functions import auth, cocheras, reservas
+from models import Cochera, CocheraStatus, Reserva, ReservaUpdate, ReservationStatus, PaymentStatus
+
+
+# --- Fixtures ---
+
+@pytest.fixture()
+def client():
+    """App with the auth, reservas and cocheras routers, a fresh sample dataset and one spot with coordinates."""
+    database.init_sample_data()
+    database.add_cochera(Cochera(id="tz-1", location="Lima", price=5.0, status=CocheraStatus.available,
+                                 size="Standard", lat=-30.0, lon=-70.0))
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(reservas.router, prefix="/api/reservas")
+    app.include_router(cocheras.router, prefix="/api/cocheras")
+    with TestClient(app) as c:
+        yield c
+
+CLIENT_USER = {"username": "parking_client", "password": "client123"}
+
+def auth_headers(client: TestClient):
+    response = client.post("/api/auth/login", json=CLIENT_USER)
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def tomorrow() -> datetime:
+    return datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+# --- Test Functions ---
+
+@pytest.mark.parametrize("start_suffix, end_suffix", [("+00:00", "+00:00"), ("+00:00", ""), ("", "-05:00")])
+def test_create_rejects_timezone_aware_times(client: TestClient, start_suffix, end_suffix):
+    """An aware start or end time is a 400, and nothing is stored for the cochera."""
+    start = tomorrow()
+    payload = {"cochera_id": "tz-1",
+               "start_time": start.isoformat() + start_suffix,
+               "end_time": (start + timedelta(hours=2)).isoformat() + end_suffix}
+    response = client.post("/api/reservas/", json=payload, headers=auth_headers(client))
+    assert response.status_code == 400
+    assert "timezone" in response.json()["detail"]
+    assert database.reservation_calendar.intervals("tz-1") == []
+    assert database.cocheras_db["tz-1"].status == CocheraStatus.available
+
+    # Later naive checks and searches on the cochera keep working
+    assert database.is_free("tz-1", start, start + timedelta(hours=1))
+    response = client.get("/api/cocheras/nearby", params={"lat": -30.0, "lon": -70.0})
+    assert response.status_code == 200
+    assert [spot["cochera_id"] for spot in response.json()] == ["tz-1"]
+
+def test_create_rejects_empty_window(client: TestClient):
+    start = tomorrow()
+    payload = {"cochera_id": "tz-1", "start_time": start.isoformat(), "end_time": start.isoformat()}
+    response = client.post("/api/reservas/", json=payload, headers=auth_headers(client))
+    assert response.status_code == 400
+    assert database.reservation_calendar.intervals("tz-1") == []
+
+def test_nearby_rejects_timezone_aware_window(client: TestClient):
+    response = client.get("/api/cocheras/nearby", params={
+        "lat": -30.0, "lon": -70.0, "end_time": (tomorrow().isoformat() + "+00:00")})
+    assert response.status_code == 400
+
+def test_reactivation_rejects_timezone_aware_times():
+    """Reactivating a reservation with aware times is a 400 and does not touch the calendar."""
+    database.init_sample_data()
+    database.add_cochera(Cochera(id="tz-2", location="Lima", price=5.0, status=CocheraStatus.available,
+                                 size="Standard"))
+    start = tomorrow().astimezone()
+    database.reservas_db["tz-r"] = Reserva(
+        id="tz-r", cochera_id="tz-2", user_id="u", start_time=start, end_time=start + timedelta(hours=1),
+        status=ReservationStatus.cancelled, payment_status=PaymentStatus.pending
+    )
+    # Neither client nor owner: past the permission checks, straight to the status change
+    with pytest.raises(HTTPException) as excinfo:
+        reservas.update_reservation("tz-r", ReservaUpdate(status=ReservationStatus.active),
+                                    current_user={"user_id": "admin", "role": "admin"})
+    assert excinfo.value.status_code == 400
+    assert database.reservas_db["tz-r"].status == ReservationStatus.cancelled
+    assert database.reservation_calendar.intervals("tz-2") == []
@@ -0,0 +1,148 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from models import Cochera, CocheraStatus, Reserva, ReservationStatus, PaymentStatus
+from reservation_calendar import IntervalList, ReservationCalendar
+
+T0 = datetime(2025, 5, 10, 8, 0)
+
+
+def at(hours: float) -> datetime:
+    return T0 + timedelta(hours=hours)
+
+
+# --- IntervalList ---
+
+@pytest.fixture()
+def intervals():
+    """Reservations at 10-12 and 14-16."""
+    intervals = IntervalList()
+    intervals.add("r-10", at(10), at(12))
+    intervals.add("r-14", at(14), at(16))
+    return intervals
+
+def test_touching_intervals_do_not_conflict(intervals):
+    """[start, end) intervals: ending when another starts, or starting when it ends, is free."""
+    assert intervals.conflict(at(8), at(10)) is None
+    assert intervals.conflict(at(12), at(14)) is None
+    assert intervals.conflict(at(16), at(18)) is None
+
+def test_overlaps_by_any_amount_conflict(intervals):
+    assert intervals.conflict(at(9), at(10.01)) == "r-10"
+    assert intervals.conflict(at(11.99), at(13)) == "r-10"
+    assert intervals.conflict(at(10.5), at(11)) == "r-10"
+    assert intervals.conflict(at(9), at(13)) == "r-10"
+    assert intervals.conflict(at(10), at(12)) == "r-10"
+
+def test_conflict_with_both_neighbours(intervals):
+    """A period overlapping the reservations on both sides reports one of them; a gap between them is free."""
+    assert intervals.conflict(at(11), at(15)) in {"r-10", "r-14"}
+    assert intervals.conflict(at(9), at(17)) in {"r-10", "r-14"}
+    intervals.add("r-12", at(12), at(14))
+    assert intervals.conflict(at(11.5), at(14.5)) in {"r-10", "r-12", "r-14"}
+    assert intervals.conflict(at(12), at(14)) == "r-12"
+
+def test_release_nonexistent_id(intervals):
+    """Removing an unknown id, or a known id with the wrong start, changes nothing."""
+    assert intervals.remove("r-missing", at(10)) is False
+    assert intervals.remove("r-14", at(10)) is False
+    assert intervals.remove("r-10", at(11)) is False
+    assert intervals.remove("r-10", at(20)) is False
+    assert len(intervals) == 2
+    assert intervals.remove("r-10", at(10)) is True
+    assert intervals.remove("r-10", at(10)) is False
+    assert intervals.conflict(at(10), at(12)) is None
+    assert intervals.conflict(at(14), at(15)) == "r-14"
+
+def test_intervals_stay_sorted():
+    intervals = IntervalList()
+    for reserva_id, start in (("c", 20), ("a", 0), ("b", 10)):
+        intervals.add(reserva_id, at(start), at(start + 5))
+    assert intervals.ids == ["a", "b", "c"]
+    assert intervals.starts == sorted(intervals.starts) and intervals.ends == sorted(intervals.ends)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force(seed):
+    """Random bookings and releases on whole hours, so many periods touch: same answers as checking every interval."""
+    rng = random.Random(seed)
+    intervals = IntervalList()
+    booked = {}  # reserva_id -> (start, end)
+    for step in range(1000):
+        if booked and rng.random() < 0.3:
+            reserva_id = rng.choice(list(booked))
+            assert intervals.remove(reserva_id, booked.pop(reserva_id)[0])
+            continue
+        start = at(rng.randrange(0, 200))
+        end = start + timedelta(hours=rng.randint(1, 6))
+        overlapping = {r_id for r_id, (s, e) in booked.items() if s < end and start < e}
+        conflict = intervals.conflict(start, end)
+        if overlapping:
+            assert conflict in overlapping
+        else:
+            assert conflict is None
+            intervals.add(f"r-{step}", start, end)
+            booked[f"r-{step}"] = (start, end)
+    assert sorted(intervals.ids) == sorted(booked)
+
+
+# --- ReservationCalendar ---
+
+def test_calendar_book_and_release():
+    calendar = ReservationCalendar()
+    assert calendar.book("c-1", "r-1", at(10), at(12)) is None
+    assert calendar.book("c-1", "r-2", at(12), at(13)) is None
+    assert calendar.book("c-1", "r-3", at(11), at(12.5)) in {"r-1", "r-2"}
+    # Another cochera has its own intervals
+    assert calendar.book("c-2", "r-4", at(11), at(12.5)) is None
+    assert calendar.conflict("c-1", at(13), at(14)) is None
+    assert calendar.conflict("c-3", at(0), at(24)) is None
+    assert [reserva_id for _, _, reserva_id in calendar.intervals("c-1")] == ["r-1", "r-2"]
+
+    assert calendar.release("c-1", "r-missing", at(10)) is False
+    assert calendar.release("c-9", "r-1", at(10)) is False
+    assert calendar.release("c-1", "r-1", at(10)) is True
+    assert calendar.has_active("c-1")
+    assert calendar.release("c-1", "r-2", at(12)) is True
+    assert not calendar.has_active("c-1")
+    assert calendar.release("c-1", "r-2", at(12)) is False
+
+def test_calendar_overlapping():
+    """overlapping() lists every interval touching the period's inside, not the ones only touching its ends."""
+    calendar = ReservationCalendar()
+    calendar.book("c-1", "r-1", at(8), at(10))
+    calendar.book("c-1", "r-2", at(10), at(12))
+    calendar.book("c-2", "r-3", at(11), at(15))
+    calendar.book("c-3", "r-4", at(12), at(13))
+    found = sorted(reserva_id for _, _, _, reserva_id in calendar.overlapping(at(10), at(12)))
+    assert found == ["r-2", "r-3"]
+
+
+# --- database.book_reservation / release_reservation ---
+
+def reserva(reserva_id, cochera_id, start, end):
+    return Reserva(id=reserva_id, cochera_id=cochera_id, user_id="u", start_time=start, end_time=end,
+                   status=ReservationStatus.active, payment_status=PaymentStatus.pending)
+
+def test_booking_keeps_status_in_sync():
+    """The cochera stays reserved until its last active reservation is released; a conflict stores nothing."""
+    database.init_sample_data()
+    database.add_cochera(Cochera(id="cal-1", location="Surco", price=5.0, status=CocheraStatus.available,
+                                 size="Standard"))
+    first, second = reserva("cal-r1", "cal-1", at(10), at(12)), reserva("cal-r2", "cal-1", at(12), at(14))
+    assert database.book_reservation(first) is None
+    assert database.book_reservation(second) is None
+    assert database.book_reservation(reserva("cal-r3", "cal-1", at(13), at(15))) == "cal-r2"
+    assert "cal-r3" not in database.reservas_db
+    assert database.cocheras_db["cal-1"].status == CocheraStatus.reserved
+
+    database.release_reservation(first)
+    assert database.cocheras_db["cal-1"].status == CocheraStatus.reserved
+    # Releasing twice must not free the cochera while cal-r2 is still active
+    database.release_reservation(first)
+    assert database.cocheras_db["cal-1"].status == CocheraStatus.reserved
+    database.release_reservation(second)
+    assert database.cocheras_db["cal-1"].status == CocheraStatus.available
+    assert database.reservation_calendar.intervals("cal-1") == []